@@ -23,10 +23,12 @@ def create_app(config_name='development', test_config=None):
     from routes.auth_routes import auth_bp
     from routes.admin import admin_bp
     from routes.faculty_routes import faculty_bp
+    from routes.api_routes import api_bp
 
     app.register_blueprint(auth_bp)
     app.register_blueprint(admin_bp)
     app.register_blueprint(faculty_bp)
+    app.register_blueprint(api_bp)
 
     from flask import session
     
@@ -39,7 +41,15 @@ def create_app(config_name='development', test_config=None):
             'faculty_name': session.get('faculty_name')
         }
 
-    
+
+    # Background analytics refresh; started by the first request so CLI commands don't spawn it
+    from services.analytics_service import AnalyticsStore
+
+    @app.before_request
+    def start_analytics_worker():
+        if AnalyticsStore._worker is None:
+            AnalyticsStore.start_worker(app)
+
     # Register CLI Commands
     from commands import register_commands
     register_commands(app)
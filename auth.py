@@ -1,5 +1,6 @@
 from functools import wraps
-from flask import session, redirect, url_for, flash
+from flask import session, redirect, url_for, flash, request, jsonify, current_app
+import hmac
 
 def admin_required(view_func):
     @wraps(view_func)
@@ -9,3 +10,33 @@ def admin_required(view_func):
             return redirect(url_for("auth.admin_login"))
         return view_func(*args, **kwargs)
     return wrapped_view
+
+
+
+def _token_ok(config_key):
+    token = current_app.config.get(config_key)
+    supplied = request.headers.get("X-API-Key", "")
+    return bool(token) and hmac.compare_digest(supplied.encode(), token.encode())
+
+
+def api_auth_required(view_func):
+    """
+    JSON endpoints: a logged-in admin or faculty session, or the kiosk token
+    (TIMETABLE_API_TOKEN) in an X-API-Key header. Answers 401 instead of redirecting.
+    """
+    @wraps(view_func)
+    def wrapped_view(*args, **kwargs):
+        if "admin_id" in session or "faculty_id" in session or _token_ok("TIMETABLE_API_TOKEN"):
+            return view_func(*args, **kwargs)
+        return jsonify({"error": "Authentication required"}), 401
+    return wrapped_view
+
+
+def attendance_api_required(view_func):
+    """Attendance writes: an admin session, or ATTENDANCE_API_TOKEN (biometric devices) in X-API-Key."""
+    @wraps(view_func)
+    def wrapped_view(*args, **kwargs):
+        if "admin_id" in session or _token_ok("ATTENDANCE_API_TOKEN"):
+            return view_func(*args, **kwargs)
+        return jsonify({"error": "Authentication required"}), 401
+    return wrapped_view
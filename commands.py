@@ -64,8 +64,255 @@ def create_admin_command(username, password):
     db.session.commit()
     click.echo(f"Success! Admin '{username}' created.")
 
+def _refresh_analytics_if_changed():
+    # The web workers' refresh thread can't see writes made by this process
+    from services.analytics_service import AnalyticsStore
+    if AnalyticsStore.is_stale():
+        AnalyticsStore.refresh()
+
+@click.command("import-timetable")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--dry-run", is_flag=True, help="Validate only, do not insert")
+@click.option("--chunk-size", default=500, show_default=True, help="Rows per insert transaction")
+@click.option("--report", "report_path", type=click.Path(dir_okay=False), help="Write the per-row report to this CSV file")
+@with_appcontext
+def import_timetable_command(path, dry_run, chunk_size, report_path):
+    """Bulk import timetable slots from a CSV/XLSX file."""
+    from services.timetable_import import TimetableImporter, TimetableImportError, read_rows, summarize, write_report_csv
+
+    try:
+        with open(path, "rb") as f:
+            rows = read_rows(f, path)
+    except TimetableImportError as e:
+        click.echo(f"Error: {e}")
+        return
+
+    report = TimetableImporter(chunk_size=chunk_size).run(rows, dry_run=dry_run)
+
+    for r in report:
+        if r["status"] == "Rejected" or r["messages"]:
+            click.echo(f"Line {r['line']}: {r['status']} - {'; '.join(r['messages'])}")
+
+    if report_path:
+        with open(report_path, "w", newline="", encoding="utf-8") as f:
+            write_report_csv(report, f)
+        click.echo(f"Report written to {report_path}")
+
+    summary = summarize(report)
+    verb = "can be imported" if dry_run else "imported"
+    click.echo(f"{summary['accepted']} of {summary['total']} rows {verb}, {summary['rejected']} rejected.")
+    _refresh_analytics_if_changed()
+
+@click.command("generate-timetable")
+@click.option("--department", "department_id", type=int, help="Only generate for this department id")
+@click.option("--semester", help="Only use subject assignments for this semester")
+@click.option("--hours-per-subject", default=3, show_default=True, help="Weekly hours per class and subject")
+@click.option("--class-size", default=0, show_default=True, help="Minimum classroom capacity")
+@click.option("--time-budget", default=10.0, show_default=True, help="Seconds allowed for the repair search")
+@click.option("--commit", is_flag=True, help="Save the generated slots (default is a dry run)")
+@with_appcontext
+def generate_timetable_command(department_id, semester, hours_per_subject, class_size, time_budget, commit):
+    """Generate a clash-free week from faculty subject assignments."""
+    from flask import current_app
+    from services.scheduler_service import OccupancyIndex
+    from services.timetable_generator import TimetableGenerator, load_problem, apply_solution
+
+    lessons, rooms = load_problem(department_id, semester, hours_per_subject, class_size)
+    if not lessons:
+        click.echo("Nothing to schedule: no class is missing hours of its assigned subjects.")
+        return
+
+    generator = TimetableGenerator(
+        lessons, rooms,
+        max_hours=current_app.config.get("MAX_WORKLOAD_HOURS", 18),
+        occupancy=OccupancyIndex.build(),
+        time_budget=time_budget
+    )
+    solution = generator.solve()
+
+    click.echo(f"Placed {len(lessons) - len(solution.unassigned)} of {len(lessons)} lessons in {solution.elapsed:.2f}s.")
+    for i in solution.unassigned:
+        l = lessons[i]
+        click.echo(f"  Unplaced: faculty {l.faculty_id}, subject {l.subject_id}, class {l.academic_class_id}")
+
+    if commit:
+        count = apply_solution(solution)
+        click.echo(f"Saved {count} timetable slots.")
+        _refresh_analytics_if_changed()
+    else:
+        click.echo("Dry run: use --commit to save.")
+
+@click.command("bench-timetable-generator")
+@click.option("--classes", default="10,25,50,100,200", show_default=True, help="Comma-separated class counts")
+@click.option("--time-budget", default=10.0, show_default=True, help="Seconds allowed per solve")
+def bench_timetable_generator_command(classes, time_budget):
+    """Benchmark generator solve time against number of classes."""
+    from services.timetable_generator import benchmark
+
+    counts = [int(c) for c in classes.split(",") if c.strip()]
+    click.echo(f"{'classes':>8} {'lessons':>8} {'seconds':>9} {'unplaced':>9}")
+    for n, lessons, seconds, unplaced in benchmark(counts, time_budget=time_budget):
+        click.echo(f"{n:>8} {lessons:>8} {seconds:>9.3f} {unplaced:>9}")
+
+@click.command("reconcile-workload")
+@click.option("--fix", is_flag=True, help="Rewrite drifted counters")
+@with_appcontext
+def reconcile_workload_command(fix):
+    """Recompute faculty weekly-hours counters and report drift."""
+    from services.workload_service import WorkloadService
+
+    drift = WorkloadService.reconcile(fix=fix)
+    if not drift:
+        click.echo("All workload counters are in sync.")
+        return
+
+    for faculty_id, name, stored, actual in drift:
+        click.echo(f"  {name} (id {faculty_id}): stored {stored}h, timetable {actual}h")
+    if fix:
+        click.echo(f"Fixed {len(drift)} counter(s).")
+    else:
+        click.echo(f"{len(drift)} counter(s) drifted. Run with --fix to repair.")
+
+@click.command("import-attendance")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--date", "default_date", type=click.DateTime(formats=["%Y-%m-%d"]), help="Date for rows without a date column")
+@with_appcontext
+def import_attendance_command(path, default_date):
+    """Import attendance from a CSV (faculty_id or email, status, date), e.g. a biometric export."""
+    import csv
+    from services.attendance_service import AttendanceService
+
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        records = [
+            {(k or "").strip().lower(): v for k, v in row.items()}
+            for row in csv.DictReader(f)
+        ]
+
+    result, errors = AttendanceService.save_records(
+        records, default_date=default_date.date() if default_date else None
+    )
+    for message in errors:
+        click.echo(f"  {message}")
+    note = f", {len(result.on_leave)} recorded as Leave (approved leave)" if result.on_leave else ""
+    click.echo(f"Saved {result.saved} attendance record(s){note}.")
+
+@click.command("bench-leave-index")
+@click.option("--rows", default=100_000, show_default=True, help="Leave rows to generate")
+@click.option("--queries", default=1_000, show_default=True, help="Queries per operation")
+@click.option("--sql-index", is_flag=True, help="Give the SQL table the indexes the model declares (default: none)")
+def bench_leave_index_command(rows, queries, sql_index):
+    """Benchmark the approved-leave interval index against SQL range scans."""
+    from services.leave_index import benchmark
+
+    results, build_ms = benchmark(rows=rows, queries=queries, sql_index=sql_index)
+    click.echo(f"{rows} leave rows, index built in {build_ms:.0f} ms")
+    click.echo(f"{'operation':<28} {'sql ms':>9} {'index ms':>9} {'speedup':>8}")
+    for name, sql_ms, idx_ms in results:
+        click.echo(f"{name:<28} {sql_ms:>9.3f} {idx_ms:>9.4f} {sql_ms / max(idx_ms, 1e-9):>7.0f}x")
+
+@click.command("bench-pdf")
+@click.option("--documents", default=20, show_default=True, help="Documents per template")
+@click.option("--faculty-id", type=int, help="Faculty whose reports to render (default: most timetable slots)")
+@with_appcontext
+def bench_pdf_command(documents, faculty_id):
+    """Benchmark per-document PDF latency of the timetable, attendance and profile reports."""
+    from flask import current_app
+    from services.pdf_reports import benchmark
+
+    # The templates read the session through the context processor
+    with current_app.test_request_context():
+        try:
+            startup_ms, results = benchmark(documents=documents, faculty_id=faculty_id)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+
+    workers = current_app.config.get("PDF_WORKERS", 2)
+    where = f"{workers} worker process(es)" if workers else "In-process renderer"
+    click.echo(f"{where} warmed up in {startup_ms:.0f} ms")
+    click.echo(f"{'template':<12} {'cold ms':>9} {'single ms':>10} {'batch ms/doc':>13}")
+    for kind, cold_ms, single_ms, batch_ms in results:
+        click.echo(f"{kind:<12} {cold_ms:>9.1f} {single_ms:>10.1f} {batch_ms:>13.1f}")
+
+@click.command("explain-hot-queries")
+@click.option("--verbose", is_flag=True, help="Print every plan, not just failures")
+@with_appcontext
+def explain_hot_queries_command(verbose):
+    """EXPLAIN the hot route queries; exit 1 if any falls back to a full table scan."""
+    from services.query_plans import check
+
+    try:
+        results = check()
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    failed = [r for r in results if r.full_scans]
+    for r in results:
+        mark = "FULL SCAN" if r.full_scans else "ok"
+        click.echo(f"[{mark:>9}] {r.name}" + (f" ({', '.join(r.full_scans)})" if r.full_scans else ""))
+        if verbose or r.full_scans:
+            for line in r.plan:
+                click.echo(f"             {line}")
+
+    if failed:
+        click.echo(f"{len(failed)} of {len(results)} hot queries scan a whole table. Did you run 'flask db upgrade'?")
+        raise SystemExit(1)
+    click.echo(f"All {len(results)} hot queries use an index.")
+
+@click.command("check-grid-queries")
+@click.option("--small", default=5, show_default=True, type=click.IntRange(1), help="Classes in the small scratch database")
+@click.option("--large", default=25, show_default=True, type=click.IntRange(1), help="Classes in the large scratch database")
+@with_appcontext
+def check_grid_queries_command(small, large):
+    """Count the queries of the schedule tabs at two sizes; exit 1 if any count grows with the classes."""
+    from services.query_plans import grid_query_counts
+
+    try:
+        counts = grid_query_counts((small, large))
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    grown = [tab for tab, (few, many) in counts.items() if many > few]
+    for tab, (few, many) in counts.items():
+        mark = "GROWS" if tab in grown else "ok"
+        click.echo(f"[{mark:>5}] {tab}: {few} queries with {small} classes, {many} with {large}")
+
+    if grown:
+        click.echo(f"Query count of {', '.join(grown)} grows with the number of classes.")
+        raise SystemExit(1)
+    click.echo("Schedule tabs run a fixed number of queries.")
+
+@click.command("refresh-analytics")
+@with_appcontext
+def refresh_analytics_command():
+    """Store a fresh analytics dashboard snapshot (run from cron, or after bulk imports)."""
+    from services.analytics_service import AnalyticsStore
+
+    snapshot = AnalyticsStore.refresh()
+    click.echo(
+        f"Snapshot stored at {snapshot.computed_at:%Y-%m-%d %H:%M} UTC: "
+        f"{snapshot.counts['faculty']} active faculty, {snapshot.leave_status['Pending']} pending leaves."
+    )
+
+@click.command("rebuild-rollups")
+@with_appcontext
+def rebuild_rollups_command():
+    """Recompute the attendance / leave trend rollups from the raw tables."""
+    from services.rollup_service import RollupService
+
+    attendance, leave = RollupService.rebuild()
+    click.echo(f"Rebuilt {attendance} attendance and {leave} leave rollup rows.")
+
 def register_commands(app):
     """Register CLI commands with the application."""
     app.cli.add_command(init_db_command)
     app.cli.add_command(seed_db_command)
     app.cli.add_command(create_admin_command)
+    app.cli.add_command(import_timetable_command)
+    app.cli.add_command(generate_timetable_command)
+    app.cli.add_command(bench_timetable_generator_command)
+    app.cli.add_command(reconcile_workload_command)
+    app.cli.add_command(import_attendance_command)
+    app.cli.add_command(bench_leave_index_command)
+    app.cli.add_command(bench_pdf_command)
+    app.cli.add_command(explain_hot_queries_command)
+    app.cli.add_command(check_grid_queries_command)
+    app.cli.add_command(refresh_analytics_command)
+    app.cli.add_command(rebuild_rollups_command)
@@ -1,5 +1,6 @@
 from flask_wtf import FlaskForm
-from wtforms import StringField, EmailField, SelectField, IntegerField, TextAreaField, TimeField, SubmitField, SelectMultipleField, PasswordField, DateField
+from flask_wtf.file import FileField, FileRequired, FileAllowed
+from wtforms import StringField, EmailField, SelectField, IntegerField, TextAreaField, TimeField, SubmitField, SelectMultipleField, PasswordField, DateField, BooleanField
 from wtforms.validators import DataRequired, Email, Length, NumberRange, ValidationError, Optional, EqualTo
 from models import Faculty, Department, Subject
 import re
@@ -218,6 +219,14 @@ class TimetableForm(FlaskForm):
 
     submit = SubmitField("Add Slot")
 
+class TimetableImportForm(FlaskForm):
+    file = FileField(
+        "Timetable File",
+        validators=[FileRequired(), FileAllowed(["csv", "xlsx"], "Upload a .csv or .xlsx file")]
+    )
+    dry_run = BooleanField("Validate only (do not save)")
+    submit = SubmitField("Import Slots")
+
 class AdminAttendanceFilterForm(FlaskForm):
     department_id = SelectField(
         "Department", coerce=int, validators=[DataRequired()]
@@ -225,8 +234,16 @@ class AdminAttendanceFilterForm(FlaskForm):
     date = DateField(
         "Date", default=date.today, validators=[DataRequired()]
     )
+    # Optional: mark a whole range (e.g. back-fill a month) in one grid
+    end_date = DateField(
+        "To Date (optional)", validators=[Optional()]
+    )
     submit = SubmitField("Load Faculty")
 
+    def validate_end_date(self, field):
+        if field.data and self.date.data and field.data < self.date.data:
+            raise ValidationError("To Date must be on or after Date.")
+
 class FacultyLeaveForm(FlaskForm):
     start_date = DateField(
         "From Date", format="%Y-%m-%d", validators=[DataRequired()]
@@ -0,0 +1,42 @@
+"""Add weekly_hours workload counter to faculty
+
+Revision ID: 0fdb0928859f
+Revises: 840c84f087a6
+Create Date: 2026-10-17 10:12:41.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0fdb0928859f'
+down_revision = '840c84f087a6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('faculty', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('weekly_hours', sa.Float(), nullable=False, server_default='0'))
+
+    # Backfill from the existing timetable
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        duration = "(julianday(t.end_time) - julianday(t.start_time)) * 24"
+    elif dialect == 'postgresql':
+        duration = "EXTRACT(EPOCH FROM (t.end_time - t.start_time)) / 3600"
+    elif dialect in ('mysql', 'mariadb'):
+        duration = "TIME_TO_SEC(TIMEDIFF(t.end_time, t.start_time)) / 3600"
+    else:
+        duration = "1"
+
+    op.execute(
+        f"UPDATE faculty SET weekly_hours = COALESCE("
+        f"(SELECT SUM({duration}) FROM timetable t WHERE t.faculty_id = faculty.id), 0)"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('faculty', schema=None) as batch_op:
+        batch_op.drop_column('weekly_hours')
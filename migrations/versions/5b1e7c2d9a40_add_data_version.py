@@ -0,0 +1,29 @@
+"""Add data_version change counters
+
+Revision ID: 5b1e7c2d9a40
+Revises: 0fdb0928859f
+Create Date: 2026-10-17 13:02:18.540117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b1e7c2d9a40'
+down_revision = '0fdb0928859f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    data_version = op.create_table('data_version',
+    sa.Column('key', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.Integer(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.bulk_insert(data_version, [{'key': 'timetable', 'version': 1}])
+
+
+def downgrade():
+    op.drop_table('data_version')
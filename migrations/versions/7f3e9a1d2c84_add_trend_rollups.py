@@ -0,0 +1,99 @@
+"""Add attendance_rollup and leave_rollup trend tables
+
+Revision ID: 7f3e9a1d2c84
+Revises: e41a8b3c6d52
+Create Date: 2026-10-17 17:05:12.640331
+
+Existing attendance and approved leave are rolled up during the upgrade.
+
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7f3e9a1d2c84'
+down_revision = 'e41a8b3c6d52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('attendance_rollup',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('period', sa.String(length=5), nullable=False),
+    sa.Column('bucket_start', sa.Date(), nullable=False),
+    sa.Column('department_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=10), nullable=False),
+    sa.Column('count', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['department_id'], ['department.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('period', 'bucket_start', 'department_id', 'status', name='uq_attendance_rollup_bucket')
+    )
+    op.create_table('leave_rollup',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('period', sa.String(length=5), nullable=False),
+    sa.Column('bucket_start', sa.Date(), nullable=False),
+    sa.Column('department_id', sa.Integer(), nullable=False),
+    sa.Column('days', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['department_id'], ['department.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('period', 'bucket_start', 'department_id', name='uq_leave_rollup_bucket')
+    )
+    backfill()
+
+
+def _buckets(day):
+    # Same buckets as services.rollup_service: day, week (from Monday), month
+    return (('day', day), ('week', day - timedelta(days=day.weekday())), ('month', day.replace(day=1)))
+
+
+def backfill():
+    """Roll up existing history, as `flask rebuild-rollups` would."""
+    faculty = sa.table('faculty', sa.column('id', sa.Integer), sa.column('department_id', sa.Integer))
+    attendance = sa.table('faculty_attendance', sa.column('faculty_id', sa.Integer),
+                          sa.column('date', sa.Date), sa.column('status', sa.String))
+    leave = sa.table('faculty_leave', sa.column('faculty_id', sa.Integer), sa.column('start_date', sa.Date),
+                     sa.column('end_date', sa.Date), sa.column('status', sa.String))
+    bind = op.get_bind()
+
+    counts = defaultdict(int)
+    for department_id, day, status, count in bind.execute(
+        sa.select(faculty.c.department_id, attendance.c.date, attendance.c.status, sa.func.count())
+        .select_from(attendance.join(faculty, faculty.c.id == attendance.c.faculty_id))
+        .group_by(faculty.c.department_id, attendance.c.date, attendance.c.status)
+    ):
+        for period, start in _buckets(day):
+            counts[(period, start, department_id, status)] += count
+
+    days = defaultdict(int)
+    for department_id, start, end in bind.execute(
+        sa.select(faculty.c.department_id, leave.c.start_date, leave.c.end_date)
+        .select_from(leave.join(faculty, faculty.c.id == leave.c.faculty_id))
+        .where(leave.c.status == 'Approved')
+    ):
+        day = start
+        while day <= end:
+            if day.weekday() < 5:
+                for period, bucket_start in _buckets(day):
+                    days[(period, bucket_start, department_id)] += 1
+            day += timedelta(days=1)
+
+    if counts:
+        op.bulk_insert(sa.table('attendance_rollup', sa.column('period'), sa.column('bucket_start', sa.Date),
+                                sa.column('department_id'), sa.column('status'), sa.column('count')),
+                       [dict(zip(('period', 'bucket_start', 'department_id', 'status'), key), count=n)
+                        for key, n in counts.items()])
+    if days:
+        op.bulk_insert(sa.table('leave_rollup', sa.column('period'), sa.column('bucket_start', sa.Date),
+                                sa.column('department_id'), sa.column('days')),
+                       [dict(zip(('period', 'bucket_start', 'department_id'), key), days=n)
+                        for key, n in days.items()])
+
+
+def downgrade():
+    op.drop_table('leave_rollup')
+    op.drop_table('attendance_rollup')
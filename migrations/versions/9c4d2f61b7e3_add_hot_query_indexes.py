@@ -0,0 +1,69 @@
+"""Add indexes for hot timetable, leave, attendance and faculty filters
+
+Revision ID: 9c4d2f61b7e3
+Revises: 5b1e7c2d9a40
+Create Date: 2026-10-17 15:41:07.902315
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c4d2f61b7e3'
+down_revision = '5b1e7c2d9a40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('timetable', schema=None) as batch_op:
+        batch_op.create_index('ix_timetable_faculty_slot', ['faculty_id', 'day', 'start_time'], unique=False)
+        batch_op.create_index('ix_timetable_class_slot', ['academic_class_id', 'day', 'start_time'], unique=False)
+        batch_op.create_index('ix_timetable_classroom_slot', ['classroom_id', 'day', 'start_time'], unique=False)
+        batch_op.create_index('ix_timetable_subject', ['subject_id'], unique=False)
+
+    with op.batch_alter_table('faculty_leave', schema=None) as batch_op:
+        batch_op.create_index('ix_faculty_leave_faculty_range', ['faculty_id', 'status', 'start_date', 'end_date'], unique=False)
+        batch_op.create_index('ix_faculty_leave_status_applied', ['status', 'applied_at'], unique=False)
+        batch_op.create_index('ix_faculty_leave_applied_at', ['applied_at'], unique=False)
+
+    # Partial index (PostgreSQL / SQLite); other databases get a plain one
+    op.create_index(
+        'ix_faculty_leave_approved_range', 'faculty_leave', ['start_date', 'end_date'], unique=False,
+        postgresql_where=sa.text("status = 'Approved'"),
+        sqlite_where=sa.text("status = 'Approved'")
+    )
+
+    with op.batch_alter_table('faculty_attendance', schema=None) as batch_op:
+        batch_op.create_index('ix_faculty_attendance_faculty_status', ['faculty_id', 'status'], unique=False)
+
+    with op.batch_alter_table('faculty', schema=None) as batch_op:
+        batch_op.create_index('ix_faculty_department_active', ['department_id', 'is_active'], unique=False)
+
+    with op.batch_alter_table('academic_class', schema=None) as batch_op:
+        batch_op.create_index('ix_academic_class_department_active', ['department_id', 'is_active'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('academic_class', schema=None) as batch_op:
+        batch_op.drop_index('ix_academic_class_department_active')
+
+    with op.batch_alter_table('faculty', schema=None) as batch_op:
+        batch_op.drop_index('ix_faculty_department_active')
+
+    with op.batch_alter_table('faculty_attendance', schema=None) as batch_op:
+        batch_op.drop_index('ix_faculty_attendance_faculty_status')
+
+    op.drop_index('ix_faculty_leave_approved_range', table_name='faculty_leave')
+
+    with op.batch_alter_table('faculty_leave', schema=None) as batch_op:
+        batch_op.drop_index('ix_faculty_leave_applied_at')
+        batch_op.drop_index('ix_faculty_leave_status_applied')
+        batch_op.drop_index('ix_faculty_leave_faculty_range')
+
+    with op.batch_alter_table('timetable', schema=None) as batch_op:
+        batch_op.drop_index('ix_timetable_subject')
+        batch_op.drop_index('ix_timetable_classroom_slot')
+        batch_op.drop_index('ix_timetable_class_slot')
+        batch_op.drop_index('ix_timetable_faculty_slot')
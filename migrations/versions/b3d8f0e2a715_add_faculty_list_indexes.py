@@ -0,0 +1,28 @@
+"""Add indexes for the paginated faculty list
+
+Revision ID: b3d8f0e2a715
+Revises: 7f3e9a1d2c84
+Create Date: 2026-10-17 19:12:40.318207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3d8f0e2a715'
+down_revision = '7f3e9a1d2c84'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('faculty', schema=None) as batch_op:
+        batch_op.create_index('ix_faculty_active_name', ['is_active', 'name', 'id'], unique=False)
+        batch_op.create_index('ix_faculty_active_hours', ['is_active', 'weekly_hours', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('faculty', schema=None) as batch_op:
+        batch_op.drop_index('ix_faculty_active_hours')
+        batch_op.drop_index('ix_faculty_active_name')
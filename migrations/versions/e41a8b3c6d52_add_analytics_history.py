@@ -0,0 +1,41 @@
+"""Add analytics_history snapshot table
+
+Revision ID: e41a8b3c6d52
+Revises: 9c4d2f61b7e3
+Create Date: 2026-10-17 16:20:44.118902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e41a8b3c6d52'
+down_revision = '9c4d2f61b7e3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('analytics_history',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('taken_at', sa.DateTime(), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('active_faculty', sa.Integer(), nullable=False),
+    sa.Column('total_hours', sa.Float(), nullable=False),
+    sa.Column('average_hours', sa.Float(), nullable=False),
+    sa.Column('overloaded', sa.Integer(), nullable=False),
+    sa.Column('pending_leaves', sa.Integer(), nullable=False),
+    sa.Column('approved_leaves', sa.Integer(), nullable=False),
+    sa.Column('rejected_leaves', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('analytics_history', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_analytics_history_taken_at'), ['taken_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('analytics_history', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_analytics_history_taken_at'))
+
+    op.drop_table('analytics_history')
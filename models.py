@@ -1,6 +1,6 @@
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
-from sqlalchemy import Integer, String, Float, Text, ForeignKey, DateTime, func, UniqueConstraint, Date, Time
+from sqlalchemy import Integer, String, Float, Text, ForeignKey, DateTime, func, UniqueConstraint, Date, Time, Index, text
 from typing import List
 from datetime import datetime, time, date
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -80,11 +80,14 @@ class Faculty(db.Model):
     email: Mapped[str] = mapped_column(String(120), unique=True, nullable=False)
     password_hash: Mapped[str | None] = mapped_column(String(255))
     phone: Mapped[str] = mapped_column(String(10), nullable=False)
-    department_id: Mapped[int] = mapped_column(ForeignKey("department.id"),nullable=False)
+    # active_history: moving a faculty moves their counts in the trend rollups
+    department_id: Mapped[int] = mapped_column(ForeignKey("department.id"), nullable=False, active_history=True)
     designation: Mapped[str] = mapped_column(String(50), nullable=False)
     qualification: Mapped[str] = mapped_column(String(100), nullable=False)
     experience_years: Mapped[int] = mapped_column(Integer, default=0)
     is_active: Mapped[bool] = mapped_column(default=True)
+    # Denormalized sum of timetable slot durations, kept in sync by services.workload_service
+    weekly_hours: Mapped[float] = mapped_column(Float, default=0, server_default="0", nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime,server_default=func.now())
     # Relationships
     department: Mapped["Department"] = relationship(back_populates="faculties")
@@ -106,6 +109,13 @@ class Faculty(db.Model):
         cascade="all, delete-orphan"
     )
 
+    __table_args__ = (
+        Index("ix_faculty_department_active", "department_id", "is_active"),
+        # faculty list pages (services.faculty_directory)
+        Index("ix_faculty_active_name", "is_active", "name", "id"),
+        Index("ix_faculty_active_hours", "is_active", "weekly_hours", "id"),
+    )
+
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
 
@@ -146,14 +156,15 @@ class FacultyAttendance(db.Model):
 
     id: Mapped[int] = mapped_column(primary_key=True)
 
+    # active_history: the trend rollups need the old values on update
     faculty_id: Mapped[int] = mapped_column(
-        ForeignKey("faculty.id"), nullable=False
+        ForeignKey("faculty.id"), nullable=False, active_history=True
     )
 
-    date: Mapped[date] = mapped_column(Date, nullable=False)
+    date: Mapped[date] = mapped_column(Date, nullable=False, active_history=True)
 
     status: Mapped[str] = mapped_column(
-        String(10), nullable=False
+        String(10), nullable=False, active_history=True
     )  # Present / Absent / Leave
 
     marked_at: Mapped[datetime] = mapped_column(
@@ -169,6 +180,7 @@ class FacultyAttendance(db.Model):
             "faculty_id", "date",
             name="uq_faculty_attendance_day"
         ),
+        Index("ix_faculty_attendance_faculty_status", "faculty_id", "status"),
     )
 
 
@@ -182,17 +194,18 @@ class FacultyLeave(db.Model):
 
     id: Mapped[int] = mapped_column(primary_key=True)
 
+    # active_history: the trend rollups need the old values on update
     faculty_id: Mapped[int] = mapped_column(
-        ForeignKey("faculty.id"), nullable=False
+        ForeignKey("faculty.id"), nullable=False, active_history=True
     )
 
-    start_date: Mapped[date] = mapped_column(Date, nullable=False)
-    end_date: Mapped[date] = mapped_column(Date, nullable=False)
+    start_date: Mapped[date] = mapped_column(Date, nullable=False, active_history=True)
+    end_date: Mapped[date] = mapped_column(Date, nullable=False, active_history=True)
 
     reason: Mapped[str] = mapped_column(String(255), nullable=False)
 
     status: Mapped[str] = mapped_column(
-        String(20), default="Pending", nullable=False
+        String(20), default="Pending", nullable=False, active_history=True
     )
     # Pending | Approved | Rejected
 
@@ -202,14 +215,27 @@ class FacultyLeave(db.Model):
 
     faculty = relationship("Faculty", back_populates="leaves")
 
+    __table_args__ = (
+        Index("ix_faculty_leave_faculty_range", "faculty_id", "status", "start_date", "end_date"),
+        # "Who is on leave on D" only ever looks at approved rows
+        Index(
+            "ix_faculty_leave_approved_range", "start_date", "end_date",
+            postgresql_where=text("status = 'Approved'"),
+            sqlite_where=text("status = 'Approved'")
+        ),
+        Index("ix_faculty_leave_status_applied", "status", "applied_at"),
+        Index("ix_faculty_leave_applied_at", "applied_at"),
+    )
+
 
 class Timetable(db.Model):
     __tablename__ = "timetable"
 
     id: Mapped[int] = mapped_column(primary_key=True)
 
+    # active_history: the workload counter needs the old values on update
     faculty_id: Mapped[int] = mapped_column(
-        ForeignKey("faculty.id"), nullable=False
+        ForeignKey("faculty.id"), nullable=False, active_history=True
     )
 
     subject_id: Mapped[int] = mapped_column(
@@ -223,8 +249,8 @@ class Timetable(db.Model):
 
 
     day: Mapped[str] = mapped_column(String(10), nullable=False)
-    start_time: Mapped[time] = mapped_column(Time, nullable=False)
-    end_time: Mapped[time] = mapped_column(Time, nullable=False)
+    start_time: Mapped[time] = mapped_column(Time, nullable=False, active_history=True)
+    end_time: Mapped[time] = mapped_column(Time, nullable=False, active_history=True)
 
     faculty: Mapped["Faculty"] = relationship(
         back_populates="timetables"
@@ -259,6 +285,12 @@ class Timetable(db.Model):
             "classroom_id",
             name="uq_classroom_slot"
         ),
+        # The unique constraints above lead with (day, start_time) and already
+        # serve day filters / start_time ordering; these cover per-entity grids.
+        Index("ix_timetable_faculty_slot", "faculty_id", "day", "start_time"),
+        Index("ix_timetable_class_slot", "academic_class_id", "day", "start_time"),
+        Index("ix_timetable_classroom_slot", "classroom_id", "day", "start_time"),
+        Index("ix_timetable_subject", "subject_id"),
     )
 
 
@@ -278,6 +310,10 @@ class AcademicClass(db.Model):
 
     department: Mapped["Department"] = relationship(back_populates="academic_classes")
 
+    __table_args__ = (
+        Index("ix_academic_class_department_active", "department_id", "is_active"),
+    )
+
     timetables: Mapped[list["Timetable"]] = relationship(
         back_populates="academic_class",
         cascade="all, delete-orphan"
@@ -316,3 +352,72 @@ class AcademicCalendar(db.Model):
     def __repr__(self):
         return f'<Calendar {self.date}: {self.description}>'
 
+
+
+class DataVersion(db.Model):
+    """Change counters for cache validation, bumped by services.data_version"""
+    __tablename__ = "data_version"
+
+    key: Mapped[str] = mapped_column(String(50), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+
+    def __repr__(self):
+        return f'<DataVersion {self.key}: {self.version}>'
+
+
+class AnalyticsHistory(db.Model):
+    """Stored analytics dashboard snapshots, one per day (see services.analytics_service)"""
+    __tablename__ = "analytics_history"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    taken_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+    payload: Mapped[str] = mapped_column(Text, nullable=False)  # JSON of the full snapshot
+
+    # Trend columns, so the charts don't have to decode every payload
+    active_faculty: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    total_hours: Mapped[float] = mapped_column(Float, default=0, nullable=False)
+    average_hours: Mapped[float] = mapped_column(Float, default=0, nullable=False)
+    overloaded: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    pending_leaves: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    approved_leaves: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    rejected_leaves: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f'<AnalyticsHistory {self.taken_at}>'
+
+
+class AttendanceRollup(db.Model):
+    """Attendance status counts per department and day/week/month (see services.rollup_service)"""
+    __tablename__ = "attendance_rollup"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    period: Mapped[str] = mapped_column(String(5), nullable=False)  # day / week / month
+    bucket_start: Mapped[date] = mapped_column(Date, nullable=False)  # the day, its Monday, or the 1st
+    department_id: Mapped[int] = mapped_column(ForeignKey("department.id"), nullable=False)
+    status: Mapped[str] = mapped_column(String(10), nullable=False)
+    count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("period", "bucket_start", "department_id", "status", name="uq_attendance_rollup_bucket"),
+    )
+
+    def __repr__(self):
+        return f'<AttendanceRollup {self.period} {self.bucket_start} {self.status}: {self.count}>'
+
+
+class LeaveRollup(db.Model):
+    """Approved leave days (weekdays) per department and day/week/month (see services.rollup_service)"""
+    __tablename__ = "leave_rollup"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    period: Mapped[str] = mapped_column(String(5), nullable=False)
+    bucket_start: Mapped[date] = mapped_column(Date, nullable=False)
+    department_id: Mapped[int] = mapped_column(ForeignKey("department.id"), nullable=False)
+    days: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("period", "bucket_start", "department_id", name="uq_leave_rollup_bucket"),
+    )
+
+    def __repr__(self):
+        return f'<LeaveRollup {self.period} {self.bucket_start}: {self.days}>'
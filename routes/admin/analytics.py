@@ -1,55 +1,63 @@
-from flask import render_template
+from flask import render_template, redirect, url_for, flash, request
+from datetime import datetime, date, timedelta
 from . import admin_bp
-from models import Faculty, Department, Subject, AcademicClass, Classroom, Timetable, FacultyLeave
 from auth import admin_required
+from services.analytics_service import AnalyticsStore
+from services.rollup_service import RollupService, PERIODS, bucket
+
+# How far back the attendance / leave trend charts go, per bucket size
+TREND_SPAN = {"day": timedelta(days=90), "week": timedelta(weeks=52), "month": timedelta(days=3 * 365)}
 
 @admin_bp.route("/admin/analytics")
 @admin_required
 def analytics():
-    """Admin Analytics Dashboard"""
-    # 1. Key Metrics
-    total_faculty = Faculty.query.filter_by(is_active=True).count()
-    total_departments = Department.query.filter_by(is_active=True).count()
-    total_subjects = Subject.query.filter_by(is_active=True).count()
-    total_classes = AcademicClass.query.filter_by(is_active=True).count()
-    total_classrooms = Classroom.query.filter_by(is_active=True).count()
-
-    # 2. Faculty Distribution by Department
-    departments = Department.query.filter_by(is_active=True).all()
-    dept_labels = [d.name for d in departments]
-    dept_data = [len(d.faculties) for d in departments]
-
-    # 3. Faculty Workload (Top 5 Overloaded)
-    faculties = Faculty.query.filter_by(is_active=True).all()
-    workload_data = []
-    for f in faculties:
-        hours = len(f.timetables)
-        workload_data.append({'name': f.name, 'hours': hours})
-    
-    # Sort by hours desc and take top 5
-    workload_data.sort(key=lambda x: x['hours'], reverse=True)
-    top_workload = workload_data[:5]
-    
-    workload_labels = [w['name'] for w in top_workload]
-    workload_values = [w['hours'] for w in top_workload]
+    """Admin Analytics Dashboard (reads the latest stored snapshot)"""
+    snapshot = AnalyticsStore.latest()
+    history = AnalyticsStore.history()
 
-    # 4. Leave Statistics (Approved vs Rejected vs Pending)
-    pending_leaves = FacultyLeave.query.filter_by(status='Pending').count()
-    approved_leaves = FacultyLeave.query.filter_by(status='Approved').count()
-    rejected_leaves = FacultyLeave.query.filter_by(status='Rejected').count()
+    period = request.args.get("period", "month")
+    if period not in PERIODS:
+        period = "month"
+    since = bucket(period, date.today() - TREND_SPAN[period])
+    attendance_trend = RollupService.attendance_trend(period, start=since)
+    leave_trend = RollupService.leave_trend(period, start=since)
+    buckets = sorted(set(attendance_trend) | set(leave_trend))
 
     return render_template(
         "admin/analytics.html",
-        total_faculty=total_faculty,
-        total_departments=total_departments,
-        total_subjects=total_subjects,
-        total_classes=total_classes,
-        total_classrooms=total_classrooms,
-        dept_labels=dept_labels,
-        dept_data=dept_data,
-        workload_labels=workload_labels,
-        workload_values=workload_values,
-        pending_leaves=pending_leaves,
-        approved_leaves=approved_leaves,
-        rejected_leaves=rejected_leaves
+        snapshot_time=snapshot.computed_at,
+        snapshot_age_minutes=int((datetime.utcnow() - snapshot.computed_at).total_seconds() // 60),
+        total_faculty=snapshot.counts["faculty"],
+        total_departments=snapshot.counts["departments"],
+        total_subjects=snapshot.counts["subjects"],
+        total_classes=snapshot.counts["classes"],
+        total_classrooms=snapshot.counts["classrooms"],
+        dept_labels=[name for name, _ in snapshot.departments],
+        dept_data=[count for _, count in snapshot.departments],
+        workload_labels=[name for name, _ in snapshot.top_workload],
+        workload_values=[hours for _, hours in snapshot.top_workload],
+        pending_leaves=snapshot.leave_status["Pending"],
+        approved_leaves=snapshot.leave_status["Approved"],
+        rejected_leaves=snapshot.leave_status["Rejected"],
+        trend_labels=[h.taken_at.strftime("%Y-%m-%d") for h in history],
+        trend_average_hours=[h.average_hours for h in history],
+        trend_overloaded=[h.overloaded for h in history],
+        trend_pending=[h.pending_leaves for h in history],
+        trend_approved=[h.approved_leaves for h in history],
+        period=period,
+        periods=PERIODS,
+        rollup_labels=[b.isoformat() for b in buckets],
+        rollup_attendance={
+            status: [attendance_trend.get(b, {}).get(status, 0) for b in buckets]
+            for status in ("Present", "Absent", "Leave")
+        },
+        rollup_leave_days=[leave_trend.get(b, 0) for b in buckets]
     )
+
+
+@admin_bp.route("/admin/analytics/refresh", methods=["POST"])
+@admin_required
+def refresh_analytics():
+    AnalyticsStore.refresh()
+    flash("Analytics refreshed", "success")
+    return redirect(url_for("admin.analytics"))
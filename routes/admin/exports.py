@@ -1,100 +1,153 @@
-from flask import render_template, make_response
+from flask import (render_template, Response, stream_with_context, request, flash, redirect, url_for,
+                   current_app, jsonify, send_file, abort)
 from . import admin_bp
-from models import Faculty, Timetable, FacultyAttendance
-from utils.pdf_generator import render_pdf
-from services.scheduler_service import ConflictEngine
+from models import db, Faculty, Department
+from utils.pdf_generator import render_pdf, submit_pdf_job, PdfRenderer
+from services.report_export import (ReportExport, stream_csv, stream_xlsx, stream_zip, write_institution_workbook,
+                                    XLSX_MIMETYPE)
+from services.pdf_reports import PdfReports, TEMPLATES
+from werkzeug.utils import secure_filename
+from services.jobs import JobManager
 from auth import admin_required
-from datetime import datetime, date, timedelta
-import pandas as pd
-from io import BytesIO
+from datetime import datetime, date
+from itertools import chain
+
+def pdf_response(kind, faculty, filename):
+    """The faculty's report PDF, or with ?background=1 a job page that links to it when it's ready"""
+    template_name = TEMPLATES[kind]
+    version = PdfReports.version(kind, faculty.id)
+
+    # Only queried and rendered when the PDF for this data version isn't cached
+    def context():
+        return PdfReports.contexts(kind, [faculty])[0][1]
+
+    if request.args.get('background'):
+        job_id = submit_pdf_job(template_name, context, filename=filename, version=version)
+        return redirect(url_for('admin.export_job', job_id=job_id))
+    return render_pdf(template_name, context, filename=filename, version=version)
 
 @admin_bp.route('/export/pdf/timetable/<int:faculty_id>')
 @admin_required
 def export_timetable_pdf(faculty_id):
     faculty = Faculty.query.get_or_404(faculty_id)
-    timetable = Timetable.query.filter_by(faculty_id=faculty_id).order_by(Timetable.day, Timetable.start_time).all()
-    
-    generated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    
-    return render_pdf('reports/pdf_timetable.html', {
-        'faculty': faculty,
-        'timetable': timetable,
-        'generated_at': generated_at
-    }, filename=f'timetable_{faculty.name}.pdf')
+    return pdf_response('timetable', faculty, f'timetable_{faculty.name}.pdf')
 
 @admin_bp.route('/export/pdf/attendance/<int:faculty_id>')
 @admin_required
 def export_attendance_pdf(faculty_id):
     faculty = Faculty.query.get_or_404(faculty_id)
-    
-    # Get last 30 days
-    today = date.today()
-    thirty_days_ago = today - timedelta(days=30)
-    
-    attendance_records = FacultyAttendance.query.filter(
-        FacultyAttendance.faculty_id == faculty_id,
-        FacultyAttendance.date >= thirty_days_ago
-    ).order_by(FacultyAttendance.date.desc()).all()
-    
-    stats = {
-        'present': FacultyAttendance.query.filter_by(faculty_id=faculty_id, status='Present').count(),
-        'absent': FacultyAttendance.query.filter_by(faculty_id=faculty_id, status='Absent').count(),
-        'leave': FacultyAttendance.query.filter_by(faculty_id=faculty_id, status='Leave').count()
-    }
-    
-    generated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-    return render_pdf('reports/pdf_attendance.html', {
-        'faculty': faculty,
-        'attendance_records': attendance_records,
-        'stats': stats,
-        'generated_at': generated_at
-    }, filename=f'attendance_{faculty.name}.pdf')
+    return pdf_response('attendance', faculty, f'attendance_{faculty.name}.pdf')
 
 @admin_bp.route('/export/pdf/profile/<int:faculty_id>')
 @admin_required
 def export_profile_pdf(faculty_id):
     faculty = Faculty.query.get_or_404(faculty_id)
-    workload = ConflictEngine.get_faculty_workload(faculty_id)
-    generated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    
-    return render_pdf('reports/pdf_profile.html', {
-        'faculty': faculty,
-        'workload': workload,
-        'generated_at': generated_at
-    }, filename=f'profile_{faculty.name}.pdf')
+    return pdf_response('profile', faculty, f'profile_{faculty.name}.pdf')
+
+@admin_bp.route('/export/pdf/department/<int:department_id>')
+@admin_required
+def export_department_pdfs(department_id):
+    """Reports for every active faculty of a department, streamed as a ZIP (?kind=timetable|attendance|profile|all)"""
+    department = db.get_or_404(Department, department_id)
+    kind = request.args.get('kind', 'timetable')
+    kinds = list(TEMPLATES) if kind == 'all' else [kind]
+    if any(k not in TEMPLATES for k in kinds):
+        abort(404)
+
+    # Cached reports as they are; the data for the rest up front in a few bulk
+    # queries, and those PDFs convert in parallel
+    faculties = PdfReports.department_faculty(department_id)
+    cached, documents = [], []
+    for k in kinds:
+        ready, missing = PdfReports.documents(k, faculties)
+        cached += ready
+        documents += missing
+
+    filename = f"{secure_filename(department.name) or 'department'}_{kind}_reports.zip"
+    return Response(
+        stream_with_context(stream_zip(chain(cached, PdfRenderer.render_many(documents)))),
+        mimetype='application/zip',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
 
 @admin_bp.route('/export/excel/report')
 @admin_bp.route('/export/excel/full_report')
 @admin_required
 def export_excel_report():
-    # Only export active faculty
-    faculties = Faculty.query.filter_by(is_active=True).all()
-    
-    data = []
-    for f in faculties:
-        workload = ConflictEngine.get_faculty_workload(f.id)
-        data.append({
-            'ID': f.id,
-            'Name': f.name,
-            'Email': f.email,
-            'Department': f.department.name if f.department else 'N/A',
-            'Designation': f.designation,
-            'Experience': f.experience_years,
-            'Workload (Hrs)': workload,
-            'Status': 'Overloaded' if workload > 18 else ('Underutilized' if workload < 10 else 'Normal')
-        })
-        
-    df = pd.DataFrame(data)
-    
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='Faculty Report')
-        
-    output.seek(0)
-    
-    response = make_response(output.getvalue())
-    response.headers['Content-Type'] = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    response.headers['Content-Disposition'] = 'attachment; filename=faculty_report.xlsx'
-    
-    return response
+    """Faculty report, streamed (?format=csv for plain CSV)"""
+    sheet = ReportExport.faculty_sheet()
+
+    if request.args.get('format') == 'csv':
+        return Response(
+            stream_with_context(stream_csv(sheet)),
+            mimetype='text/csv',
+            headers={'Content-Disposition': 'attachment; filename=faculty_report.csv'}
+        )
+
+    try:
+        body = stream_xlsx([sheet])
+    except ImportError:
+        flash("Excel export requires openpyxl (pip install openpyxl). Use the CSV export instead.", "danger")
+        return redirect(url_for('admin.faculty_list'))
+
+    return Response(
+        stream_with_context(body),
+        mimetype=XLSX_MIMETYPE,
+        headers={'Content-Disposition': 'attachment; filename=faculty_report.xlsx'}
+    )
+
+@admin_bp.route('/export/excel/institution', methods=['POST'])
+@admin_required
+def export_institution_workbook():
+    """Start the multi-sheet institutional workbook as a background job"""
+    today = date.today()
+    try:
+        start = datetime.strptime(request.form.get('start_date') or today.replace(day=1).isoformat(), '%Y-%m-%d').date()
+        end = datetime.strptime(request.form.get('end_date') or today.isoformat(), '%Y-%m-%d').date()
+    except ValueError:
+        flash("Invalid date format", "danger")
+        return redirect(url_for('admin.analytics'))
+
+    max_days = current_app.config.get('EXPORT_ATTENDANCE_MAX_DAYS', 366)
+    if end < start or (end - start).days >= max_days:
+        flash(f"Pick an attendance range of at most {max_days} days, ending after it starts.", "warning")
+        return redirect(url_for('admin.analytics'))
+
+    try:
+        import openpyxl  # noqa: F401
+    except ImportError:
+        flash("Excel export requires openpyxl (pip install openpyxl).", "danger")
+        return redirect(url_for('admin.analytics'))
+
+    job_id = JobManager.submit(
+        'institution-workbook', f'institution_report_{start}_{end}.xlsx',
+        write_institution_workbook, start, end
+    )
+    return redirect(url_for('admin.export_job', job_id=job_id))
+
+@admin_bp.route('/export/jobs/<job_id>')
+@admin_required
+def export_job(job_id):
+    job = JobManager.get(job_id)
+    if job is None:
+        abort(404)
+    return render_template('admin/export_job.html', job=job)
+
+@admin_bp.route('/export/jobs/<job_id>/status')
+@admin_required
+def export_job_status(job_id):
+    job = JobManager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    data = job._asdict()
+    if job.status == 'done':
+        data['download_url'] = url_for('admin.export_job_download', job_id=job.id)
+    return jsonify(data)
+
+@admin_bp.route('/export/jobs/<job_id>/download')
+@admin_required
+def export_job_download(job_id):
+    job = JobManager.get(job_id)
+    if job is None or job.status != 'done':
+        abort(404)
+    return send_file(JobManager.output_path(job), as_attachment=True, download_name=job.filename)
@@ -3,46 +3,37 @@ from . import admin_bp
 from models import db, Faculty, Department, Subject, FacultySubject, Timetable
 from forms import FacultyForm, populate_form_choices
 from auth import admin_required
+from services.attendance_stats import AttendanceStatsService
+from services.faculty_directory import FacultyDirectory, SORTS, STATUSES
 from sqlalchemy.exc import IntegrityError
 
+def _faculty_page(active):
+    """One page of the faculty list (?q= search, ?status=, ?sort=, ?after= / ?before= cursors)"""
+    filters = {
+        'q': request.args.get('q', '').strip(),
+        'status': request.args.get('status', '') if active else '',
+        'sort': request.args.get('sort', 'name') if request.args.get('sort') in SORTS else 'name',
+    }
+    page = FacultyDirectory.page(
+        active=active,
+        search=filters['q'] or None,
+        status=filters['status'] or None,
+        sort=filters['sort'],
+        after=request.args.get('after'),
+        before=request.args.get('before')
+    )
+    return render_template('admin/faculty_list.html', faculty_data=page.rows, page=page,
+                           filters=filters, sorts=SORTS, statuses=STATUSES, is_archived=not active)
+
 @admin_bp.route('/faculty/list')
 @admin_required
 def faculty_list():
-    faculties = Faculty.query.filter_by(is_active=True).all()
-    faculty_data = []
-    for faculty in faculties:
-        workload_hours = len(faculty.timetables)
-        
-        status = "Normal"
-        if workload_hours > 18:
-            status = "Overloaded"
-        elif workload_hours < 10:
-            status = "Underutilized"
-
-        subject_count = len(faculty.subjects)
-        faculty_data.append({
-            'faculty': faculty,
-            'subject_count': subject_count,
-            'workload': workload_hours,
-            'status': status
-        })
-    return render_template('admin/faculty_list.html', faculty_data=faculty_data)
+    return _faculty_page(active=True)
 
 @admin_bp.route('/faculty/archived')
 @admin_required
 def faculty_archived():
-    faculties = Faculty.query.filter_by(is_active=False).all()
-    faculty_data = []
-    for faculty in faculties:
-        workload_hours = len(faculty.timetables)
-        subject_count = len(faculty.subjects)
-        faculty_data.append({
-            'faculty': faculty,
-            'subject_count': subject_count,
-            'workload': workload_hours,
-            'status': "Archived"
-        })
-    return render_template('admin/faculty_list.html', faculty_data=faculty_data, is_archived=True)
+    return _faculty_page(active=False)
 
 @admin_bp.route('/faculty/restore/<int:id>', methods=['POST'])
 @admin_required
@@ -180,16 +171,14 @@ def faculty_view(id):
     """View detailed faculty information"""
     faculty = Faculty.query.get_or_404(id)
 
-    total_days = len(faculty.attendance_records)
-    present_days = len([a for a in faculty.attendance_records if a.status == 'Present'])
-    attendance_percentage = (present_days / total_days * 100) if total_days > 0 else 0
+    attendance = AttendanceStatsService.for_faculty(id)
 
     pending_leaves = [l for l in faculty.leaves if l.status == 'Pending']
     approved_leaves = [l for l in faculty.leaves if l.status == 'Approved']
 
     return render_template('admin/faculty_view.html',
                            faculty=faculty,
-                           attendance_percentage=attendance_percentage,
+                           attendance_percentage=attendance.percentage,
                            pending_leaves=pending_leaves,
                            approved_leaves=approved_leaves)
 
@@ -1,8 +1,11 @@
-from flask import render_template, redirect, url_for, flash, request
+from flask import render_template, redirect, url_for, flash, request, current_app
 from . import admin_bp
 from models import db, Faculty, Department, FacultyAttendance, FacultyLeave, AcademicCalendar
 from forms import AdminAttendanceFilterForm, AcademicCalendarForm
 from auth import admin_required
+from services.attendance_service import AttendanceService
+from services.leave_index import LeaveIndex
+from services.leave_queue import LeaveQueue, STATUSES as LEAVE_STATUSES
 from datetime import date, datetime
 import calendar
 from sqlalchemy.exc import IntegrityError
@@ -17,19 +20,56 @@ def admin_hr():
     
     faculty_list = []
     existing_attendance = {}
+    range_days = []
+    range_matrix = {}
 
     if active_tab == 'attendance' and attendance_form.validate_on_submit():
         dept_id = attendance_form.department_id.data
         selected_date = attendance_form.date.data
-        
+        end_date = attendance_form.end_date.data
+
         faculty_list = Faculty.query.filter_by(department_id=dept_id).all()
-        records = FacultyAttendance.query.filter(
-            FacultyAttendance.date == selected_date,
-            FacultyAttendance.faculty_id.in_([f.id for f in faculty_list])
-        ).all()
-        existing_attendance = {r.faculty_id: r for r in records}
 
-    leaves = FacultyLeave.query.order_by(FacultyLeave.applied_at.desc()).all()
+        if end_date and end_date > selected_date:
+            # Range mode: one grid of faculty x working days
+            max_days = current_app.config.get("ATTENDANCE_RANGE_MAX_DAYS", 62)
+            if (end_date - selected_date).days >= max_days:
+                flash(f"Please pick a range of at most {max_days} days.", "warning")
+                faculty_list = []
+            else:
+                faculty_ids = [f.id for f in faculty_list]
+                range_days = AttendanceService.working_days(selected_date, end_date)
+                if not range_days:
+                    flash("No working days in that range.", "info")
+                    faculty_list = []
+                leave = LeaveIndex.get().covered_days(faculty_ids, range_days)
+                range_matrix = AttendanceService.existing(faculty_ids, selected_date, end_date)
+                # Pre-fill unmarked cells: Leave where an approved leave covers the day
+                for fid in faculty_ids:
+                    for day in range_days:
+                        range_matrix.setdefault((fid, day), "Leave" if (fid, day) in leave else "Present")
+        else:
+            records = FacultyAttendance.query.filter(
+                FacultyAttendance.date == selected_date,
+                FacultyAttendance.faculty_id.in_([f.id for f in faculty_list])
+            ).all()
+            existing_attendance = {r.faculty_id: r for r in records}
+    elif active_tab == 'attendance' and attendance_form.end_date.errors:
+        # e.g. To Date before Date: say so rather than showing an empty sheet
+        for error in attendance_form.end_date.errors:
+            flash(error, "warning")
+
+    # Leave queue: only built when its tab is shown
+    leave_page = None
+    leave_filters = {}
+    if active_tab == 'leaves':
+        leave_filters = {
+            'status': request.args.get('status', ''),
+            'department_id': request.args.get('department_id', type=int),
+            'start': _parse_date(request.args.get('start')),
+            'end': _parse_date(request.args.get('end')),
+        }
+        leave_page = LeaveQueue.page(**leave_filters, after=request.args.get('after'))
 
     return render_template(
         "admin/admin_hr.html",
@@ -37,9 +77,20 @@ def admin_hr():
         attendance_form=attendance_form,
         faculty_list=faculty_list,
         existing_attendance=existing_attendance,
-        leaves=leaves
+        range_days=range_days,
+        range_matrix=range_matrix,
+        leave_page=leave_page,
+        leave_filters=leave_filters,
+        leave_statuses=LEAVE_STATUSES,
+        departments=attendance_form.department_id.choices
     )
 
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (ValueError, TypeError):
+        return None
+
 @admin_bp.route("/admin/attendance/save", methods=["POST"])
 @admin_required
 def save_attendance():
@@ -52,49 +103,54 @@ def save_attendance():
             flash("Invalid date format", "danger")
             return redirect(url_for("admin.admin_hr", tab="attendance"))
 
-        # 1. Check if Weekend (Saturday=5, Sunday=6)
-        if selected_date.weekday() in [5, 6]:
-            flash("Cannot mark attendance on Weekends (Saturday/Sunday).", "warning")
-            return redirect(url_for("admin.admin_hr", tab="attendance"))
-        
-        # 2. Check Academic Calendar (Holiday)
-        calendar_event = AcademicCalendar.query.filter_by(date=selected_date).first()
-        if calendar_event and calendar_event.is_holiday:
-            flash(f"Cannot mark attendance: {calendar_event.description} (Holiday)", "warning")
+        # Weekend / holiday
+        if reason := AttendanceService.closed_reason(selected_date):
+            flash(reason, "warning")
             return redirect(url_for("admin.admin_hr", tab="attendance"))
 
+        statuses = {
+            int(key.split("_")[1]): value
+            for key, value in request.form.items()
+            if key.startswith("status_")
+        }
+        result = AttendanceService.save(selected_date, statuses)
+
+        for faculty_id, _ in result.on_leave:
+            flash(f"Warning: Faculty {faculty_id} is on approved leave. Marked as 'Leave'.", "warning")
+        flash("Attendance saved successfully", "success")
+
+    except Exception as e:
+        db.session.rollback()
+        flash(f"Error saving attendance: {str(e)}", "danger")
+
+    return redirect(url_for("admin.admin_hr", tab="attendance"))
+
+@admin_bp.route("/admin/attendance/save-range", methods=["POST"])
+@admin_required
+def save_attendance_range():
+    """Save a faculty x date grid (fields status_<faculty_id>_<YYYY-MM-DD>) in one go."""
+    try:
+        entries = {}
         for key, value in request.form.items():
             if not key.startswith("status_"):
                 continue
+            try:
+                _, faculty_id, day = key.split("_", 2)
+                entries[(int(faculty_id), datetime.strptime(day, '%Y-%m-%d').date())] = value
+            except ValueError:
+                continue
 
-            faculty_id = int(key.split("_")[1])
-
-            # Check if faculty is on approved leave
-            existing_leave = FacultyLeave.query.filter(
-                FacultyLeave.faculty_id == faculty_id,
-                FacultyLeave.status == "Approved",
-                FacultyLeave.start_date <= selected_date,
-                FacultyLeave.end_date >= selected_date
-            ).first()
-
-            if existing_leave:
-                if value == "Present":
-                     flash(f"Warning: Faculty {faculty_id} is on approved leave. Marked as 'Leave'.", "warning")
-                     value = "Leave"
-
-            if record := FacultyAttendance.query.filter_by(
-                    faculty_id=faculty_id, date=selected_date
-            ).first():
-                record.status = value
-            else:
-                db.session.add(FacultyAttendance(
-                    faculty_id=faculty_id,
-                    date=selected_date,
-                    status=value
-                ))
+        if not entries:
+            flash("Nothing to save", "warning")
+            return redirect(url_for("admin.admin_hr", tab="attendance"))
 
-        db.session.commit()
-        flash("Attendance saved successfully", "success")
+        result = AttendanceService.save_matrix(entries)
+
+        if result.on_leave:
+            flash(f"{len(result.on_leave)} 'Present' mark(s) fell on approved leave and were saved as 'Leave'.", "warning")
+        if result.skipped:
+            flash(f"Skipped {len(result.skipped)} weekend/holiday date(s).", "info")
+        flash(f"Saved {result.saved} attendance records.", "success")
 
     except Exception as e:
         db.session.rollback()
@@ -135,6 +191,30 @@ def reject_leave(leave_id):
         flash(f"Error rejecting leave: {str(e)}", "danger")
     return redirect(url_for('admin.admin_hr', tab='leaves'))
 
+@admin_bp.route("/admin/leave/bulk", methods=["POST"])
+@admin_required
+def bulk_leave_decision():
+    """Approve or reject the ticked pending leaves in one statement"""
+    decision = {'approve': 'Approved', 'reject': 'Rejected'}.get(request.form.get('action'))
+    leave_ids = request.form.getlist('leave_ids', type=int)
+    back = url_for('admin.admin_hr', tab='leaves', **{
+        k: v for k, v in request.form.items() if k in ('status', 'department_id', 'start', 'end') and v
+    })
+
+    if not decision or not leave_ids:
+        flash("Select leave requests and an action", "warning")
+        return redirect(back)
+
+    try:
+        result = LeaveQueue.decide(leave_ids, decision)
+        flash(f"{len(result.updated)} leave request(s) {decision.lower()}.", "success")
+        if result.skipped:
+            flash(f"{len(result.skipped)} request(s) were already processed.", "warning")
+    except Exception as e:
+        db.session.rollback()
+        flash(f"Error updating leaves: {str(e)}", "danger")
+    return redirect(back)
+
 
 @admin_bp.route("/admin/calendar", methods=["GET", "POST"])
 @admin_required
@@ -1,8 +1,12 @@
 from flask import render_template, redirect, url_for, flash, request, jsonify
 from . import admin_bp
-from models import db, Faculty, Department, Subject, AcademicClass, Classroom, Timetable, AcademicCalendar, FacultyLeave
-from forms import DailyScheduleForm, TimetableForm, ClassroomFilterForm
-from services.scheduler_service import ConflictEngine
+from models import db, Faculty, Department, Subject, AcademicClass, Classroom, Timetable, AcademicCalendar
+from forms import DailyScheduleForm, TimetableForm, ClassroomFilterForm, TimetableImportForm
+from services.scheduler_service import ConflictEngine, OccupancyIndex
+from services.timetable_queries import TimetableQuery
+from services.leave_index import LeaveIndex
+from services.grid_builder import GridBuilder, WeekGrid, TIME_LABELS
+from services.timetable_import import TimetableImporter, TimetableImportError, read_rows, summarize, COLUMNS
 from auth import admin_required
 from datetime import datetime, date, timedelta, time
 from sqlalchemy.exc import IntegrityError
@@ -24,23 +28,14 @@ def admin_schedule():
     manage_form.academic_class_id.choices = [(c.id, c.name) for c in AcademicClass.query.order_by(AcademicClass.name).all()]
     manage_form.classroom_id.choices = [(c.id, c.room_code) for c in Classroom.query.order_by(Classroom.room_code).all()]
     
-    classroom_form.classroom_id.choices = [(c.id, c.room_code) for c in Classroom.query.order_by(Classroom.room_code).all()]
-
-    DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
-    TIMES = ["09:00", "10:00", "11:00", "12:00", "14:00", "15:00"]
-    
-    # 1. MANAGE TAB (Weekly Grid)
-    manage_grid = {d: {t: None for t in TIMES} for d in DAYS}
-    all_slots = Timetable.query.all()
-    for slot in all_slots:
-        t = slot.start_time.strftime("%H:%M")
-        if t in TIMES:
-            manage_grid[slot.day][t] = slot
+    classroom_form.classroom_id.choices = manage_form.classroom_id.choices
 
+    # 1. MANAGE TAB (Add Slot)
     if active_tab == 'manage' and manage_form.validate_on_submit():
         try:
             start_dt = datetime.strptime(manage_form.start_time.data, "%H:%M").time()
             end_dt = (datetime.combine(date.today(), start_dt) + timedelta(hours=1)).time()
+            index = OccupancyIndex.for_request()
             
             # Check Conflicts via Engine
             conflicts = ConflictEngine.check_conflicts(
@@ -50,21 +45,25 @@ def admin_schedule():
                 faculty_id=manage_form.faculty_id.data,
                 academic_class_id=manage_form.academic_class_id.data,
                 classroom_id=manage_form.classroom_id.data,
-                subject_id=manage_form.subject_id.data
+                subject_id=manage_form.subject_id.data,
+                index=index
             )
 
             if conflicts:
                 for conflict in conflicts:
                     flash(f"Conflict: {conflict}", "danger")
                 
-                # Auto-suggest next slot
-                suggested_day, suggested_time = ConflictEngine.find_next_available_slot(
+                # Auto-suggest free slots
+                suggestions = ConflictEngine.suggest_slots(
                     faculty_id=manage_form.faculty_id.data,
                     academic_class_id=manage_form.academic_class_id.data,
-                    classroom_id=manage_form.classroom_id.data
+                    classroom_id=manage_form.classroom_id.data,
+                    limit=3,
+                    index=index
                 )
-                if suggested_day:
-                     flash(f"Suggestion: Next available slot for this Faculty/Class/Room combination is {suggested_day} at {suggested_time}", "info")
+                if suggestions:
+                     options = ", ".join(f"{d} at {t}" for d, t in suggestions)
+                     flash(f"Suggestion: Available slots for this Faculty/Class/Room combination: {options}", "info")
                 else:
                      flash("No available slots found for this combination!", "warning")
 
@@ -86,24 +85,38 @@ def admin_schedule():
 
         except IntegrityError:
             db.session.rollback()
+            OccupancyIndex.discard_request_index()
             flash("Error: Database Constraint Violation (Duplicate Entry)", "danger")
         except Exception as e:
             db.session.rollback()
+            OccupancyIndex.discard_request_index()
             flash(f"An unexpected error occurred: {str(e)}", "danger")
     
+    # Weekly Grid (only built when the editor tab is shown)
+    grid_filters = {
+        'department_id': request.args.get('department_id', type=int),
+        'class_id': request.args.get('class_id', type=int),
+        'faculty_id': request.args.get('faculty_id', type=int),
+        'room_id': request.args.get('room_id', type=int),
+    }
+    manage_grid = None
+    class_pagination = None
+
+    if active_tab == 'manage':
+        manage_grid, class_pagination = GridBuilder.filtered(
+            **grid_filters,
+            page=request.args.get('page', 1, type=int)
+        )
+
     # 2. CLASSROOM TAB
-    classroom_grid = {d: {t: None for t in TIMES} for d in DAYS}
+    classroom_grid = WeekGrid()
     selected_classroom = None
     
     if active_tab == 'classroom' and classroom_form.validate_on_submit():
         c_id = classroom_form.classroom_id.data
         selected_classroom = Classroom.query.get(c_id)
         if selected_classroom:
-            c_slots = Timetable.query.filter_by(classroom_id=c_id).all()
-            for slot in c_slots:
-                t = slot.start_time.strftime("%H:%M")
-                if t in TIMES:
-                    classroom_grid[slot.day][t] = slot
+            classroom_grid = GridBuilder.build(classroom_id=c_id)
     
     # 3. DAILY TAB
     daily_schedule_data = []
@@ -138,13 +151,8 @@ def admin_schedule():
             )
 
     # Always fetch slots for the selected date (even if not POST, to show today's schedule)
-    d_slots = Timetable.query.filter_by(day=day_name).order_by(Timetable.start_time).all()
-    leaves = FacultyLeave.query.filter(
-        FacultyLeave.status == "Approved",
-        FacultyLeave.start_date <= selected_date,
-        FacultyLeave.end_date >= selected_date
-    ).all()
-    leave_ids = {l.faculty_id for l in leaves}
+    d_slots = TimetableQuery.for_day(day_name)
+    leave_ids = LeaveIndex.get().on_leave(selected_date)
     
     for slot in d_slots:
         daily_schedule_data.append({
@@ -159,13 +167,15 @@ def admin_schedule():
         classroom_form=classroom_form,
         daily_form=daily_form,
         manage_grid=manage_grid,
+        class_pagination=class_pagination,
+        grid_filters=grid_filters,
         classroom_grid=classroom_grid,
         selected_classroom=selected_classroom,
         daily_schedule_data=daily_schedule_data,
         selected_date=selected_date,
         day_name=day_name,
-        days=DAYS,
-        times=TIMES,
+        days=WeekGrid.days,
+        times=TIME_LABELS,
         calendar_event=calendar_event
     )
 
@@ -185,6 +195,62 @@ def delete_schedule(id):
     return redirect(url_for('admin.admin_schedule', tab='manage'))
 
 
+@admin_bp.route("/admin/schedule/import", methods=["GET", "POST"])
+@admin_required
+def import_schedule():
+    """Bulk import timetable slots from CSV / XLSX"""
+    form = TimetableImportForm()
+    report = None
+    summary = None
+
+    if form.validate_on_submit():
+        upload = form.file.data
+        try:
+            rows = read_rows(upload.stream, upload.filename)
+            report = TimetableImporter().run(rows, dry_run=form.dry_run.data)
+            summary = summarize(report)
+            OccupancyIndex.discard_request_index()
+
+            if form.dry_run.data:
+                flash(f"Validation finished: {summary['accepted']} of {summary['total']} rows can be imported.", "info")
+            else:
+                flash(f"Import finished: {summary['accepted']} slots added, {summary['rejected']} rejected.",
+                      "success" if not summary['rejected'] else "warning")
+        except TimetableImportError as e:
+            flash(str(e), "danger")
+        except Exception as e:
+            db.session.rollback()
+            flash(f"An unexpected error occurred: {str(e)}", "danger")
+
+    return render_template(
+        "admin/schedule_import.html",
+        form=form,
+        report=report,
+        summary=summary,
+        columns=COLUMNS
+    )
+
+
+@admin_bp.route("/api/schedule/grid")
+@admin_required
+def schedule_grid_data():
+    """Weekly grid as JSON (same filters and paging as the editor)"""
+    grid, pagination = GridBuilder.filtered(
+        department_id=request.args.get('department_id', type=int),
+        class_id=request.args.get('class_id', type=int),
+        faculty_id=request.args.get('faculty_id', type=int),
+        room_id=request.args.get('room_id', type=int),
+        page=request.args.get('page', 1, type=int),
+        per_page=min(request.args.get('per_page', 10, type=int), 100)
+    )
+    data = grid.to_dict()
+    if pagination:
+        data["page"] = pagination.page
+        data["pages"] = pagination.pages
+        data["classes"] = [{"id": c.id, "name": c.name} for c in pagination.items]
+    return jsonify(data)
+
+
 @admin_bp.route("/api/faculty/<int:faculty_id>/subjects")
 @admin_required
 def get_faculty_subjects(faculty_id):
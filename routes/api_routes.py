@@ -0,0 +1,86 @@
+from flask import Blueprint, jsonify, request, current_app
+from datetime import datetime
+from auth import api_auth_required, attendance_api_required
+from models import Timetable
+from services.attendance_service import AttendanceService
+from services.data_version import DataVersionService
+from services.grid_builder import GridBuilder
+from services.timetable_queries import TimetableQuery
+
+api_bp = Blueprint('api', __name__, url_prefix='/api')
+
+
+def conditional_json(build):
+    """
+    Serve build() as JSON with a strong ETag from the timetable version counter.
+    If the client already has this version, answer 304 without running build()
+    (and, while the counter is cached, without touching the database).
+    """
+    etag = f"timetable-{DataVersionService.current('timetable')}"
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = jsonify(build())
+    response.set_etag(etag)
+    # Always revalidate; the data is per-user (session) so keep it out of shared caches
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+@api_bp.route("/timetable/faculty/<int:faculty_id>")
+@api_auth_required
+def faculty_week(faculty_id):
+    return conditional_json(
+        lambda: {"faculty_id": faculty_id, **GridBuilder.build(faculty_id=faculty_id).to_dict()}
+    )
+
+
+@api_bp.route("/timetable/class/<int:class_id>")
+@api_auth_required
+def class_week(class_id):
+    return conditional_json(
+        lambda: {"class_id": class_id, **GridBuilder.build(academic_class_ids=[class_id]).to_dict()}
+    )
+
+
+@api_bp.route("/timetable/room/<int:room_id>")
+@api_auth_required
+def room_week(room_id):
+    return conditional_json(
+        lambda: {"room_id": room_id, **GridBuilder.build(classroom_id=room_id).to_dict()}
+    )
+
+
+@api_bp.route("/timetable/day/<day>")
+@api_auth_required
+def day_slots(day):
+    day = day.capitalize()
+    return conditional_json(
+        lambda: {"day": day, "slots": [row.to_dict() for row in TimetableQuery.for_day(day)]}
+    )
+
+
+@api_bp.route("/attendance", methods=["POST"])
+@attendance_api_required
+def post_attendance():
+    """
+    Bulk attendance from biometric devices:
+    {"date": "2026-10-16", "records": [{"faculty_id": 3, "status": "Present"}, {"email": "...", "date": "..."}]}
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or not isinstance(payload.get("records"), list):
+        return jsonify({"error": "Expected a JSON object with a 'records' list"}), 400
+    if not all(isinstance(r, dict) for r in payload["records"]):
+        return jsonify({"error": "Each record must be an object"}), 400
+
+    try:
+        default_date = datetime.strptime(payload["date"], "%Y-%m-%d").date() if payload.get("date") else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid date, expected YYYY-MM-DD"}), 400
+
+    result, errors = AttendanceService.save_records(payload["records"], default_date=default_date)
+    return jsonify({
+        "saved": result.saved,
+        "on_leave": [{"faculty_id": fid, "date": day.isoformat()} for fid, day in result.on_leave],
+        "errors": errors,
+    })
@@ -2,45 +2,19 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash,
 from models import db, Faculty, Timetable, FacultyAttendance, FacultyLeave
 from faculty_auth import faculty_required
 from forms import FacultyLeaveForm
+from services.dashboard_cache import FacultyDashboardCache
 from datetime import datetime, date
-from collections import defaultdict
 
 faculty_bp = Blueprint('faculty', __name__)
 
 @faculty_bp.route("/faculty/dashboard")
 @faculty_required
 def dashboard():
-    faculty_id = session["faculty_id"]
-    faculty = Faculty.query.get_or_404(faculty_id)
-
-    # Attendance Stats
-    total_days = len(faculty.attendance_records)
-    present_days = len([a for a in faculty.attendance_records if a.status == 'Present'])
-    attendance_percentage = (present_days / total_days * 100) if total_days > 0 else 0
-
-    # Timetable
-    slots = (
-        Timetable.query
-        .filter_by(faculty_id=faculty_id)
-        .order_by(Timetable.day, Timetable.start_time)
-        .all()
-    )
-
-    week = defaultdict(list)
-    week_data = defaultdict(list)
-    for slot in slots:
-        week_data[slot.day].append(slot)
-
-    # Sort days
-    days_order = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-    week = {day: week_data[day] for day in days_order if day in week_data}
+    data = FacultyDashboardCache.get(session["faculty_id"])
 
     return render_template(
         "faculty/faculty_dashboard.html",
-        week=week,
-        attendance_percentage=round(attendance_percentage, 2),
-        present_days=present_days,
-        total_days=total_days
+        **data._asdict()
     )
 
 @faculty_bp.route("/faculty/attendance")
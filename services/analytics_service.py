@@ -0,0 +1,268 @@
+"""
+Aggregates for the admin analytics dashboard.
+
+A few grouped queries, whatever the size of the tables: the entity counts as
+scalar subqueries of one SELECT, faculty per department as a LEFT JOIN ...
+GROUP BY, and the leave status histogram as a GROUP BY. The workload chart and
+totals read the denormalized Faculty.weekly_hours (ORDER BY ... LIMIT, SUM).
+
+AnalyticsStore keeps computed snapshots in analytics_history (one row per
+day, the latest overwritten during the day) so the dashboard only reads a row.
+It is refreshed by `flask refresh-analytics` (cron) or the background thread
+started by create_app, soon after this process commits a change to the data.
+"""
+from collections import namedtuple
+from datetime import datetime, timedelta
+import json
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import select, func, event, case
+from sqlalchemy.orm import Session, defer
+
+from models import db, Faculty, Department, Subject, AcademicClass, Classroom, FacultyLeave, Timetable, AnalyticsHistory
+from services.workload_service import WorkloadService
+
+LEAVE_STATUSES = ("Pending", "Approved", "Rejected")
+
+# counts: {"faculty", "departments", "subjects", "classes", "classrooms"} (active only)
+# departments: [(name, faculty count)]; top_workload: [(name, hours)];
+# workload: {"total_hours", "average_hours", "overloaded"} over active faculty;
+# leave_status: {status: count} for every status in LEAVE_STATUSES
+AnalyticsSnapshot = namedtuple(
+    "AnalyticsSnapshot", "counts departments top_workload workload leave_status computed_at"
+)
+
+# Models whose writes change the dashboard
+TRACKED = (Faculty, Department, Subject, AcademicClass, Classroom, Timetable, FacultyLeave)
+
+
+class AnalyticsService:
+
+    @staticmethod
+    def entity_counts():
+        """Active faculty, departments, subjects, classes and classrooms in one query."""
+        def active(model):
+            return select(func.count()).select_from(model).where(model.is_active == True).scalar_subquery()
+
+        row = db.session.execute(select(
+            active(Faculty).label("faculty"),
+            active(Department).label("departments"),
+            active(Subject).label("subjects"),
+            active(AcademicClass).label("classes"),
+            active(Classroom).label("classrooms"),
+        )).one()
+        return dict(row._mapping)
+
+    @staticmethod
+    def faculty_per_department():
+        """[(department name, faculty count)] for active departments, in id order."""
+        return [tuple(r) for r in db.session.execute(
+            select(Department.name, func.count(Faculty.id))
+            .outerjoin(Faculty, Faculty.department_id == Department.id)
+            .where(Department.is_active == True)
+            .group_by(Department.id, Department.name)
+            .order_by(Department.id)
+        ).all()]
+
+    @staticmethod
+    def top_workload(limit=5):
+        """[(name, hours)] for the `limit` busiest active faculty."""
+        rows = db.session.execute(
+            select(Faculty.name, Faculty.weekly_hours)
+            .where(Faculty.is_active == True)
+            .order_by(Faculty.weekly_hours.desc(), Faculty.id)
+            .limit(limit)
+        ).all()
+        return [(name, WorkloadService.normalize(hours)) for name, hours in rows]
+
+    @staticmethod
+    def workload_summary():
+        """Total and average weekly hours of active faculty, and how many are overloaded."""
+        limit = current_app.config.get("MAX_WORKLOAD_HOURS", 18)
+        total, average, overloaded = db.session.execute(
+            select(
+                func.coalesce(func.sum(Faculty.weekly_hours), 0),
+                func.coalesce(func.avg(Faculty.weekly_hours), 0),
+                func.coalesce(func.sum(case((Faculty.weekly_hours > limit, 1), else_=0)), 0),
+            ).where(Faculty.is_active == True)
+        ).one()
+        return {
+            "total_hours": WorkloadService.normalize(total),
+            "average_hours": WorkloadService.normalize(average),
+            "overloaded": overloaded,
+        }
+
+    @staticmethod
+    def leave_status_counts():
+        """{status: count}, zero-filled for the standard statuses."""
+        counts = dict.fromkeys(LEAVE_STATUSES, 0)
+        counts.update(db.session.execute(AnalyticsService.leave_status_statement()).tuples().all())
+        return counts
+
+    @staticmethod
+    def leave_status_statement():
+        return select(FacultyLeave.status, func.count()).group_by(FacultyLeave.status)
+
+    @staticmethod
+    def snapshot(top=5):
+        return AnalyticsSnapshot(
+            counts=AnalyticsService.entity_counts(),
+            departments=AnalyticsService.faculty_per_department(),
+            top_workload=AnalyticsService.top_workload(top),
+            workload=AnalyticsService.workload_summary(),
+            leave_status=AnalyticsService.leave_status_counts(),
+            computed_at=datetime.utcnow(),
+        )
+
+
+class AnalyticsStore:
+    _stale = False        # this process committed a change since the last refresh
+    _refreshed_at = None  # monotonic time of this process's last refresh
+    _worker = None
+
+    @staticmethod
+    def refresh():
+        """Compute a snapshot and store it as today's row. Commits; returns the snapshot."""
+        # Reset first: a change committed while we compute leaves it stale again
+        stale, refreshed_at = AnalyticsStore._stale, AnalyticsStore._refreshed_at
+        AnalyticsStore._stale = False
+        AnalyticsStore._refreshed_at = time.monotonic()
+        try:
+            return AnalyticsStore._store(AnalyticsService.snapshot())
+        except Exception:
+            # Nothing was stored, so still due (unless a commit marked it stale meanwhile)
+            AnalyticsStore._stale = AnalyticsStore._stale or stale
+            AnalyticsStore._refreshed_at = refreshed_at
+            raise
+
+    @staticmethod
+    def _store(snapshot):
+
+        today = snapshot.computed_at.replace(hour=0, minute=0, second=0, microsecond=0)
+        record = db.session.execute(
+            select(AnalyticsHistory)
+            .where(AnalyticsHistory.taken_at >= today)
+            .order_by(AnalyticsHistory.taken_at.desc())
+            .limit(1)
+        ).scalar()
+        if record is None:
+            record = AnalyticsHistory()
+            db.session.add(record)
+
+        record.taken_at = snapshot.computed_at
+        record.payload = _dump(snapshot)
+        record.active_faculty = snapshot.counts["faculty"]
+        record.total_hours = snapshot.workload["total_hours"]
+        record.average_hours = snapshot.workload["average_hours"]
+        record.overloaded = snapshot.workload["overloaded"]
+        record.pending_leaves = snapshot.leave_status["Pending"]
+        record.approved_leaves = snapshot.leave_status["Approved"]
+        record.rejected_leaves = snapshot.leave_status["Rejected"]
+        db.session.commit()
+        return snapshot
+
+    @staticmethod
+    def latest():
+        """The newest stored snapshot (one indexed query); computed and stored if there is none."""
+        payload = db.session.execute(
+            select(AnalyticsHistory.payload).order_by(AnalyticsHistory.taken_at.desc()).limit(1)
+        ).scalar()
+        if payload is None:
+            return AnalyticsStore.refresh()
+        return _load(payload)
+
+    @staticmethod
+    def history(days=None):
+        """AnalyticsHistory rows of the last `days` days (ANALYTICS_TREND_DAYS), oldest first."""
+        days = days or current_app.config.get("ANALYTICS_TREND_DAYS", 180)
+        since = datetime.utcnow() - timedelta(days=days)
+        return db.session.execute(
+            select(AnalyticsHistory)
+            .options(defer(AnalyticsHistory.payload))
+            .where(AnalyticsHistory.taken_at >= since)
+            .order_by(AnalyticsHistory.taken_at)
+        ).scalars().all()
+
+    @staticmethod
+    def is_stale():
+        """True if this process committed a change the stored snapshot doesn't show."""
+        return AnalyticsStore._stale
+
+    @staticmethod
+    def needs_refresh(max_age):
+        refreshed = AnalyticsStore._refreshed_at
+        return AnalyticsStore.is_stale() or refreshed is None or time.monotonic() - refreshed > max_age
+
+    @staticmethod
+    def start_worker(app):
+        """
+        Refresh in a daemon thread every ANALYTICS_REFRESH_INTERVAL seconds if this
+        process changed the data, and at least every ANALYTICS_SNAPSHOT_MAX_AGE.
+        """
+        interval = app.config.get("ANALYTICS_REFRESH_INTERVAL", 0)
+        if not interval or AnalyticsStore._worker is not None:
+            return None
+        max_age = app.config.get("ANALYTICS_SNAPSHOT_MAX_AGE", 3600)
+
+        def run():
+            while True:
+                time.sleep(interval)
+                with app.app_context():
+                    try:
+                        if AnalyticsStore.needs_refresh(max_age):
+                            AnalyticsStore.refresh()
+                    except Exception:
+                        app.logger.exception("Analytics snapshot refresh failed")
+                        db.session.rollback()
+                    finally:
+                        db.session.remove()
+
+        AnalyticsStore._worker = threading.Thread(target=run, name="analytics-refresh", daemon=True)
+        AnalyticsStore._worker.start()
+        return AnalyticsStore._worker
+
+
+def _dump(snapshot):
+    data = snapshot._asdict()
+    data["computed_at"] = snapshot.computed_at.isoformat()
+    return json.dumps(data)
+
+
+def _load(payload):
+    data = json.loads(payload)
+    data["departments"] = [tuple(d) for d in data["departments"]]
+    data["top_workload"] = [tuple(w) for w in data["top_workload"]]
+    data["computed_at"] = datetime.fromisoformat(data["computed_at"])
+    return AnalyticsSnapshot(**data)
+
+
+# Mark the stored snapshot stale when this process commits a change the dashboard shows
+_PENDING = "analytics_changed"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context):
+    if any(isinstance(obj, TRACKED) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info[_PENDING] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _bulk_statement(orm_execute_state):
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ in TRACKED:
+        orm_execute_state.session.info[_PENDING] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    if session.info.pop(_PENDING, False):
+        AnalyticsStore._stale = True
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session):
+    session.info.pop(_PENDING, None)
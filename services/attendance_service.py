@@ -0,0 +1,269 @@
+"""
+Bulk attendance writes.
+
+Attendance is saved as a matrix {(faculty_id, date): status}: a department
+sheet for one day, a month back-fill, or a biometric device dump. Whatever its
+size it costs a fixed number of queries: holidays in the date range, the
+faculty ids, approved leaves overlapping the range, the statuses already
+recorded (for the trend rollups), and one upsert against
+uq_faculty_attendance_day per chunk.
+"""
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from datetime import datetime, date, timedelta
+
+from sqlalchemy import select, update, bindparam, insert
+
+from models import db, Faculty, FacultyAttendance, FacultyLeave, AcademicCalendar
+from services.dashboard_cache import FacultyDashboardCache
+from services.rollup_service import RollupService
+
+STATUSES = ("Present", "Absent", "Leave")
+
+DEFAULT_CHUNK_SIZE = 1000
+
+# saved: rows written; on_leave: [(faculty_id, day)] whose "Present" became "Leave";
+# unknown: faculty ids that don't exist; invalid: {(faculty_id, day): bad status};
+# skipped: weekend / holiday dates that were ignored
+AttendanceResult = namedtuple("AttendanceResult", "saved on_leave unknown invalid skipped")
+
+
+class AttendanceService:
+
+    @staticmethod
+    def closed_reason(day):
+        """Why attendance can't be marked on `day` (weekend / holiday), or None."""
+        if day.weekday() in (5, 6):
+            return "Cannot mark attendance on Weekends (Saturday/Sunday)."
+        event = AcademicCalendar.query.filter_by(date=day).first()
+        if event and event.is_holiday:
+            return f"Cannot mark attendance: {event.description} (Holiday)"
+        return None
+
+    @staticmethod
+    def working_days(start, end):
+        """Sorted weekdays in [start, end] that aren't calendar holidays (one query)."""
+        holidays = set(db.session.execute(
+            select(AcademicCalendar.date).where(
+                AcademicCalendar.is_holiday == True,
+                AcademicCalendar.date >= start,
+                AcademicCalendar.date <= end
+            )
+        ).scalars())
+        days = []
+        day = start
+        while day <= end:
+            if day.weekday() < 5 and day not in holidays:
+                days.append(day)
+            day += timedelta(days=1)
+        return days
+
+    @staticmethod
+    def faculty_ids_by_email(emails):
+        """{email (lower-case): faculty_id} in one query."""
+        emails = {e.strip().lower() for e in emails if e}
+        if not emails:
+            return {}
+        rows = db.session.execute(
+            select(Faculty.email, Faculty.id).where(db.func.lower(Faculty.email).in_(emails))
+        ).all()
+        return {email.lower(): faculty_id for email, faculty_id in rows}
+
+    @staticmethod
+    def leave_days(faculty_ids, days):
+        """
+        {(faculty_id, day)} for the given (sorted) days covered by approved leave.
+        One query for the leave intervals overlapping the range; each interval is
+        then cut out of `days` with bisect.
+        """
+        if not faculty_ids or not days:
+            return set()
+        leaves = db.session.execute(AttendanceService.leave_days_statement(faculty_ids, days[0], days[-1])).all()
+        covered = set()
+        for faculty_id, start, end in leaves:
+            for day in days[bisect_left(days, start):bisect_right(days, end)]:
+                covered.add((faculty_id, day))
+        return covered
+
+    @staticmethod
+    def leave_days_statement(faculty_ids, start, end):
+        """Approved leave intervals of `faculty_ids` overlapping [start, end]."""
+        return select(FacultyLeave.faculty_id, FacultyLeave.start_date, FacultyLeave.end_date).where(
+            FacultyLeave.status == "Approved",
+            FacultyLeave.start_date <= end,
+            FacultyLeave.end_date >= start,
+            FacultyLeave.faculty_id.in_(faculty_ids)
+        )
+
+    @staticmethod
+    def existing(faculty_ids, start, end):
+        """{(faculty_id, day): status} already recorded in [start, end]."""
+        if not faculty_ids:
+            return {}
+        rows = db.session.execute(AttendanceService.existing_statement(faculty_ids, start, end)).all()
+        return {(faculty_id, day): status for faculty_id, day, status in rows}
+
+    @staticmethod
+    def existing_statement(faculty_ids, start, end):
+        """The SELECT behind existing()."""
+        return select(FacultyAttendance.faculty_id, FacultyAttendance.date, FacultyAttendance.status).where(
+            FacultyAttendance.faculty_id.in_(faculty_ids),
+            FacultyAttendance.date >= start,
+            FacultyAttendance.date <= end
+        )
+
+    @staticmethod
+    def save(day, statuses):
+        """Save {faculty_id: status} for one date and commit."""
+        return AttendanceService.save_matrix({(fid, day): status for fid, status in statuses.items()})
+
+    @staticmethod
+    def save_matrix(entries, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Save {(faculty_id, day): status} and commit once.
+        Weekends and holidays are skipped; "Present" for a faculty on approved
+        leave that day is stored as "Leave". Rows are upserted in chunks.
+        """
+        invalid = {key: s for key, s in entries.items() if s not in STATUSES}
+        entries = {key: s for key, s in entries.items() if s in STATUSES}
+        if not entries:
+            return AttendanceResult(0, [], [], invalid, [])
+
+        dates = {day for _, day in entries}
+        days = AttendanceService.working_days(min(dates), max(dates))
+        working = set(days)
+        skipped = sorted(dates - working)
+
+        faculty_ids = {fid for fid, _ in entries}
+        departments = dict(db.session.execute(
+            select(Faculty.id, Faculty.department_id).where(Faculty.id.in_(faculty_ids))
+        ).tuples().all())
+        known = set(departments)
+        unknown = sorted(faculty_ids - known)
+
+        on_leave = AttendanceService.leave_days(known, days)
+        converted = []
+        now = datetime.utcnow()
+        rows = []
+        for (faculty_id, day), status in sorted(entries.items()):
+            if faculty_id not in known or day not in working:
+                continue
+            if status == "Present" and (faculty_id, day) in on_leave:
+                status = "Leave"
+                converted.append((faculty_id, day))
+            rows.append({"faculty_id": faculty_id, "date": day, "status": status, "marked_at": now})
+
+        # The upsert bypasses the mapper events that maintain the trend rollups
+        previous = AttendanceService.existing(known, days[0], days[-1]) if rows else {}
+        RollupService.apply_attendance(
+            [(r["faculty_id"], r["date"], previous.get((r["faculty_id"], r["date"])), r["status"]) for r in rows],
+            departments
+        )
+        for i in range(0, len(rows), chunk_size):
+            _upsert(rows[i:i + chunk_size])
+        db.session.commit()
+        # The non-ORM fallback path isn't seen by the cache's session listeners
+        FacultyDashboardCache.invalidate(*{r["faculty_id"] for r in rows})
+        return AttendanceResult(len(rows), converted, unknown, invalid, skipped)
+
+    @staticmethod
+    def save_records(records, default_date=None):
+        """
+        Save raw records from a device export, CSV or the API: dicts with
+        faculty_id or email, status (default "Present") and optionally date
+        (YYYY-MM-DD, else `default_date`). All dates are saved as one matrix.
+        Returns (AttendanceResult, [error messages]).
+        """
+        errors = []
+        emails = AttendanceService.faculty_ids_by_email(
+            r.get("email") for r in records if not r.get("faculty_id")
+        )
+
+        entries = {}
+        for n, r in enumerate(records, start=1):
+            try:
+                day = _parse_date(r.get("date")) or default_date
+            except ValueError:
+                errors.append(f"Record {n}: invalid date '{r.get('date')}'")
+                continue
+            if day is None:
+                errors.append(f"Record {n}: no date")
+                continue
+
+            faculty_id = r.get("faculty_id")
+            if faculty_id:
+                try:
+                    faculty_id = int(faculty_id)
+                except (TypeError, ValueError):
+                    errors.append(f"Record {n}: invalid faculty_id '{faculty_id}'")
+                    continue
+            else:
+                faculty_id = emails.get(str(r.get("email") or "").strip().lower())
+                if faculty_id is None:
+                    errors.append(f"Record {n}: unknown faculty '{r.get('email') or ''}'")
+                    continue
+
+            # Later records for the same faculty and day win (e.g. repeated punches)
+            entries[(faculty_id, day)] = str(r.get("status") or "Present").strip().capitalize()
+
+        result = AttendanceService.save_matrix(entries)
+        errors.extend(f"Unknown faculty id {fid}" for fid in result.unknown)
+        errors.extend(f"{day}: invalid status '{st}' for faculty {fid}" for (fid, day), st in result.invalid.items())
+        errors.extend(f"{day}: not a working day, skipped" for day in result.skipped)
+        return result, errors
+
+
+def _parse_date(value):
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value).strip(), "%Y-%m-%d").date()
+
+
+def _upsert(rows):
+    """INSERT ... ON CONFLICT (faculty_id, date) DO UPDATE, per dialect."""
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(FacultyAttendance)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["faculty_id", "date"],
+            set_={"status": stmt.excluded.status, "marked_at": stmt.excluded.marked_at}
+        )
+        db.session.execute(stmt, rows)
+        return
+
+    if dialect in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert as dialect_insert
+        stmt = dialect_insert(FacultyAttendance)
+        stmt = stmt.on_duplicate_key_update(status=stmt.inserted.status, marked_at=stmt.inserted.marked_at)
+        db.session.execute(stmt, rows)
+        return
+
+    # No native upsert: split on the rows that already exist (one query)
+    existing = set(db.session.execute(
+        select(FacultyAttendance.faculty_id, FacultyAttendance.date).where(
+            FacultyAttendance.date.in_({r["date"] for r in rows}),
+            FacultyAttendance.faculty_id.in_({r["faculty_id"] for r in rows})
+        )
+    ).tuples())
+    new = [r for r in rows if (r["faculty_id"], r["date"]) not in existing]
+    changed = [r for r in rows if (r["faculty_id"], r["date"]) in existing]
+    if new:
+        db.session.execute(insert(FacultyAttendance), new)
+    if changed:
+        table = FacultyAttendance.__table__
+        db.session.execute(
+            update(table)
+            .where(table.c.faculty_id == bindparam("fid"), table.c.date == bindparam("day"))
+            .values(status=bindparam("new_status"), marked_at=bindparam("new_marked_at")),
+            [{"fid": r["faculty_id"], "day": r["date"], "new_status": r["status"], "new_marked_at": r["marked_at"]}
+             for r in changed]
+        )
@@ -0,0 +1,62 @@
+"""
+Attendance counts per faculty.
+
+One `GROUP BY faculty_id, status` query gives the Present / Absent / Leave
+counts and the attendance percentage for one faculty or a whole department,
+all-time or over any date range, without loading the records themselves.
+"""
+from collections import namedtuple
+
+from sqlalchemy import select, func
+
+from models import db, FacultyAttendance
+
+# percentage: present / total * 100 (0 when nothing is recorded), not rounded
+AttendanceStats = namedtuple("AttendanceStats", "present absent leave total percentage")
+
+
+class AttendanceStatsService:
+
+    @staticmethod
+    def for_faculty(faculty_id, start=None, end=None):
+        """AttendanceStats of one faculty in [start, end] (either bound optional)."""
+        return AttendanceStatsService.for_many([faculty_id], start, end)[faculty_id]
+
+    @staticmethod
+    def for_many(faculty_ids, start=None, end=None):
+        """{faculty_id: AttendanceStats} for every id asked for, in one query."""
+        faculty_ids = list(faculty_ids)
+        counts = {faculty_id: {} for faculty_id in faculty_ids}
+        if not faculty_ids:
+            return {}
+
+        for faculty_id, status, count in db.session.execute(AttendanceStatsService.statement(faculty_ids, start, end)):
+            counts[faculty_id][status] = count
+
+        return {faculty_id: _stats(by_status) for faculty_id, by_status in counts.items()}
+
+    @staticmethod
+    def statement(faculty_ids, start=None, end=None):
+        """The (faculty_id, status, count) SELECT behind for_many()."""
+        statement = (
+            select(FacultyAttendance.faculty_id, FacultyAttendance.status, func.count())
+            .where(FacultyAttendance.faculty_id.in_(faculty_ids))
+            .group_by(FacultyAttendance.faculty_id, FacultyAttendance.status)
+        )
+        if start is not None:
+            statement = statement.where(FacultyAttendance.date >= start)
+        if end is not None:
+            statement = statement.where(FacultyAttendance.date <= end)
+        return statement
+
+
+def _stats(by_status):
+    total = sum(by_status.values())
+    present = by_status.get("Present", 0)
+    return AttendanceStats(
+        present,
+        by_status.get("Absent", 0),
+        by_status.get("Leave", 0),
+        total,
+        present / total * 100 if total else 0,
+    )
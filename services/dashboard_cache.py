@@ -0,0 +1,133 @@
+from models import db, Faculty, Timetable, FacultyAttendance, FacultyLeave
+from services.timetable_queries import TimetableQuery
+from services.attendance_stats import AttendanceStatsService
+from services.data_version import TRACKED
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from flask import current_app
+from collections import namedtuple, OrderedDict
+import threading
+import time
+
+DAYS_ORDER = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+DashboardData = namedtuple("DashboardData", "week attendance_percentage present_days total_days")
+
+# Writes to these models make the affected faculty's cached dashboard stale
+_WATCHED = (Timetable, FacultyAttendance, FacultyLeave)
+# Names shown next to each cached slot: the columns that also bump the
+# "timetable" data version. Renaming one makes every cached week stale.
+_NAMES = {model: columns for model, keys in TRACKED.items()
+          for key, columns in keys if key == "timetable" and columns is not None}
+_PENDING = "dashboard_cache_stale"
+
+
+class FacultyDashboardCache:
+    """
+    Per-faculty dashboard data (week timetable + attendance summary).
+
+    Entries are LRU-bounded (FACULTY_DASHBOARD_CACHE_SIZE) and expire after
+    FACULTY_DASHBOARD_CACHE_TTL seconds. Commits that touch a faculty's
+    timetable slots, attendance or leaves drop that faculty's entry, and
+    renaming a subject, class, room or faculty clears them all (see the
+    session listeners below), so a repeat visit is served without SQL. The
+    cache is per process: other workers' writes show up after at most the TTL.
+    """
+    _entries = OrderedDict()  # faculty_id -> (expires_at, DashboardData)
+    _lock = threading.Lock()
+
+    @staticmethod
+    def get(faculty_id):
+        now = time.monotonic()
+        with FacultyDashboardCache._lock:
+            entry = FacultyDashboardCache._entries.get(faculty_id)
+            if entry and entry[0] > now:
+                FacultyDashboardCache._entries.move_to_end(faculty_id)
+                return entry[1]
+
+        data = FacultyDashboardCache.compute(faculty_id)
+        ttl = current_app.config.get("FACULTY_DASHBOARD_CACHE_TTL", 300)
+        size = current_app.config.get("FACULTY_DASHBOARD_CACHE_SIZE", 512)
+        with FacultyDashboardCache._lock:
+            FacultyDashboardCache._entries[faculty_id] = (now + ttl, data)
+            FacultyDashboardCache._entries.move_to_end(faculty_id)
+            while len(FacultyDashboardCache._entries) > size:
+                FacultyDashboardCache._entries.popitem(last=False)
+        return data
+
+    @staticmethod
+    def compute(faculty_id):
+        db.get_or_404(Faculty, faculty_id)
+
+        stats = AttendanceStatsService.for_faculty(faculty_id)
+
+        week_data = {}
+        for slot in TimetableQuery.rows(Timetable.faculty_id == faculty_id):
+            week_data.setdefault(slot.day, []).append(slot)
+        week = {day: week_data[day] for day in DAYS_ORDER if day in week_data}
+
+        return DashboardData(week, round(stats.percentage, 2), stats.present, stats.total)
+
+    @staticmethod
+    def invalidate(*faculty_ids):
+        with FacultyDashboardCache._lock:
+            for faculty_id in faculty_ids:
+                FacultyDashboardCache._entries.pop(faculty_id, None)
+
+    @staticmethod
+    def clear():
+        with FacultyDashboardCache._lock:
+            FacultyDashboardCache._entries.clear()
+
+
+def _pending(session):
+    return session.info.setdefault(_PENDING, set())
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_stale(session, flush_context):
+    stale = set()
+    for obj in session.new | session.dirty | session.deleted:
+        if isinstance(obj, _WATCHED):
+            stale.add(obj.faculty_id)
+            # A slot moved to another faculty is stale for the old one too
+            stale.update(inspect(obj).attrs.faculty_id.history.deleted)
+        elif type(obj) in _NAMES and obj not in session.new:
+            # New names aren't on any slot yet
+            if obj in session.deleted or _renamed(obj, _NAMES[type(obj)]):
+                stale.add(None)
+    if stale:
+        _pending(session).update(stale)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _bulk_statement(orm_execute_state):
+    # Bulk insert/update/delete bypasses the flush; we can't tell whose rows changed
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None:
+        return
+    if issubclass(mapper.class_, _WATCHED) or (mapper.class_ in _NAMES and not orm_execute_state.is_insert):
+        _pending(orm_execute_state.session).add(None)
+
+
+def _renamed(obj, columns):
+    state = inspect(obj)
+    return any(state.attrs[column].history.has_changes() for column in columns)
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    stale = session.info.pop(_PENDING, None)
+    if not stale:
+        return
+    if None in stale:
+        FacultyDashboardCache.clear()
+    else:
+        FacultyDashboardCache.invalidate(*stale)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session):
+    session.info.pop(_PENDING, None)
@@ -0,0 +1,133 @@
+from models import (db, DataVersion, Timetable, Faculty, Subject, AcademicClass, Classroom, Department,
+                    FacultySubject, FacultyAttendance)
+from sqlalchemy import event, select, update, insert, inspect
+from sqlalchemy.orm import Session
+from flask import current_app
+import threading
+import time
+
+# Which keys each model's writes bump, and the columns that matter (None: any
+# write). The timetable API shows the faculty/subject/class/room names next to
+# each slot, so changing one of those is a timetable write too; a new one isn't
+# on any slot yet, and other columns (hours, e-mail, ...) aren't returned.
+# "faculty" covers what the faculty PDF reports show besides slots and
+# attendance: the faculty row, its department name and its subjects.
+TRACKED = {
+    Timetable: (("timetable", None),),
+    Faculty: (("timetable", ("name",)), ("faculty", None)),
+    Subject: (("timetable", ("subject_code", "subject_name")), ("faculty", ("subject_code", "subject_name"))),
+    AcademicClass: (("timetable", ("name",)),),
+    Classroom: (("timetable", ("room_code",)),),
+    Department: (("faculty", ("name",)),),
+    FacultySubject: (("faculty", None),),
+    FacultyAttendance: (("attendance", None),),
+}
+
+_PENDING = "data_version_bumped"
+
+
+class DataVersionService:
+    """
+    Monotonic change counters per data set ("timetable" -> 42, "faculty",
+    "attendance").
+
+    Counters live in the data_version table and are bumped inside the same
+    transaction as the write (see the session listeners below). Readers get
+    them from an in-process cache that is dropped when this process commits a
+    change and otherwise refreshed at most every DATA_VERSION_TTL seconds, so
+    a conditional GET usually needs no query at all. Other workers' writes
+    become visible after at most that TTL.
+    """
+    _cache = {}  # key -> (version, fetched_at)
+    _lock = threading.Lock()
+
+    @staticmethod
+    def current(key):
+        ttl = current_app.config.get("DATA_VERSION_TTL", 2)
+        cached = DataVersionService._cache.get(key)
+        now = time.monotonic()
+        if cached and now - cached[1] < ttl:
+            return cached[0]
+
+        version = db.session.execute(
+            select(DataVersion.version).where(DataVersion.key == key)
+        ).scalar() or 0
+        with DataVersionService._lock:
+            DataVersionService._cache[key] = (version, now)
+        return version
+
+    @staticmethod
+    def bump(connection, key):
+        """Increment a counter on the given connection (i.e. in the caller's transaction)."""
+        table = DataVersion.__table__
+        result = connection.execute(
+            update(table).where(table.c.key == key).values(version=table.c.version + 1)
+        )
+        if result.rowcount == 0:
+            # Database created without the migration's seed row
+            connection.execute(insert(table).values(key=key, version=1))
+
+    @staticmethod
+    def forget(*keys):
+        with DataVersionService._lock:
+            for key in keys or list(DataVersionService._cache):
+                DataVersionService._cache.pop(key, None)
+
+
+def _bump(session, keys):
+    pending = session.info.setdefault(_PENDING, set())
+    connection = session.connection()
+    for key in keys:
+        DataVersionService.bump(connection, key)
+        pending.add(key)
+
+
+def _changed(obj, columns):
+    """Whether this flush changed any of `columns` of obj (None: any column)."""
+    state = inspect(obj)
+    if columns is None:
+        columns = [attr.key for attr in state.mapper.column_attrs]
+    return any(state.attrs[column].history.has_changes() for column in columns)
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session, flush_context):
+    keys = set()
+    for obj in session.deleted:
+        keys.update(key for key, _ in TRACKED.get(type(obj), ()))
+    for obj in session.new | session.dirty:
+        for key, columns in TRACKED.get(type(obj), ()):
+            if obj in session.new:
+                if columns is None:
+                    keys.add(key)
+            elif _changed(obj, columns):
+                keys.add(key)
+    if keys:
+        _bump(session, keys)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _bulk_statement(orm_execute_state):
+    # ORM bulk insert/update/delete (session.execute(insert(Timetable), rows)) skips the flush.
+    # The SET clause isn't inspected, so a bulk update of a tracked model always counts.
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.class_ not in TRACKED:
+        return
+    keys = {key for key, columns in TRACKED[mapper.class_]
+            if columns is None or not orm_execute_state.is_insert}
+    if keys:
+        _bump(orm_execute_state.session, keys)
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    keys = session.info.pop(_PENDING, None)
+    if keys:
+        DataVersionService.forget(*keys)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session):
+    session.info.pop(_PENDING, None)
@@ -0,0 +1,153 @@
+"""
+The admin faculty list (active or archived), one page at a time.
+
+Pages use keyset pagination on (sort key, id) instead of OFFSET, and the
+department name plus the subject and slot counts (correlated subqueries) come
+back in the same row. A page costs one query of `page_size` rows, walking
+ix_faculty_active_name / ix_faculty_active_hours, however many faculty there
+are.
+
+Workload status is a band of weekly_hours, so "by status" is the workload
+order and a status filter is a range on weekly_hours.
+"""
+from collections import namedtuple
+import base64
+import json
+
+from flask import current_app
+from sqlalchemy import select, func, or_, tuple_
+
+from models import db, Faculty, Department, FacultySubject, Timetable
+from services.workload_service import WorkloadService
+
+# key: the sort columns (id last, so the order is total); descending: direction of all of them
+Sort = namedtuple("Sort", "label key descending")
+
+SORTS = {
+    "name": Sort("Name", (Faculty.name, Faculty.id), False),
+    "workload_desc": Sort("Workload: high to low", (Faculty.weekly_hours, Faculty.id), True),
+    "workload_asc": Sort("Workload: low to high", (Faculty.weekly_hours, Faculty.id), False),
+}
+
+STATUSES = ("Overloaded", "Normal", "Underutilized")
+
+FacultyRow = namedtuple("FacultyRow", "faculty department subject_count slot_count workload status")
+
+# next_cursor / prev_cursor: pass back as ?after= / ?before=, None when there's no such page
+FacultyPage = namedtuple("FacultyPage", "rows next_cursor prev_cursor")
+
+
+class FacultyDirectory:
+
+    @staticmethod
+    def page(active=True, search=None, status=None, sort="name", after=None, before=None, page_size=None):
+        """One FacultyPage. `after`/`before` are cursors from a previous page; bad ones mean the first page."""
+        page_size = page_size or current_app.config.get("FACULTY_PAGE_SIZE", 50)
+        order = SORTS.get(sort, SORTS["name"])
+        statement, cursor, backwards = _statement(active, search, status, order, after, before)
+
+        rows = db.session.execute(statement.limit(page_size + 1)).all()
+        more = len(rows) > page_size
+        rows = rows[:page_size]
+        if backwards:
+            rows.reverse()
+
+        result = []
+        for faculty, department, subjects, slots in rows:
+            workload = WorkloadService.normalize(faculty.weekly_hours)
+            result.append(FacultyRow(
+                faculty, department, subjects, slots, workload,
+                WorkloadService.status(workload) if active else "Archived"
+            ))
+
+        has_next = more if not backwards else True
+        has_prev = more if backwards else cursor is not None
+        return FacultyPage(
+            result,
+            _encode(result[-1].faculty, order) if result and has_next else None,
+            _encode(result[0].faculty, order) if result and has_prev else None,
+        )
+
+    @staticmethod
+    def statement(active=True, search=None, status=None, sort="name", after=None, before=None, page_size=None):
+        """The SELECT behind page(), including its look-ahead row."""
+        page_size = page_size or current_app.config.get("FACULTY_PAGE_SIZE", 50)
+        statement, _, _ = _statement(active, search, status, SORTS.get(sort, SORTS["name"]), after, before)
+        return statement.limit(page_size + 1)
+
+    @staticmethod
+    def cursor(faculty, sort="name"):
+        """The cursor of `faculty` in `sort` order, as page() hands out."""
+        return _encode(faculty, SORTS.get(sort, SORTS["name"]))
+
+
+def _statement(active, search, status, order, after, before):
+    """(statement without LIMIT, cursor used, walking backwards?) for one page."""
+    after, before = _decode(after, order), _decode(before, order)
+
+    subject_count = (
+        select(func.count()).where(FacultySubject.faculty_id == Faculty.id)
+        .correlate(Faculty).scalar_subquery()
+    )
+    slot_count = (
+        select(func.count()).where(Timetable.faculty_id == Faculty.id)
+        .correlate(Faculty).scalar_subquery()
+    )
+    statement = (
+        select(Faculty, Department.name, subject_count, slot_count)
+        .outerjoin(Department, Department.id == Faculty.department_id)
+        .where(Faculty.is_active == active)
+    )
+    if search:
+        pattern = "%" + search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        statement = statement.where(or_(
+            Faculty.name.ilike(pattern, escape="\\"),
+            Faculty.email.ilike(pattern, escape="\\"),
+            Department.name.ilike(pattern, escape="\\"),
+        ))
+    if active and status in STATUSES:
+        statement = statement.where(_status_filter(status))
+
+    # Going back: walk the reversed order from the first row shown, then flip the page
+    backwards = before is not None and after is None
+    descending = order.descending != backwards
+    cursor = before if backwards else after
+    key = tuple_(*order.key)
+    if cursor is not None:
+        statement = statement.where(key < tuple_(*cursor) if descending else key > tuple_(*cursor))
+    statement = statement.order_by(*(c.desc() if descending else c.asc() for c in order.key))
+    return statement, cursor, backwards
+
+
+def _status_filter(status):
+    high = current_app.config.get("MAX_WORKLOAD_HOURS", 18)
+    low = current_app.config.get("MIN_WORKLOAD_HOURS", 10)
+    if status == "Overloaded":
+        return Faculty.weekly_hours > high
+    if status == "Underutilized":
+        return Faculty.weekly_hours < low
+    return Faculty.weekly_hours.between(low, high)
+
+
+def _encode(faculty, order):
+    values = [getattr(faculty, column.key) for column in order.key]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+def _decode(cursor, order):
+    """Sort key values from a cursor, or None if it's missing or doesn't fit this sort."""
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        return None
+    if not isinstance(values, list) or len(values) != len(order.key):
+        return None
+    for column, value in zip(order.key, values):
+        python_type = column.type.python_type
+        if python_type is float and isinstance(value, int):
+            continue
+        if not isinstance(value, python_type) or isinstance(value, bool):
+            return None
+    return values
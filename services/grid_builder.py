@@ -0,0 +1,117 @@
+from models import db, Timetable, AcademicClass
+from services.scheduler_service import DAYS, TIMES
+from services.timetable_queries import TimetableQuery
+
+TIME_LABELS = [t.strftime("%H:%M") for t in TIMES]
+_DAY_INDEX = {d: i for i, d in enumerate(DAYS)}
+_TIME_INDEX = {t: i for i, t in enumerate(TIMES)}
+_LABEL_INDEX = {t: i for i, t in enumerate(TIME_LABELS)}
+
+
+class WeekGrid:
+    """
+    Weekly grid backed by one flat list: cells[day_idx * len(TIMES) + time_idx]
+    holds the SlotRows in that cell. A cell can hold several slots (e.g. two
+    classes taught at the same time), so nothing is overwritten.
+    """
+    __slots__ = ("cells",)
+
+    days = DAYS
+    times = TIME_LABELS
+
+    def __init__(self, rows=()):
+        self.cells = [[] for _ in range(len(DAYS) * len(TIMES))]
+        for row in rows:
+            self.add(row)
+
+    @staticmethod
+    def position(day, start_time):
+        """Flat index of a cell, or None for off-grid slots."""
+        d = _DAY_INDEX.get(day)
+        t = _LABEL_INDEX.get(start_time) if isinstance(start_time, str) else _TIME_INDEX.get(start_time)
+        if d is None or t is None:
+            return None
+        return d * len(TIMES) + t
+
+    def add(self, row):
+        pos = self.position(row.day, row.start_time)
+        if pos is not None:
+            self.cells[pos].append(row)
+
+    def cell(self, day, start_time):
+        pos = self.position(day, start_time)
+        return self.cells[pos] if pos is not None else []
+
+    def __len__(self):
+        return sum(len(c) for c in self.cells)
+
+    def to_dict(self):
+        """JSON-friendly form: cells stay a flat day-major array."""
+        return {
+            "days": self.days,
+            "times": self.times,
+            "cells": [[row.to_dict() for row in c] for c in self.cells],
+        }
+
+
+class GridBuilder:
+    """Build filtered WeekGrids with a single timetable query each."""
+
+    @staticmethod
+    def criteria(department_id=None, academic_class_ids=None, faculty_id=None, classroom_id=None):
+        criteria = []
+        if department_id:
+            criteria.append(Timetable.academic_class_id.in_(
+                db.session.query(AcademicClass.id).filter(AcademicClass.department_id == department_id)
+            ))
+        if academic_class_ids is not None:
+            criteria.append(Timetable.academic_class_id.in_(list(academic_class_ids)))
+        if faculty_id:
+            criteria.append(Timetable.faculty_id == faculty_id)
+        if classroom_id:
+            criteria.append(Timetable.classroom_id == classroom_id)
+        return criteria
+
+    @staticmethod
+    def statement(department_id=None, academic_class_ids=None, faculty_id=None, classroom_id=None):
+        """The timetable SELECT behind build()."""
+        return TimetableQuery.statement(*GridBuilder.criteria(department_id, academic_class_ids, faculty_id, classroom_id))
+
+    @staticmethod
+    def build(department_id=None, academic_class_ids=None, faculty_id=None, classroom_id=None):
+        """One grid holding every slot that matches all the given filters."""
+        criteria = GridBuilder.criteria(department_id, academic_class_ids, faculty_id, classroom_id)
+        return WeekGrid(TimetableQuery.rows(*criteria))
+
+    @staticmethod
+    def class_query(department_id=None):
+        """Active classes (optionally one department) in grid order."""
+        query = AcademicClass.query.filter_by(is_active=True)
+        if department_id:
+            query = query.filter_by(department_id=department_id)
+        return query.order_by(AcademicClass.year, AcademicClass.name)
+
+    @staticmethod
+    def class_page(department_id=None, page=1, per_page=10):
+        """A page of active classes (optionally one department), for paging grids by class."""
+        return db.paginate(GridBuilder.class_query(department_id), page=page, per_page=per_page, error_out=False)
+
+    @staticmethod
+    def filtered(department_id=None, class_id=None, faculty_id=None, room_id=None, page=1, per_page=10):
+        """
+        Grid for the schedule editor / API. A class, faculty or room filter gives
+        that entity's week; otherwise classes (optionally one department) are paged
+        and the grid holds the current page only. Returns (grid, pagination or None).
+        """
+        if class_id or faculty_id or room_id:
+            grid = GridBuilder.build(
+                department_id=department_id,
+                academic_class_ids=[class_id] if class_id else None,
+                faculty_id=faculty_id,
+                classroom_id=room_id
+            )
+            return grid, None
+
+        pagination = GridBuilder.class_page(department_id, page=page, per_page=per_page)
+        grid = GridBuilder.build(academic_class_ids=[c.id for c in pagination.items])
+        return grid, pagination
@@ -0,0 +1,123 @@
+"""
+Background jobs that produce a file (large exports, batch PDFs).
+
+Jobs run on a small per-process thread pool (JOB_WORKERS) inside their own app
+context, so the request that starts one returns immediately. A job's state is
+kept in JOB_DIR/<id>.json next to its output file rather than in memory, so
+any worker process can report its status and serve the download. Finished
+jobs are removed after JOB_RETENTION_HOURS.
+"""
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import json
+import os
+import re
+import threading
+import uuid
+
+from flask import current_app
+
+from models import db
+
+# status: queued / running / done / failed; times are ISO strings (UTC)
+Job = namedtuple("Job", "id kind status filename error created_at finished_at")
+
+_JOB_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+class JobManager:
+    _executor = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def directory():
+        path = current_app.config.get("JOB_DIR") or os.path.join(current_app.instance_path, "jobs")
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    @staticmethod
+    def executor():
+        with JobManager._lock:
+            if JobManager._executor is None:
+                JobManager._executor = ThreadPoolExecutor(
+                    max_workers=current_app.config.get("JOB_WORKERS", 2), thread_name_prefix="job"
+                )
+            return JobManager._executor
+
+    @staticmethod
+    def submit(kind, filename, work, *args):
+        """
+        Run work(path, *args) in the background; it must write its output to
+        `path`. `filename` is the name offered on download. Returns the job id.
+        """
+        JobManager.cleanup()
+        directory = JobManager.directory()
+        job = Job(uuid.uuid4().hex, kind, "queued", filename, None, _now(), None)
+        _save(directory, job)
+        app = current_app._get_current_object()
+        JobManager.executor().submit(_run, app, directory, job, work, args)
+        return job.id
+
+    @staticmethod
+    def get(job_id):
+        """The Job, or None for an unknown (or malformed) id."""
+        if not _JOB_ID.match(job_id or ""):
+            return None
+        try:
+            with open(_state_path(JobManager.directory(), job_id), encoding="utf-8") as f:
+                return Job(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    @staticmethod
+    def output_path(job):
+        return os.path.join(JobManager.directory(), f"{job.id}.out")
+
+    @staticmethod
+    def cleanup():
+        """Delete jobs (state and output) older than JOB_RETENTION_HOURS."""
+        directory = JobManager.directory()
+        cutoff = datetime.utcnow() - timedelta(hours=current_app.config.get("JOB_RETENTION_HOURS", 24))
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            try:
+                if datetime.utcfromtimestamp(os.path.getmtime(path)) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass  # removed by another worker
+
+
+def _now():
+    return datetime.utcnow().isoformat(timespec="seconds")
+
+
+def _state_path(directory, job_id):
+    return os.path.join(directory, f"{job_id}.json")
+
+
+def _save(directory, job):
+    # Write-then-rename so readers never see a half-written state file
+    path = _state_path(directory, job.id)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(job._asdict(), f)
+    os.replace(path + ".tmp", path)
+
+
+def _run(app, directory, job, work, args):
+    with app.app_context():
+        job = job._replace(status="running")
+        _save(directory, job)
+        output = os.path.join(directory, f"{job.id}.out")
+        try:
+            work(output + ".part", *args)
+            os.replace(output + ".part", output)
+            job = job._replace(status="done", finished_at=_now())
+        except Exception as e:
+            app.logger.exception("Background job %s (%s) failed", job.id, job.kind)
+            if os.path.exists(output + ".part"):
+                os.remove(output + ".part")
+            job = job._replace(status="failed", error=str(e), finished_at=_now())
+        finally:
+            db.session.remove()
+        _save(directory, job)
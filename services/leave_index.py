@@ -0,0 +1,366 @@
+"""
+In-process index of approved leave intervals.
+
+Answers "who is on leave on date D" and "does faculty F have leave overlapping
+[a, b]" without a range scan:
+
+- a centered interval tree over all approved leaves (stabbing query,
+  O(log n + k)), plus a small buffer of changes since it was built;
+- per faculty, leaves sorted by start date with a running max of end dates,
+  so an overlap test is one bisect (O(log k)).
+
+The shared instance (LeaveIndex.get()) is built with one query, kept current
+by the session listeners below for this process's commits, and rebuilt after
+LEAVE_INDEX_TTL seconds to pick up other workers' writes.
+"""
+from bisect import bisect_right, insort
+from collections import namedtuple
+from datetime import date, datetime
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from models import db, FacultyLeave
+
+Leave = namedtuple("Leave", "id faculty_id start_date end_date reason")
+
+_PENDING = "leave_index_changes"
+_STALE = object()  # marker: a bulk statement touched faculty_leave
+
+
+class _Node:
+    """Centered interval tree node over (start_ordinal, end_ordinal, Leave)."""
+    __slots__ = ("center", "left", "right", "by_start", "by_end")
+
+    def __init__(self, intervals):
+        points = sorted(p for s, e, _ in intervals for p in (s, e))
+        self.center = points[len(points) // 2]
+        here, left, right = [], [], []
+        for iv in intervals:
+            if iv[1] < self.center:
+                left.append(iv)
+            elif iv[0] > self.center:
+                right.append(iv)
+            else:
+                here.append(iv)
+        self.by_start = sorted(here, key=lambda iv: iv[0])
+        self.by_end = sorted(here, key=lambda iv: iv[1], reverse=True)
+        self.left = _Node(left) if left else None
+        self.right = _Node(right) if right else None
+
+    def stab(self, x, out):
+        node = self
+        while node is not None:
+            if x < node.center:
+                for s, _, leave in node.by_start:
+                    if s > x:
+                        break
+                    out.append(leave)
+                node = node.left
+            elif x > node.center:
+                for _, e, leave in node.by_end:
+                    if e < x:
+                        break
+                    out.append(leave)
+                node = node.right
+            else:
+                out.extend(leave for _, _, leave in node.by_start)
+                return out
+        return out
+
+
+class _FacultyLeaves:
+    """One faculty's leaves sorted by start, with a running max of end dates."""
+    __slots__ = ("leaves", "starts", "max_end")
+
+    def __init__(self):
+        self.leaves, self.starts, self.max_end = [], [], []
+
+    def _reindex(self):
+        self.starts = [l.start_date for l in self.leaves]
+        self.max_end, running = [], date.min
+        for l in self.leaves:
+            running = max(running, l.end_date)
+            self.max_end.append(running)
+
+    def add(self, leave):
+        insort(self.leaves, leave, key=lambda l: (l.start_date, l.id))
+        self._reindex()
+
+    def remove(self, leave_id):
+        self.leaves = [l for l in self.leaves if l.id != leave_id]
+        self._reindex()
+
+    def overlaps(self, start, end):
+        i = bisect_right(self.starts, end)
+        return i > 0 and self.max_end[i - 1] >= start
+
+    def overlapping(self, start, end):
+        i = bisect_right(self.starts, end)
+        found = []
+        # max_end never decreases, so stop as soon as it falls before `start`
+        for j in range(i - 1, -1, -1):
+            if self.max_end[j] < start:
+                break
+            if self.leaves[j].end_date >= start:
+                found.append(self.leaves[j])
+        found.reverse()
+        return found
+
+
+class LeaveIndex:
+    _shared = None
+    _built_at = 0.0
+    _shared_lock = threading.Lock()
+
+    def __init__(self, leaves=()):
+        self._lock = threading.RLock()
+        self._leaves = {}
+        self._faculty = {}
+        self._tree = None
+        self._added = {}       # leave id -> Leave, not yet in the tree
+        self._removed = set()  # leave ids still in the tree but gone
+        for leave in leaves:
+            self._leaves[leave.id] = leave
+            self._faculty.setdefault(leave.faculty_id, _FacultyLeaves()).leaves.append(leave)
+        for fl in self._faculty.values():
+            fl.leaves.sort(key=lambda l: (l.start_date, l.id))
+            fl._reindex()
+        self._rebuild_tree()
+
+    @staticmethod
+    def load():
+        """Approved leaves from the database, one query."""
+        return LeaveIndex(Leave(*r) for r in db.session.execute(LeaveIndex.statement()).all())
+
+    @staticmethod
+    def statement():
+        """The SELECT behind load()."""
+        return (
+            select(FacultyLeave.id, FacultyLeave.faculty_id, FacultyLeave.start_date,
+                   FacultyLeave.end_date, FacultyLeave.reason)
+            .where(FacultyLeave.status == "Approved")
+        )
+
+    @classmethod
+    def get(cls):
+        """The shared, process-wide index (built on first use, rebuilt after the TTL)."""
+        ttl = current_app.config.get("LEAVE_INDEX_TTL", 60)
+        with cls._shared_lock:
+            if cls._shared is None or time.monotonic() - cls._built_at > ttl:
+                cls._shared = cls.load()
+                cls._built_at = time.monotonic()
+            return cls._shared
+
+    @classmethod
+    def discard(cls):
+        with cls._shared_lock:
+            cls._shared = None
+
+    # --- queries ---------------------------------------------------------
+
+    def leaves_on(self, day):
+        """Approved leaves covering `day`."""
+        with self._lock:
+            found = self._tree.stab(day.toordinal(), []) if self._tree else []
+            if self._removed:
+                found = [l for l in found if l.id not in self._removed]
+            found.extend(l for l in self._added.values() if l.start_date <= day <= l.end_date)
+            return found
+
+    def on_leave(self, day):
+        """Faculty ids on approved leave on `day`."""
+        return {l.faculty_id for l in self.leaves_on(day)}
+
+    def overlaps(self, faculty_id, start, end=None):
+        """Does the faculty have approved leave overlapping [start, end]?"""
+        with self._lock:
+            fl = self._faculty.get(faculty_id)
+            return bool(fl) and fl.overlaps(start, end or date.max)
+
+    def overlapping(self, faculty_id, start, end=None):
+        """The faculty's approved leaves overlapping [start, end] (open-ended if no end)."""
+        with self._lock:
+            fl = self._faculty.get(faculty_id)
+            return fl.overlapping(start, end or date.max) if fl else []
+
+    def covered_days(self, faculty_ids, days):
+        """{(faculty_id, day)} for the given days covered by approved leave."""
+        covered = set()
+        for faculty_id in faculty_ids:
+            fl = self._faculty.get(faculty_id)
+            if not fl:
+                continue
+            for day in days:
+                if fl.overlaps(day, day):
+                    covered.add((faculty_id, day))
+        return covered
+
+    def __len__(self):
+        return len(self._leaves)
+
+    # --- maintenance -----------------------------------------------------
+
+    def add(self, leave):
+        with self._lock:
+            self.remove(leave.id)
+            self._leaves[leave.id] = leave
+            self._faculty.setdefault(leave.faculty_id, _FacultyLeaves()).add(leave)
+            self._added[leave.id] = leave
+            self._maybe_rebuild()
+
+    def remove(self, leave_id):
+        with self._lock:
+            leave = self._leaves.pop(leave_id, None)
+            if leave is None:
+                return
+            self._faculty[leave.faculty_id].remove(leave_id)
+            if self._added.pop(leave_id, None) is None:
+                self._removed.add(leave_id)
+            self._maybe_rebuild()
+
+    def _maybe_rebuild(self):
+        # Keep the linear-scan buffers small relative to the tree
+        if len(self._added) + len(self._removed) > max(64, len(self._leaves) // 16):
+            self._rebuild_tree()
+
+    def _rebuild_tree(self):
+        intervals = [
+            (l.start_date.toordinal(), l.end_date.toordinal(), l)
+            for l in self._leaves.values() if l.start_date <= l.end_date
+        ]
+        self._tree = _Node(intervals) if intervals else None
+        self._added, self._removed = {}, set()
+
+
+# Keep the shared index in step with this process's commits
+@event.listens_for(Session, "after_flush")
+def _collect_leaves(session, flush_context):
+    changes = []
+    for obj in session.new | session.dirty:
+        if isinstance(obj, FacultyLeave):
+            changes.append((obj.id, Leave(obj.id, obj.faculty_id, obj.start_date, obj.end_date, obj.reason)
+                            if obj.status == "Approved" else None))
+    for obj in session.deleted:
+        if isinstance(obj, FacultyLeave):
+            changes.append((obj.id, None))
+    if changes:
+        session.info.setdefault(_PENDING, []).extend(changes)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _bulk_statement(orm_execute_state):
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ is FacultyLeave:
+        orm_execute_state.session.info.setdefault(_PENDING, []).append(_STALE)
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    changes = session.info.pop(_PENDING, None)
+    index = LeaveIndex._shared
+    if not changes or index is None:
+        return
+    if _STALE in changes:
+        LeaveIndex.discard()
+        return
+    for leave_id, leave in changes:
+        if leave is None:
+            index.remove(leave_id)
+        else:
+            index.add(leave)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session):
+    session.info.pop(_PENDING, None)
+
+
+def benchmark(rows=100_000, queries=1_000, faculty=2_000, sql_index=False, seed=7):
+    """
+    Compare the index with the SQL range scans on a throwaway in-memory SQLite
+    database of `rows` leaves: a bare faculty_leave table, or with `sql_index`
+    the indexes the model declares. Returns [(operation, sql_ms, index_ms)]
+    with average milliseconds per query, plus the index build time in ms.
+    """
+    import random
+    from datetime import timedelta
+    from sqlalchemy import create_engine, insert, Index, MetaData, Table, Column
+
+    rng = random.Random(seed)
+    engine = create_engine("sqlite://")
+    # Columns only: FacultyLeave.__table__.create() would bring the model's indexes along
+    model = FacultyLeave.__table__
+    table = Table(model.name, MetaData(),
+                  *(Column(c.name, c.type, primary_key=c.primary_key) for c in model.columns))
+    table.create(engine)
+    if sql_index:
+        for ix in model.indexes:
+            Index(ix.name, *(table.c[c.name] for c in ix.columns), **ix.dialect_kwargs).create(engine)
+
+    first = date(2023, 1, 1)
+    span = 3 * 365
+    data = []
+    for i in range(1, rows + 1):
+        start = first + timedelta(days=rng.randrange(span))
+        data.append({
+            "id": i,
+            "faculty_id": rng.randint(1, faculty),
+            "start_date": start,
+            "end_date": start + timedelta(days=rng.randint(0, 9)),
+            "reason": "bench",
+            "status": "Approved" if rng.random() < 0.7 else rng.choice(["Pending", "Rejected"]),
+            "applied_at": datetime(2023, 1, 1),
+        })
+
+    with engine.begin() as conn:
+        conn.execute(insert(table), data)
+
+    days = [first + timedelta(days=rng.randrange(span)) for _ in range(queries)]
+    probes = [(rng.randint(1, faculty), d, d + timedelta(days=rng.randint(0, 6))) for d in days]
+
+    with engine.connect() as conn:
+        t0 = time.perf_counter()
+        for d in days:
+            conn.execute(select(table.c.faculty_id).where(
+                table.c.status == "Approved", table.c.start_date <= d, table.c.end_date >= d
+            )).all()
+        sql_stab = (time.perf_counter() - t0) * 1000 / queries
+
+        t0 = time.perf_counter()
+        for fid, a, b in probes:
+            conn.execute(select(table.c.id).where(
+                table.c.faculty_id == fid, table.c.status == "Approved",
+                table.c.start_date <= b, table.c.end_date >= a
+            ).limit(1)).first()
+        sql_overlap = (time.perf_counter() - t0) * 1000 / queries
+
+        t0 = time.perf_counter()
+        index = LeaveIndex(
+            Leave(*r) for r in conn.execute(
+                select(table.c.id, table.c.faculty_id, table.c.start_date, table.c.end_date, table.c.reason)
+                .where(table.c.status == "Approved")
+            )
+        )
+        build_ms = (time.perf_counter() - t0) * 1000
+
+    t0 = time.perf_counter()
+    for d in days:
+        index.on_leave(d)
+    idx_stab = (time.perf_counter() - t0) * 1000 / queries
+
+    t0 = time.perf_counter()
+    for fid, a, b in probes:
+        index.overlaps(fid, a, b)
+    idx_overlap = (time.perf_counter() - t0) * 1000 / queries
+
+    engine.dispose()
+    return [
+        ("on leave on date D", sql_stab, idx_stab),
+        ("faculty F overlaps range R", sql_overlap, idx_overlap),
+    ], build_ms
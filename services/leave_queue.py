@@ -0,0 +1,145 @@
+"""
+The admin leave queue: pending requests first, then the decided ones, each
+newest first, one page at a time.
+
+A page is filled from the pending section and then, if there's room, from the
+rest, each a keyset query on (applied_at, id) with the faculty joined in. That
+is at most two index-ordered queries (ix_faculty_leave_status_applied /
+ix_faculty_leave_applied_at) however long the history is.
+
+Bulk approve / reject is a single UPDATE. It goes around the mapper events, so
+the leave rollups are adjusted here; the leave index, dashboard cache and
+analytics listeners see the bulk statement and refresh on commit.
+"""
+from collections import namedtuple
+from datetime import datetime
+import base64
+
+from flask import current_app
+from sqlalchemy import select, update, tuple_
+from sqlalchemy.orm import contains_eager
+
+from models import db, Faculty, FacultyLeave
+from services.rollup_service import RollupService
+
+STATUSES = ("Pending", "Approved", "Rejected")
+
+# next_cursor: pass back as ?after=, None on the last page
+LeavePage = namedtuple("LeavePage", "leaves next_cursor")
+
+# updated: ids whose status changed; skipped: ids that weren't pending (or don't exist)
+LeaveDecision = namedtuple("LeaveDecision", "updated skipped")
+
+
+class LeaveQueue:
+
+    @staticmethod
+    def page(status=None, department_id=None, start=None, end=None, after=None, page_size=None):
+        """
+        One LeavePage. `start`/`end` keep leaves overlapping that range; `after`
+        is a cursor from the previous page (a bad one means the first page).
+        """
+        page_size = page_size or current_app.config.get("LEAVE_PAGE_SIZE", 50)
+        leaves = []
+        for section in LeaveQueue.sections(status, department_id, start, end, after):
+            leaves += db.session.execute(section.limit(page_size + 1 - len(leaves))).scalars().all()
+            if len(leaves) > page_size:
+                break
+
+        more = len(leaves) > page_size
+        leaves = leaves[:page_size]
+        return LeavePage(leaves, _encode(leaves[-1]) if more else None)
+
+    @staticmethod
+    def sections(status=None, department_id=None, start=None, end=None, after=None):
+        """
+        The SELECTs page() reads in turn until the page is full (pending, then
+        the rest), each ordered newest first, without a LIMIT.
+        """
+        cursor = _decode(after)
+        statement = (
+            select(FacultyLeave)
+            .join(FacultyLeave.faculty)
+            .options(contains_eager(FacultyLeave.faculty))
+        )
+        if department_id:
+            statement = statement.where(Faculty.department_id == department_id)
+        if start:
+            statement = statement.where(FacultyLeave.end_date >= start)
+        if end:
+            statement = statement.where(FacultyLeave.start_date <= end)
+
+        if status in STATUSES:
+            sections = [(status == "Pending", FacultyLeave.status == status)]
+        else:
+            sections = [(True, FacultyLeave.status == "Pending"), (False, FacultyLeave.status != "Pending")]
+
+        statements = []
+        for pending, condition in sections:
+            if cursor and pending and not cursor[0]:
+                continue  # the previous page already got past the pending ones
+            section = statement.where(condition)
+            if cursor and cursor[0] == pending:
+                section = section.where(
+                    tuple_(FacultyLeave.applied_at, FacultyLeave.id) < tuple_(cursor[1], cursor[2])
+                )
+            statements.append(section.order_by(FacultyLeave.applied_at.desc(), FacultyLeave.id.desc()))
+        return statements
+
+    @staticmethod
+    def cursor(leave):
+        """The cursor of `leave`, as page() hands out."""
+        return _encode(leave)
+
+    @staticmethod
+    def decide(leave_ids, status):
+        """
+        Set `status` (Approved / Rejected) on the pending leaves among
+        `leave_ids` with one UPDATE, and adjust the leave rollups. Commits.
+        """
+        if status not in ("Approved", "Rejected"):
+            raise ValueError(f"Unknown decision: {status}")
+        leave_ids = set(leave_ids)
+        if not leave_ids:
+            return LeaveDecision([], [])
+
+        # Lock the rows first so the rollups match what the UPDATE changes
+        rows = db.session.execute(
+            select(FacultyLeave.id, FacultyLeave.faculty_id, FacultyLeave.start_date, FacultyLeave.end_date,
+                   Faculty.department_id)
+            .join(Faculty, Faculty.id == FacultyLeave.faculty_id)
+            .where(FacultyLeave.id.in_(leave_ids), FacultyLeave.status == "Pending")
+            .with_for_update(of=FacultyLeave)
+        ).all()
+        updated = [row.id for row in rows]
+        if updated:
+            db.session.execute(
+                update(FacultyLeave)
+                .where(FacultyLeave.id.in_(updated), FacultyLeave.status == "Pending")
+                .values(status=status)
+            )
+            RollupService.apply_leave(
+                [(row.faculty_id, row.start_date, row.end_date, "Pending", status) for row in rows],
+                {row.faculty_id: row.department_id for row in rows}
+            )
+        db.session.commit()
+        return LeaveDecision(updated, sorted(leave_ids - set(updated)))
+
+
+def _encode(leave):
+    value = f"{int(leave.status == 'Pending')},{leave.applied_at.isoformat()},{leave.id}"
+    return base64.urlsafe_b64encode(value.encode()).decode().rstrip("=")
+
+
+def _decode(cursor):
+    """(pending, applied_at, id) from a cursor, or None."""
+    if not cursor:
+        return None
+    try:
+        value = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        pending, applied_at, leave_id = value.split(",")
+        if pending not in ("0", "1"):
+            return None
+        return pending == "1", datetime.fromisoformat(applied_at), int(leave_id)
+    except ValueError:
+        return None
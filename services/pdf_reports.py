@@ -0,0 +1,211 @@
+"""
+Template contexts for the faculty PDF reports, built in bulk.
+
+One call loads everything the templates touch for any number of faculty
+(timetable slots with subject/class/room, the last ATTENDANCE_DAYS of
+attendance, status counts, subjects) in a fixed number of queries, so a
+department batch costs the same round-trips as a single report.
+
+A report's cache version (version()) names the data sets it shows, so a
+cached PDF is found before any of that is loaded.
+"""
+from collections import defaultdict
+from datetime import datetime, date, timedelta
+import statistics
+import time
+
+from sqlalchemy import select, func
+from sqlalchemy.orm import joinedload, selectinload
+from werkzeug.utils import secure_filename
+
+from models import db, Faculty, FacultySubject, Timetable, FacultyAttendance
+from services.workload_service import WorkloadService
+from services.attendance_stats import AttendanceStatsService
+from services.data_version import DataVersionService
+
+TEMPLATES = {
+    "timetable": "reports/pdf_timetable.html",
+    "attendance": "reports/pdf_attendance.html",
+    "profile": "reports/pdf_profile.html",
+}
+
+# The DataVersionService keys behind each report (profile: weekly hours follow the timetable)
+VERSIONS = {
+    "timetable": ("timetable", "faculty"),
+    "attendance": ("attendance", "faculty"),
+    "profile": ("faculty", "timetable"),
+}
+
+ATTENDANCE_DAYS = 30
+
+
+class PdfReports:
+
+    @staticmethod
+    def department_faculty(department_id):
+        """Active faculty of a department, with department and subjects loaded."""
+        return db.session.execute(
+            select(Faculty)
+            .where(Faculty.department_id == department_id, Faculty.is_active == True)
+            .options(joinedload(Faculty.department),
+                     selectinload(Faculty.subjects).joinedload(FacultySubject.subject))
+            .order_by(Faculty.name)
+        ).scalars().all()
+
+    @staticmethod
+    def version(kind, faculty_id):
+        """
+        Cache version of one faculty's report: changes whenever the data it
+        shows may have. The attendance report covers the last days up to
+        today, so it also changes daily.
+        """
+        parts = [kind, str(faculty_id)]
+        parts += [f"{key}={DataVersionService.current(key)}" for key in VERSIONS[kind]]
+        if kind == "attendance":
+            parts.append(date.today().isoformat())
+        return ":".join(parts)
+
+    @staticmethod
+    def documents(kind, faculties):
+        """
+        ([(filename, PDF bytes)] found in the PDF cache,
+         [(filename, template_name, context, version)] still to render).
+        Contexts are only built, in bulk, for the faculty whose report isn't cached.
+        """
+        from utils.pdf_generator import PdfRenderer
+
+        template_name = TEMPLATES[kind]
+        cached, missing = [], []
+        for faculty in faculties:
+            version = PdfReports.version(kind, faculty.id)
+            pdf = PdfRenderer.cached(template_name, version)
+            if pdf is not None:
+                cached.append((PdfReports.filename(kind, faculty), pdf))
+            else:
+                missing.append((faculty, version))
+
+        contexts = PdfReports.contexts(kind, [faculty for faculty, _ in missing])
+        return cached, [(PdfReports.filename(kind, faculty), template_name, context, version)
+                        for (faculty, version), (_, context) in zip(missing, contexts)]
+
+    @staticmethod
+    def contexts(kind, faculties):
+        """[(faculty, template context)] for one report kind."""
+        generated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        ids = [f.id for f in faculties]
+
+        if kind == "timetable":
+            slots = PdfReports.timetables(ids)
+            return [(f, {"faculty": f, "timetable": slots.get(f.id, []), "generated_at": generated_at})
+                    for f in faculties]
+
+        if kind == "attendance":
+            records, stats = PdfReports.attendance(ids)
+            return [(f, {"faculty": f, "attendance_records": records.get(f.id, []),
+                         "stats": stats[f.id], "generated_at": generated_at})
+                    for f in faculties]
+
+        if kind == "profile":
+            return [(f, {"faculty": f, "workload": WorkloadService.normalize(f.weekly_hours),
+                         "generated_at": generated_at})
+                    for f in faculties]
+
+        raise ValueError(f"Unknown report: {kind}")
+
+    @staticmethod
+    def timetables(faculty_ids):
+        """{faculty_id: [Timetable]} ordered by day and start, with subject/class/room loaded."""
+        slots = defaultdict(list)
+        if not faculty_ids:
+            return slots
+        rows = db.session.execute(
+            select(Timetable)
+            .where(Timetable.faculty_id.in_(faculty_ids))
+            .options(joinedload(Timetable.subject), joinedload(Timetable.academic_class),
+                     joinedload(Timetable.classroom))
+            .order_by(Timetable.day, Timetable.start_time)
+        ).scalars().all()
+        for slot in rows:
+            slots[slot.faculty_id].append(slot)
+        return slots
+
+    @staticmethod
+    def attendance(faculty_ids, days=ATTENDANCE_DAYS):
+        """
+        ({faculty_id: [FacultyAttendance] of the last `days` days, newest first},
+         {faculty_id: all-time AttendanceStats}).
+        """
+        records = defaultdict(list)
+        if not faculty_ids:
+            return records, {}
+
+        since = date.today() - timedelta(days=days)
+        for record in db.session.execute(
+            select(FacultyAttendance)
+            .where(FacultyAttendance.faculty_id.in_(faculty_ids), FacultyAttendance.date >= since)
+            .order_by(FacultyAttendance.date.desc())
+        ).scalars():
+            records[record.faculty_id].append(record)
+        return records, AttendanceStatsService.for_many(faculty_ids)
+
+    @staticmethod
+    def filename(kind, faculty):
+        return f"{kind}_{faculty.id}_{secure_filename(faculty.name) or 'faculty'}.pdf"
+
+
+def benchmark(documents=20, faculty_id=None):
+    """
+    Per-document latency of the three report templates for one faculty (the
+    busiest by default), with the PDF cache off. Needs a request context.
+    Returns (startup_ms, [(kind, cold_ms, single_ms, batch_ms)]):
+    cold_ms is one document in a fresh, not warmed-up process (what the first
+    request to each worker used to pay), single_ms the median of `documents`
+    one-by-one renders, batch_ms the wall time per document of render_many.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    import multiprocessing
+    from flask import current_app, render_template
+    from utils.pdf_generator import PdfRenderer, html_to_pdf
+
+    if faculty_id is None:
+        faculty_id = db.session.execute(
+            select(Faculty.id).outerjoin(Timetable, Timetable.faculty_id == Faculty.id)
+            .where(Faculty.is_active == True)
+            .group_by(Faculty.id).order_by(func.count(Timetable.id).desc(), Faculty.id).limit(1)
+        ).scalar()
+    faculty = db.session.get(Faculty, faculty_id) if faculty_id else None
+    if faculty is None:
+        raise ValueError("No faculty to render reports for")
+
+    cache_size = current_app.config.get("PDF_CACHE_MAX_FILES", 1000)
+    current_app.config["PDF_CACHE_MAX_FILES"] = 0
+    try:
+        t0 = time.perf_counter()
+        PdfRenderer.start()
+        startup_ms = (time.perf_counter() - t0) * 1000
+
+        results = []
+        for kind, template_name in TEMPLATES.items():
+            _, context = PdfReports.contexts(kind, [faculty])[0]
+
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as cold:
+                html = render_template(template_name, **context)
+                t0 = time.perf_counter()
+                cold.submit(html_to_pdf, html).result()
+                cold_ms = (time.perf_counter() - t0) * 1000
+
+            timings = []
+            for _ in range(documents):
+                t0 = time.perf_counter()
+                PdfRenderer.render(template_name, context)
+                timings.append((time.perf_counter() - t0) * 1000)
+
+            t0 = time.perf_counter()
+            for _ in PdfRenderer.render_many([(i, template_name, context, None) for i in range(documents)]):
+                pass
+            batch_ms = (time.perf_counter() - t0) * 1000 / documents
+
+            results.append((kind, cold_ms, statistics.median(timings), batch_ms))
+        return startup_ms, results
+    finally:
+        current_app.config["PDF_CACHE_MAX_FILES"] = cache_size
@@ -0,0 +1,180 @@
+"""
+EXPLAIN checks for the hot queries issued by the routes and services.
+
+The statements come from the same builders the services run (TimetableQuery,
+GridBuilder, FacultyDirectory, LeaveQueue, ...), so a change to a query is
+checked as it ships; only the few queries still written in a route are
+copied here. `check()` asks the database for each plan and reports any query
+that would read a whole table instead of an index. Run it with
+`flask explain-hot-queries` after schema changes.
+"""
+from collections import namedtuple
+from datetime import date, datetime, time
+import re
+
+from sqlalchemy import select, text
+
+from models import db, FacultyLeave, FacultyAttendance, Faculty
+from services.analytics_service import AnalyticsService
+from services.attendance_service import AttendanceService
+from services.attendance_stats import AttendanceStatsService
+from services.faculty_directory import FacultyDirectory
+from services.grid_builder import GridBuilder
+from services.leave_index import LeaveIndex
+from services.leave_queue import LeaveQueue
+from services.timetable_queries import TimetableQuery
+
+PlanResult = namedtuple("PlanResult", "name full_scans plan")
+
+
+def hot_queries():
+    """(name, statement) for every hot query. Ids, dates and cursors are placeholders."""
+    d = date(2026, 1, 5)
+    faculty = Faculty(id=1, name="M", weekly_hours=12.0)
+    leave = FacultyLeave(id=1, status="Pending", applied_at=datetime(2026, 1, 5))
+    pending, decided = LeaveQueue.sections()
+    return [
+        ("timetable by faculty (grids, dashboard, exports)", GridBuilder.statement(faculty_id=1)),
+        ("timetable by class (grid builder)", GridBuilder.statement(academic_class_ids=[1, 2])),
+        ("timetable by room (classroom viewer)", GridBuilder.statement(classroom_id=1)),
+        ("timetable by day, ordered by start (daily monitor)", TimetableQuery.day_statement("Monday")),
+        ("active classes of a department (class paging)", GridBuilder.class_query(department_id=1).statement),
+        ("approved leaves (leave index)", LeaveIndex.statement()),
+        ("approved leave overlapping a range (attendance grid)",
+         AttendanceService.leave_days_statement([1, 2, 3], d, d)),
+        ("leave queue, pending first page", pending.limit(51)),
+        ("leave queue, pending next page", LeaveQueue.sections(after=LeaveQueue.cursor(leave))[0].limit(51)),
+        ("leave queue, decided", decided.limit(51)),
+        ("leave queue, one status", LeaveQueue.sections(status="Approved")[0].limit(51)),
+        ("leave count by status (analytics)", AnalyticsService.leave_status_statement()),
+        ("attendance stats of a faculty", AttendanceStatsService.statement([1])),
+        ("attendance stats over a range", AttendanceStatsService.statement([1, 2, 3], d, d)),
+        ("attendance for a department sheet", AttendanceService.existing_statement([1, 2, 3], d, d)),
+        ("faculty list, first page", FacultyDirectory.statement(page_size=50)),
+        ("faculty list page by name (keyset)",
+         FacultyDirectory.statement(after=FacultyDirectory.cursor(faculty), page_size=50)),
+        ("faculty list page by workload (keyset)",
+         FacultyDirectory.statement(sort="workload_desc", page_size=50,
+                                    after=FacultyDirectory.cursor(faculty, "workload_desc"))),
+        # Written inline in routes
+        ("faculty's leaves, newest first (faculty leaves page)",
+         select(FacultyLeave.id).where(FacultyLeave.faculty_id == 1).order_by(FacultyLeave.applied_at.desc())),
+        ("attendance on a date (HR attendance sheet)",
+         select(FacultyAttendance.id).where(
+             FacultyAttendance.date == d, FacultyAttendance.faculty_id.in_([1, 2, 3]))),
+        ("faculty by department (HR attendance sheet)",
+         select(Faculty.id).where(Faculty.department_id == 1)),
+    ]
+
+
+def explain(statement):
+    """Return (plan lines, [tables read with a full scan]) for the current database."""
+    bind = db.session.get_bind()
+    dialect = bind.dialect.name
+    sql = str(statement.compile(dialect=bind.dialect, compile_kwargs={"literal_binds": True}))
+
+    if dialect == "sqlite":
+        rows = db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+        lines = [r[-1] for r in rows]
+        # "SCAN t" reads the table; "SCAN t USING [COVERING] INDEX ix" walks an index
+        scans = [m.group(1) for l in lines if (m := re.match(r"SCAN (\w+)$", l.strip()))]
+        return lines, scans
+
+    if dialect == "postgresql":
+        # Tiny tables make a seq scan the cheapest plan; ask whether an index *can* be used
+        db.session.execute(text("SET LOCAL enable_seqscan = off"))
+        lines = [r[0] for r in db.session.execute(text(f"EXPLAIN {sql}")).all()]
+        scans = [m.group(1) for l in lines if (m := re.search(r"Seq Scan on (\w+)", l))]
+        return lines, scans
+
+    if dialect in ("mysql", "mariadb"):
+        result = db.session.execute(text(f"EXPLAIN {sql}"))
+        keys = list(result.keys())
+        rows = [dict(zip(keys, r)) for r in result.all()]
+        lines = [f"{r.get('table')}: type={r.get('type')} key={r.get('key')}" for r in rows]
+        scans = [r.get("table") for r in rows if r.get("type") == "ALL"]
+        return lines, scans
+
+    raise ValueError(f"EXPLAIN check not supported for {dialect}")
+
+
+def check():
+    """Run every hot query through EXPLAIN. Returns [PlanResult]."""
+    results = []
+    try:
+        for name, statement in hot_queries():
+            plan, scans = explain(statement)
+            results.append(PlanResult(name, scans, plan))
+    finally:
+        db.session.rollback()
+    return results
+
+
+GRID_TABS = ("manage", "classroom", "daily")
+
+
+def grid_query_counts(sizes=(5, 25)):
+    """
+    {tab: [queries per render, one per size]} for the schedule editor's manage,
+    classroom and daily tabs. Each size gets a scratch in-memory database with
+    that many classes (a faculty and a room each, one slot every weekday); a
+    tab whose count grows with the size loads something per class or slot.
+    """
+    from sqlalchemy import event
+    from app import create_app
+    from models import Department, Subject, AcademicClass, Classroom, Timetable
+    from services.scheduler_service import DAYS
+
+    monday = date(2026, 1, 5)
+    counts = {tab: [] for tab in GRID_TABS}
+    for size in sizes:
+        app = create_app("testing", {"SQLALCHEMY_DATABASE_URI": "sqlite://", "LEAVE_INDEX_TTL": 3600})
+        with app.app_context():
+            db.create_all()
+            department = Department(name="Scratch")
+            subject = Subject(subject_code="SCR101", subject_name="Scratch")
+            db.session.add_all([department, subject])
+            db.session.flush()
+            for i in range(size):
+                faculty = Faculty(name=f"Faculty {i}", email=f"faculty{i}@example.com", phone="0000000000",
+                                  department_id=department.id, designation="Professor", qualification="PhD")
+                academic_class = AcademicClass(name=f"Class {i}", year=1, department_id=department.id)
+                room = Classroom(room_code=f"R{i}", room_type="Lecture", capacity=60)
+                db.session.add_all([faculty, academic_class, room])
+                db.session.flush()
+                db.session.add_all([
+                    Timetable(day=day, start_time=time(9), end_time=time(10), faculty_id=faculty.id,
+                              subject_id=subject.id, academic_class_id=academic_class.id, classroom_id=room.id)
+                    for day in DAYS
+                ])
+            db.session.commit()
+
+            client = app.test_client()
+            with client.session_transaction() as session:
+                session["admin_id"] = 0
+            requests = {
+                "manage": lambda: client.get("/admin/schedule?tab=manage"),
+                "classroom": lambda: client.post("/admin/schedule?tab=classroom", data={"classroom_id": room.id}),
+                "daily": lambda: client.post("/admin/schedule?tab=daily", data={"date": monday.isoformat()}),
+            }
+            statements = []
+
+            def count(conn, cursor, statement, parameters, context, executemany):
+                statements.append(statement)
+
+            try:
+                for tab, render in requests.items():
+                    render()  # warm-up: the shared leave index is loaded once per process
+                    event.listen(db.engine, "before_cursor_execute", count)
+                    try:
+                        statements.clear()
+                        response = render()
+                    finally:
+                        event.remove(db.engine, "before_cursor_execute", count)
+                    if response.status_code != 200:
+                        raise ValueError(f"The {tab} tab answered {response.status_code}")
+                    counts[tab].append(len(statements))
+            finally:
+                LeaveIndex.discard()
+                db.session.remove()
+    return counts
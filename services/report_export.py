@@ -0,0 +1,233 @@
+"""
+Streaming spreadsheet exports.
+
+A report is a list of Sheets whose rows are generators over a server-side
+cursor (yield_per), so memory stays flat however many rows there are: CSV is
+written to the response as it is produced; XLSX goes through an openpyxl
+write-only workbook spooled to a temporary file, then streamed in chunks.
+
+The multi-sheet institutional workbook is too slow for a request; it runs as
+a services.jobs background job writing to disk. Its sheets are filled one
+after another: each query streams while its sheet is written, and an openpyxl
+workbook can't be shared between threads.
+"""
+from collections import namedtuple
+import csv
+import io
+import tempfile
+import zipfile
+
+from sqlalchemy import select, case
+from sqlalchemy.orm import aliased
+
+from models import (db, Faculty, Department, Timetable, Subject, AcademicClass, Classroom,
+                    FacultyAttendance, FacultyLeave, AcademicCalendar)
+from services.workload_service import WorkloadService
+from services.dashboard_cache import DAYS_ORDER
+
+CHUNK_ROWS = 1000
+CHUNK_BYTES = 64 * 1024
+
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# rows: an iterable of tuples in `headers` order, consumed once
+Sheet = namedtuple("Sheet", "title headers rows")
+
+
+class ReportExport:
+
+    @staticmethod
+    def stream(statement, chunk_size=CHUNK_ROWS):
+        """Rows of `statement` fetched `chunk_size` at a time (server-side cursor where supported)."""
+        result = db.session.execute(statement.execution_options(yield_per=chunk_size))
+        for partition in result.partitions():
+            yield from partition
+
+    @staticmethod
+    def faculty_sheet():
+        """Active faculty with department, workload and workload status (one query)."""
+        statement = (
+            select(Faculty.id, Faculty.name, Faculty.email, Department.name, Faculty.designation,
+                   Faculty.experience_years, Faculty.weekly_hours)
+            .outerjoin(Department, Department.id == Faculty.department_id)
+            .where(Faculty.is_active == True)
+            .order_by(Faculty.id)
+        )
+
+        def rows():
+            for faculty_id, name, email, department, designation, experience, hours in ReportExport.stream(statement):
+                workload = WorkloadService.normalize(hours)
+                yield (faculty_id, name, email, department or "N/A", designation, experience,
+                       workload, WorkloadService.status(workload))
+
+        return Sheet(
+            "Faculty Report",
+            ["ID", "Name", "Email", "Department", "Designation", "Experience", "Workload (Hrs)", "Status"],
+            rows()
+        )
+
+    @staticmethod
+    def timetable_sheet():
+        ClassDepartment = aliased(Department)
+        statement = (
+            select(Timetable.day, Timetable.start_time, Timetable.end_time, Faculty.name, Subject.subject_code,
+                   Subject.subject_name, AcademicClass.name, ClassDepartment.name, Classroom.room_code)
+            .join(Faculty, Faculty.id == Timetable.faculty_id)
+            .join(Subject, Subject.id == Timetable.subject_id)
+            .join(AcademicClass, AcademicClass.id == Timetable.academic_class_id)
+            .outerjoin(ClassDepartment, ClassDepartment.id == AcademicClass.department_id)
+            .outerjoin(Classroom, Classroom.id == Timetable.classroom_id)
+            .order_by(case({d: i for i, d in enumerate(DAYS_ORDER)}, value=Timetable.day, else_=len(DAYS_ORDER)),
+                      Timetable.start_time, AcademicClass.name)
+        )
+        rows = (
+            (day, start.strftime("%H:%M"), end.strftime("%H:%M"), faculty, code, subject, cls, dept, room)
+            for day, start, end, faculty, code, subject, cls, dept, room in ReportExport.stream(statement)
+        )
+        return Sheet("Timetable", ["Day", "Start", "End", "Faculty", "Subject Code", "Subject", "Class",
+                                   "Department", "Room"], rows)
+
+    @staticmethod
+    def attendance_sheet(start, end):
+        statement = (
+            select(FacultyAttendance.date, Faculty.id, Faculty.name, Department.name, FacultyAttendance.status,
+                   FacultyAttendance.marked_at)
+            .join(Faculty, Faculty.id == FacultyAttendance.faculty_id)
+            .outerjoin(Department, Department.id == Faculty.department_id)
+            .where(FacultyAttendance.date >= start, FacultyAttendance.date <= end)
+            .order_by(FacultyAttendance.date, Faculty.name)
+        )
+        return Sheet(f"Attendance {start:%d.%m.%y}-{end:%d.%m.%y}",
+                     ["Date", "Faculty ID", "Faculty", "Department", "Status", "Marked At"],
+                     ReportExport.stream(statement))
+
+    @staticmethod
+    def leave_sheet():
+        statement = (
+            select(FacultyLeave.id, Faculty.name, Department.name, FacultyLeave.start_date, FacultyLeave.end_date,
+                   FacultyLeave.reason, FacultyLeave.status, FacultyLeave.applied_at)
+            .join(Faculty, Faculty.id == FacultyLeave.faculty_id)
+            .outerjoin(Department, Department.id == Faculty.department_id)
+            .order_by(FacultyLeave.applied_at.desc())
+        )
+        return Sheet("Leaves", ["ID", "Faculty", "Department", "From", "To", "Reason", "Status", "Applied At"],
+                     ReportExport.stream(statement))
+
+    @staticmethod
+    def calendar_sheet():
+        statement = select(
+            AcademicCalendar.date, AcademicCalendar.description, AcademicCalendar.type,
+            AcademicCalendar.is_holiday, AcademicCalendar.is_exam
+        ).order_by(AcademicCalendar.date)
+        rows = (
+            (day, description, kind, "Yes" if holiday else "No", "Yes" if exam else "No")
+            for day, description, kind, holiday, exam in ReportExport.stream(statement)
+        )
+        return Sheet("Calendar", ["Date", "Description", "Type", "Holiday", "Exam"], rows)
+
+    @staticmethod
+    def institution_sheets(start, end):
+        """Faculty, timetable, attendance in [start, end], leaves and calendar: one query each."""
+        return [
+            ReportExport.faculty_sheet(),
+            ReportExport.timetable_sheet(),
+            ReportExport.attendance_sheet(start, end),
+            ReportExport.leave_sheet(),
+            ReportExport.calendar_sheet(),
+        ]
+
+
+def write_institution_workbook(path, start, end):
+    """Background job body: the institutional workbook written to `path`."""
+    with open(path, "wb") as f:
+        write_xlsx(ReportExport.institution_sheets(start, end), f)
+
+
+def stream_csv(sheet, chunk_rows=CHUNK_ROWS):
+    """Yield the sheet as CSV text, `chunk_rows` rows per chunk."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(sheet.headers)
+    for n, row in enumerate(sheet.rows, start=1):
+        writer.writerow(row)
+        if n % chunk_rows == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def write_xlsx(sheets, fileobj):
+    """Write the sheets into an openpyxl write-only workbook saved to `fileobj`."""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    for sheet in sheets:
+        ws = wb.create_sheet(title=sheet.title[:31])  # Excel's sheet name limit
+        ws.append(sheet.headers)
+        for row in sheet.rows:
+            ws.append(tuple(row))  # openpyxl rejects SQLAlchemy Row objects
+    wb.save(fileobj)
+
+
+def stream_xlsx(sheets):
+    """
+    Return a generator of XLSX bytes. Raises ImportError up front if openpyxl is
+    missing; the workbook itself is written when the generator is first read.
+    """
+    import openpyxl  # noqa: F401  (fail before the response starts)
+
+    def chunks():
+        with tempfile.TemporaryFile() as f:
+            write_xlsx(sheets, f)
+            f.seek(0)
+            while True:
+                data = f.read(CHUNK_BYTES)
+                if not data:
+                    break
+                yield data
+
+    return chunks()
+
+
+class _ZipSink(io.RawIOBase):
+    """Write-only, unseekable target for zipfile that hands out what was written so far."""
+
+    def __init__(self):
+        self._data = bytearray()
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._data += b
+        self._position += len(b)
+        return len(b)
+
+    def tell(self):
+        return self._position
+
+    def take(self):
+        data = bytes(self._data)
+        self._data.clear()
+        return data
+
+
+def stream_zip(files):
+    """
+    Yield a ZIP archive of (name, bytes) pairs as they arrive. Entries whose
+    bytes are None (failed to render) are listed in ERRORS.txt instead.
+    """
+    sink = _ZipSink()
+    failed = []
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, data in files:
+            if data is None:
+                failed.append(name)
+                continue
+            archive.writestr(name, data)
+            yield sink.take()
+        if failed:
+            archive.writestr("ERRORS.txt", "These documents could not be rendered:\n" + "\n".join(failed) + "\n")
+    yield sink.take()
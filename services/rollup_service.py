@@ -0,0 +1,295 @@
+"""
+Time-bucketed rollups for the attendance and leave trend charts.
+
+attendance_rollup holds status counts and leave_rollup approved leave days
+(weekdays) per department, each for day, week (starting Monday) and month
+buckets, so a multi-year trend reads a few hundred pre-aggregated rows.
+
+A faculty's history counts under their current department, as rebuild()
+computes it; moving a faculty to another department moves their counts too.
+
+Both are kept current inside the writing transaction: mapper events for ORM
+writes (marking attendance, approving or cancelling leave, moving a faculty),
+and RollupService.apply_attendance() / apply_leave() for the bulk attendance
+upserts and bulk leave decisions, which bypass the mapper. The migration
+fills them from existing history; `flask rebuild-rollups` recomputes
+everything from the raw tables if a write went around both.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from sqlalchemy import select, func, event, insert, update, delete, bindparam, inspect, tuple_
+
+from models import db, Faculty, FacultyAttendance, FacultyLeave, AttendanceRollup, LeaveRollup
+
+PERIODS = ("day", "week", "month")
+
+
+def bucket(period, day):
+    """First date of the `period` bucket containing `day`."""
+    if period == "day":
+        return day
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def leave_weekdays(start, end):
+    day = start
+    while day <= end:
+        if day.weekday() < 5:
+            yield day
+        day += timedelta(days=1)
+
+
+class RollupService:
+
+    @staticmethod
+    def attendance_trend(period="month", start=None, end=None, department_id=None):
+        """{bucket_start: {status: count}} in date order, for one or all departments."""
+        query = select(AttendanceRollup.bucket_start, AttendanceRollup.status, func.sum(AttendanceRollup.count)) \
+            .where(AttendanceRollup.period == period)
+        query = _filter(query, AttendanceRollup, start, end, department_id)
+        trend = {}
+        for bucket_start, status, count in db.session.execute(
+            query.group_by(AttendanceRollup.bucket_start, AttendanceRollup.status).order_by(AttendanceRollup.bucket_start)
+        ).all():
+            if count:
+                trend.setdefault(bucket_start, {})[status] = count
+        return trend
+
+    @staticmethod
+    def leave_trend(period="month", start=None, end=None, department_id=None):
+        """{bucket_start: approved leave days} in date order, for one or all departments."""
+        query = select(LeaveRollup.bucket_start, func.sum(LeaveRollup.days)).where(LeaveRollup.period == period)
+        query = _filter(query, LeaveRollup, start, end, department_id)
+        return {
+            bucket_start: days for bucket_start, days in db.session.execute(
+                query.group_by(LeaveRollup.bucket_start).order_by(LeaveRollup.bucket_start)
+            ).all() if days
+        }
+
+    @staticmethod
+    def apply_attendance(changes, departments, connection=None):
+        """
+        Adjust the attendance rollups for rows written in bulk. `changes` are
+        (faculty_id, day, old_status or None, new_status); `departments` maps
+        faculty_id -> department_id. Call inside the writing transaction.
+        """
+        deltas = defaultdict(int)
+        for faculty_id, day, old, new in changes:
+            if old == new:
+                continue
+            department_id = departments[faculty_id]
+            if old is not None:
+                _count_attendance(deltas, department_id, day, old, -1)
+            if new is not None:
+                _count_attendance(deltas, department_id, day, new, 1)
+        _add(connection or db.session, AttendanceRollup, "count", deltas)
+
+    @staticmethod
+    def apply_leave(changes, departments, connection=None):
+        """
+        Adjust the leave rollups for leaves updated in bulk. `changes` are
+        (faculty_id, start_date, end_date, old_status, new_status); `departments`
+        maps faculty_id -> department_id. Call inside the writing transaction.
+        """
+        deltas = defaultdict(int)
+        for faculty_id, start, end, old, new in changes:
+            if old == new:
+                continue
+            if old == "Approved":
+                _count_leave(deltas, departments[faculty_id], start, end, -1)
+            if new == "Approved":
+                _count_leave(deltas, departments[faculty_id], start, end, 1)
+        _add(connection or db.session, LeaveRollup, "days", deltas)
+
+    @staticmethod
+    def rebuild():
+        """Recompute both rollups from faculty_attendance and faculty_leave. Commits."""
+        attendance = defaultdict(int)
+        rows = db.session.execute(
+            select(Faculty.department_id, FacultyAttendance.date, FacultyAttendance.status, func.count())
+            .join(Faculty, Faculty.id == FacultyAttendance.faculty_id)
+            .group_by(Faculty.department_id, FacultyAttendance.date, FacultyAttendance.status)
+        ).all()
+        for department_id, day, status, count in rows:
+            _count_attendance(attendance, department_id, day, status, count)
+
+        leave = defaultdict(int)
+        rows = db.session.execute(
+            select(Faculty.department_id, FacultyLeave.start_date, FacultyLeave.end_date)
+            .join(Faculty, Faculty.id == FacultyLeave.faculty_id)
+            .where(FacultyLeave.status == "Approved")
+        ).all()
+        for department_id, start, end in rows:
+            _count_leave(leave, department_id, start, end, 1)
+
+        db.session.execute(delete(AttendanceRollup))
+        db.session.execute(delete(LeaveRollup))
+        _add(db.session, AttendanceRollup, "count", attendance)
+        _add(db.session, LeaveRollup, "days", leave)
+        db.session.commit()
+        return len(attendance), len(leave)
+
+
+def _filter(query, model, start, end, department_id):
+    if start:
+        query = query.where(model.bucket_start >= start)
+    if end:
+        query = query.where(model.bucket_start <= end)
+    if department_id:
+        query = query.where(model.department_id == department_id)
+    return query
+
+
+def _count_attendance(deltas, department_id, day, status, n):
+    for period in PERIODS:
+        deltas[(period, bucket(period, day), department_id, status)] += n
+
+
+def _count_leave(deltas, department_id, start, end, n):
+    for day in leave_weekdays(start, end):
+        for period in PERIODS:
+            deltas[(period, bucket(period, day), department_id)] += n
+
+
+def _add(connection, model, value, deltas):
+    """UPSERT value = value + delta for each bucket key, per dialect."""
+    table = model.__table__
+    keys = ["period", "bucket_start", "department_id"] + (["status"] if model is AttendanceRollup else [])
+    rows = [dict(zip(keys, key), **{value: delta}) for key, delta in deltas.items() if delta]
+    if not rows:
+        return
+
+    # `connection` is the session (bulk paths) or the flush's Connection (mapper events)
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=keys, set_={value: table.c[value] + stmt.excluded[value]}
+        )
+        connection.execute(stmt, rows)
+        return
+
+    if dialect in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert as dialect_insert
+        stmt = dialect_insert(table)
+        stmt = stmt.on_duplicate_key_update({value: table.c[value] + stmt.inserted[value]})
+        connection.execute(stmt, rows)
+        return
+
+    # No native upsert: split on the buckets that already exist (one query)
+    key_cols = [table.c[k] for k in keys]
+    existing = set(connection.execute(
+        select(*key_cols).where(tuple_(*key_cols).in_([tuple(r[k] for k in keys) for r in rows]))
+    ).tuples())
+    new = [r for r in rows if tuple(r[k] for k in keys) not in existing]
+    changed = [r for r in rows if tuple(r[k] for k in keys) in existing]
+    if new:
+        connection.execute(insert(table), new)
+    if changed:
+        connection.execute(
+            update(table)
+            .where(*[table.c[k] == bindparam(f"b_{k}") for k in keys])
+            .values({value: table.c[value] + bindparam("delta")}),
+            [{**{f"b_{k}": r[k] for k in keys}, "delta": r[value]} for r in changed]
+        )
+
+
+def _department(connection, faculty_id):
+    return connection.execute(select(Faculty.department_id).where(Faculty.id == faculty_id)).scalar()
+
+
+def _previous(target, attr):
+    history = inspect(target).attrs[attr].history
+    return history.deleted[0] if history.deleted else getattr(target, attr)
+
+
+# ORM writes: adjust the rollups in the flush's transaction
+@event.listens_for(FacultyAttendance, "after_insert")
+def _attendance_inserted(mapper, connection, target):
+    deltas = defaultdict(int)
+    _count_attendance(deltas, _department(connection, target.faculty_id), target.date, target.status, 1)
+    _add(connection, AttendanceRollup, "count", deltas)
+
+
+@event.listens_for(FacultyAttendance, "after_update")
+def _attendance_updated(mapper, connection, target):
+    old = (_previous(target, "faculty_id"), _previous(target, "date"), _previous(target, "status"))
+    new = (target.faculty_id, target.date, target.status)
+    if old == new:
+        return
+    deltas = defaultdict(int)
+    _count_attendance(deltas, _department(connection, old[0]), old[1], old[2], -1)
+    _count_attendance(deltas, _department(connection, new[0]), new[1], new[2], 1)
+    _add(connection, AttendanceRollup, "count", deltas)
+
+
+@event.listens_for(FacultyAttendance, "after_delete")
+def _attendance_deleted(mapper, connection, target):
+    faculty_id = _previous(target, "faculty_id")
+    deltas = defaultdict(int)
+    _count_attendance(deltas, _department(connection, faculty_id),
+                      _previous(target, "date"), _previous(target, "status"), -1)
+    _add(connection, AttendanceRollup, "count", deltas)
+
+
+def _leave_deltas(connection, deltas, faculty_id, start, end, status, n):
+    if status == "Approved":
+        _count_leave(deltas, _department(connection, faculty_id), start, end, n)
+
+
+@event.listens_for(FacultyLeave, "after_insert")
+def _leave_inserted(mapper, connection, target):
+    deltas = defaultdict(int)
+    _leave_deltas(connection, deltas, target.faculty_id, target.start_date, target.end_date, target.status, 1)
+    _add(connection, LeaveRollup, "days", deltas)
+
+
+@event.listens_for(FacultyLeave, "after_update")
+def _leave_updated(mapper, connection, target):
+    attrs = ("faculty_id", "start_date", "end_date", "status")
+    old = tuple(_previous(target, a) for a in attrs)
+    new = tuple(getattr(target, a) for a in attrs)
+    if old == new or "Approved" not in (old[3], new[3]):
+        return
+    deltas = defaultdict(int)
+    _leave_deltas(connection, deltas, *old, -1)
+    _leave_deltas(connection, deltas, *new, 1)
+    _add(connection, LeaveRollup, "days", deltas)
+
+
+@event.listens_for(Faculty, "after_update")
+def _faculty_moved(mapper, connection, target):
+    old, new = _previous(target, "department_id"), target.department_id
+    if old == new:
+        return
+    attendance = defaultdict(int)
+    for day, status, count in connection.execute(
+        select(FacultyAttendance.date, FacultyAttendance.status, func.count())
+        .where(FacultyAttendance.faculty_id == target.id)
+        .group_by(FacultyAttendance.date, FacultyAttendance.status)
+    ):
+        _count_attendance(attendance, old, day, status, -count)
+        _count_attendance(attendance, new, day, status, count)
+    leave = defaultdict(int)
+    for start, end in connection.execute(
+        select(FacultyLeave.start_date, FacultyLeave.end_date)
+        .where(FacultyLeave.faculty_id == target.id, FacultyLeave.status == "Approved")
+    ):
+        _count_leave(leave, old, start, end, -1)
+        _count_leave(leave, new, start, end, 1)
+    _add(connection, AttendanceRollup, "count", attendance)
+    _add(connection, LeaveRollup, "days", leave)
+
+
+@event.listens_for(FacultyLeave, "after_delete")
+def _leave_deleted(mapper, connection, target):
+    deltas = defaultdict(int)
+    _leave_deltas(connection, deltas, *(_previous(target, a) for a in ("faculty_id", "start_date", "end_date", "status")), -1)
+    _add(connection, LeaveRollup, "days", deltas)
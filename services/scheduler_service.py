@@ -1,72 +1,265 @@
-from models import db, Timetable, FacultyLeave, Classroom, Faculty
+from models import db, Timetable, Classroom, Faculty, AcademicClass
+from sqlalchemy import or_
 from datetime import datetime, date, time, timedelta
+from collections import namedtuple
+from flask import g
+from services.workload_service import WorkloadService, slot_hours
+from services.leave_index import LeaveIndex
+
+# Weekly teaching grid (matches TimetableForm choices)
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+TIMES = [
+    time(9, 0), time(10, 0), time(11, 0), time(12, 0),
+    time(14, 0), time(15, 0)
+]
+
+# Lightweight copy of a booked slot, enough to build conflict messages without lazy loads
+OccupiedSlot = namedtuple(
+    "OccupiedSlot",
+    "id day start_time end_time faculty_id academic_class_id classroom_id faculty_name class_name room_code"
+)
+
+
+class OccupancyIndex:
+    """
+    In-memory occupancy of the weekly timetable.
+
+    Every (day, start_time) pair gets a bit position; faculty, classes and rooms
+    each keep an int bitmask of the slots they occupy. A clash check is then a
+    single AND per entity with no SQL. Build it once per request/batch. A batch
+    writer keeps it current by recording each row it accepts with insert() and
+    taking back rows that didn't get saved with remove(), as the timetable
+    importer does; the single-slot admin routes build a fresh one per request.
+    """
+
+    def __init__(self):
+        self._bits = {}
+        for d in DAYS:
+            for t in TIMES:
+                self._bits[(d, t)] = len(self._bits)
+
+        # Masks over the standard grid: all teaching cells, and one per day
+        self.grid_mask = (1 << len(self._bits)) - 1
+        self.day_masks = {
+            d: ((1 << len(TIMES)) - 1) << (i * len(TIMES))
+            for i, d in enumerate(DAYS)
+        }
+
+        self.faculty = {}
+        self.classes = {}
+        self.rooms = {}
+        self.hours = {}
+
+        # (entity_id, bit) -> OccupiedSlot
+        self._faculty_slots = {}
+        self._class_slots = {}
+        self._room_slots = {}
+
+    @classmethod
+    def build(cls, *criteria):
+        """Load the index from the timetable in a single query (optionally filtered)."""
+        index = cls()
+        rows = (
+            db.session.query(
+                Timetable.id,
+                Timetable.day,
+                Timetable.start_time,
+                Timetable.end_time,
+                Timetable.faculty_id,
+                Timetable.academic_class_id,
+                Timetable.classroom_id,
+                Faculty.name,
+                AcademicClass.name,
+                Classroom.room_code,
+            )
+            .join(Faculty, Timetable.faculty_id == Faculty.id)
+            .join(AcademicClass, Timetable.academic_class_id == AcademicClass.id)
+            .outerjoin(Classroom, Timetable.classroom_id == Classroom.id)
+            .filter(*criteria)
+            .all()
+        )
+        for row in rows:
+            index.insert(OccupiedSlot(*row))
+        return index
+
+    @classmethod
+    def for_entities(cls, faculty_id=None, academic_class_id=None, classroom_id=None):
+        """Load only the slots touching the given faculty, class or room (one query)."""
+        criteria = []
+        if faculty_id is not None:
+            criteria.append(Timetable.faculty_id == faculty_id)
+        if academic_class_id is not None:
+            criteria.append(Timetable.academic_class_id == academic_class_id)
+        if classroom_id is not None:
+            criteria.append(Timetable.classroom_id == classroom_id)
+        if not criteria:
+            return cls()
+        return cls.build(or_(*criteria))
+
+    @classmethod
+    def for_request(cls):
+        """Return the index for the current request, building it on first use."""
+        if "occupancy_index" not in g:
+            g.occupancy_index = cls.build()
+        return g.occupancy_index
+
+    @staticmethod
+    def cached():
+        """Return the current request's index if one was built, else None."""
+        return g.get("occupancy_index")
+
+    @staticmethod
+    def discard_request_index():
+        """Drop the cached request index (e.g. after a rollback)."""
+        g.pop("occupancy_index", None)
+
+    def bit(self, day, start_time):
+        key = (day, start_time)
+        if key not in self._bits:
+            # Off-grid slot: give it its own bit so it is still tracked
+            self._bits[key] = len(self._bits)
+        return self._bits[key]
+
+    def insert(self, info):
+        """Record an OccupiedSlot (a booked or about-to-be-booked cell)."""
+        b = self.bit(info.day, info.start_time)
+        mask = 1 << b
+
+        self.faculty[info.faculty_id] = self.faculty.get(info.faculty_id, 0) | mask
+        self._faculty_slots[(info.faculty_id, b)] = info
+        self.hours[info.faculty_id] = self.hours.get(info.faculty_id, 0) + slot_hours(info.start_time, info.end_time)
+
+        self.classes[info.academic_class_id] = self.classes.get(info.academic_class_id, 0) | mask
+        self._class_slots[(info.academic_class_id, b)] = info
+
+        if info.classroom_id is not None:
+            self.rooms[info.classroom_id] = self.rooms.get(info.classroom_id, 0) | mask
+            self._room_slots[(info.classroom_id, b)] = info
+
+    def remove(self, slot):
+        """
+        Forget a slot recorded with insert() (anything with day, start_time and the
+        faculty / class / classroom ids). Cells held by another slot are left alone.
+        """
+        b = self.bit(slot.day, slot.start_time)
+        mask = ~(1 << b)
+        same = lambda info: info is not None and (info.faculty_id, info.academic_class_id, info.classroom_id) == (
+            slot.faculty_id, slot.academic_class_id, slot.classroom_id)
+
+        if same(info := self._faculty_slots.get((slot.faculty_id, b))):
+            del self._faculty_slots[(slot.faculty_id, b)]
+            self.faculty[slot.faculty_id] &= mask
+            self.hours[slot.faculty_id] = max(self.hours.get(slot.faculty_id, 0) - slot_hours(info.start_time, info.end_time), 0)
+
+        if same(self._class_slots.get((slot.academic_class_id, b))):
+            del self._class_slots[(slot.academic_class_id, b)]
+            self.classes[slot.academic_class_id] &= mask
+
+        if slot.classroom_id is not None and same(self._room_slots.get((slot.classroom_id, b))):
+            del self._room_slots[(slot.classroom_id, b)]
+            self.rooms[slot.classroom_id] &= mask
+
+    def faculty_clash(self, day, start_time, faculty_id):
+        b = self.bit(day, start_time)
+        if self.faculty.get(faculty_id, 0) >> b & 1:
+            return self._faculty_slots[(faculty_id, b)]
+        return None
+
+    def class_clash(self, day, start_time, academic_class_id):
+        b = self.bit(day, start_time)
+        if self.classes.get(academic_class_id, 0) >> b & 1:
+            return self._class_slots[(academic_class_id, b)]
+        return None
+
+    def room_clash(self, day, start_time, classroom_id):
+        b = self.bit(day, start_time)
+        if self.rooms.get(classroom_id, 0) >> b & 1:
+            return self._room_slots[(classroom_id, b)]
+        return None
+
+    def slots(self):
+        """All booked cells as OccupiedSlot tuples."""
+        return list(self._faculty_slots.values())
+
+    def workload(self, faculty_id):
+        """Booked teaching hours for a faculty (sum of slot durations)."""
+        return WorkloadService.normalize(self.hours.get(faculty_id, 0))
+
+    def free_slots(self, faculty_id, academic_class_id, classroom_id, limit=5):
+        """
+        Return up to `limit` (day, start_time) cells where faculty, class and room
+        are all free, best first.
+
+        Free cells are one mask: grid & ~(faculty | class | room). Ranking prefers
+        days on which the class and faculty are least loaded (spreads the week),
+        then the earliest time of day.
+        """
+        faculty_mask = self.faculty.get(faculty_id, 0)
+        class_mask = self.classes.get(academic_class_id, 0)
+        room_mask = self.rooms.get(classroom_id, 0)
+
+        free = self.grid_mask & ~(faculty_mask | class_mask | room_mask)
+        if not free:
+            return []
+
+        day_load = {
+            d: ((class_mask & m).bit_count(), (faculty_mask & m).bit_count())
+            for d, m in self.day_masks.items()
+            if free & m
+        }
+
+        candidates = []
+        for i, d in enumerate(DAYS):
+            if d not in day_load:
+                continue
+            for j, t in enumerate(TIMES):
+                if free >> (i * len(TIMES) + j) & 1:
+                    candidates.append((day_load[d], j, i, d, t))
+
+        candidates.sort()
+        return [(d, t) for *_, d, t in candidates[:limit]]
+
 
 class ConflictEngine:
     @staticmethod
-    def check_conflicts(day, start_time, end_time, faculty_id, academic_class_id, classroom_id, subject_id, semester=None):
+    def check_conflicts(day, start_time, end_time, faculty_id, academic_class_id, classroom_id, subject_id, semester=None, index=None):
         """
         Check for conflicts in:
         1. Faculty Schedule (Time collision)
         2. Academic Class Schedule (Time collision)
         3. Classroom Schedule (Time collision)
         4. Faculty Leave (Warning if on leave)
+
+        Clash checks 1-3 are answered from an OccupancyIndex; pass one in when
+        validating many slots, otherwise the per-request index is used.
         """
-        conflicts = []
+        if index is None:
+            index = OccupancyIndex.for_request()
 
-        # 1. Faculty Clash
-        faculty_clash = Timetable.query.filter(
-            Timetable.day == day,
-            Timetable.start_time == start_time,
-            Timetable.faculty_id == faculty_id
-        ).first()
-        if faculty_clash:
-            conflicts.append(f"Faculty is already booked in {faculty_clash.classroom.room_code} for {faculty_clash.academic_class.name}.")
+        conflicts = ConflictEngine.check_clashes(index, day, start_time, faculty_id, academic_class_id, classroom_id)
 
-        # 2. Academic Class Clash
-        class_clash = Timetable.query.filter(
-            Timetable.day == day,
-            Timetable.start_time == start_time,
-            Timetable.academic_class_id == academic_class_id
-        ).first()
-        if class_clash:
-            conflicts.append(f"Class {class_clash.academic_class.name} already has a class in {class_clash.classroom.room_code} with {class_clash.faculty.name}.")
-
-        # 3. Classroom Clash
-        room_clash = Timetable.query.filter(
-            Timetable.day == day,
-            Timetable.start_time == start_time,
-            Timetable.classroom_id == classroom_id
-        ).first()
-        if room_clash:
-             conflicts.append(f"Classroom {room_clash.classroom.room_code} is occupied by {room_clash.academic_class.name} ({room_clash.faculty.name}).")
-        
         # 4. Faculty Leave Awareness (Warning)
         # Since timetable is generic (Mon-Fri), we warn if there's an ACTIVE leave for this faculty TODAY or generally (future enhancement: check specifically for next occurrence of 'day')
         # For now, let's just check if there is ANY approved leave that overlaps with *current* week or future dates.
         # A simple heuristic: check if faculty has approved leave spanning > 7 days or is currently on leave.
-        
-        # Actually, let's just check if there is an approved leave active *today*. 
+
+        # Actually, let's just check if there is an approved leave active *today*.
         # But this is a planning tool. So maybe just warn "Faculty has pending/approved leaves: [Dates]"
-        today = date.today()
-        upcoming_leaves = FacultyLeave.query.filter(
-            FacultyLeave.faculty_id == faculty_id,
-            FacultyLeave.status == 'Approved',
-            FacultyLeave.end_date >= today
-        ).all()
-        
+        upcoming_leaves = LeaveIndex.get().overlapping(faculty_id, date.today())
+
         if upcoming_leaves:
             leave_strs = [f"{l.start_date} to {l.end_date} ({l.reason})" for l in upcoming_leaves]
             conflicts.append(f"WARNING: Faculty has approved leave(s): {', '.join(leave_strs)}")
 
         # 5. Faculty Workload Check
         # Check if adding this slot exceeds MAX_WORKLOAD_HOURS
-        # We assume 1 slot = 1 hour. Get current workload.
-        current_workload = ConflictEngine.get_faculty_workload(faculty_id)
-        
+        # Workload is the sum of slot durations. Get current workload.
+        current_workload = index.workload(faculty_id)
+
         # Import Config to get MAX_WORKLOAD_HOURS (avoid circular import if possible, or use current_app)
         from flask import current_app
         max_hours = current_app.config.get('MAX_WORKLOAD_HOURS', 18)
-        
+
         # If we are in an edit scenario, we might want to exclude the current slot being edited.
         # But here in 'check_conflicts', we usually check before adding a NEW slot.
         # If valid, workload becomes current + 1.
@@ -75,47 +268,60 @@ class ConflictEngine:
 
         return conflicts
 
+    @staticmethod
+    def check_clashes(index, day, start_time, faculty_id, academic_class_id, classroom_id):
+        """Faculty / class / classroom time collisions, answered from an OccupancyIndex."""
+        conflicts = []
+
+        # 1. Faculty Clash
+        faculty_clash = index.faculty_clash(day, start_time, faculty_id)
+        if faculty_clash:
+            conflicts.append(f"Faculty is already booked in {faculty_clash.room_code} for {faculty_clash.class_name}.")
+
+        # 2. Academic Class Clash
+        class_clash = index.class_clash(day, start_time, academic_class_id)
+        if class_clash:
+            conflicts.append(f"Class {class_clash.class_name} already has a class in {class_clash.room_code} with {class_clash.faculty_name}.")
+
+        # 3. Classroom Clash
+        room_clash = index.room_clash(day, start_time, classroom_id)
+        if room_clash:
+             conflicts.append(f"Classroom {room_clash.room_code} is occupied by {room_clash.class_name} ({room_clash.faculty_name}).")
+
+        return conflicts
+
     @staticmethod
     def get_faculty_workload(faculty_id):
         """
         Calculate total weekly teaching hours for a faculty.
-        Assumes 1 slot = 1 hour (since slots are 09:00-10:00 etc).
-        If slots have different durations, we should sum (end_time - start_time).
+        Sums (end_time - start_time) in SQL; see WorkloadService for all faculty at once.
         """
-        slots = Timetable.query.filter_by(faculty_id=faculty_id).all()
-        # Simple count for now
-        return len(slots)
+        return WorkloadService.hours_for(faculty_id)
 
     @staticmethod
-    def find_next_available_slot(faculty_id, academic_class_id, classroom_id, duration_hours=1):
+    def suggest_slots(faculty_id, academic_class_id, classroom_id, limit=5, index=None):
         """
-        Find the first available slot (Day, Time) for the given Faculty, Class, and Room.
-        Excludes occupied slots.
+        Suggest up to `limit` free (Day, "HH:MM") slots for the given Faculty, Class and Room.
+        Without an index, occupancy for the three entities is loaded in one query.
         """
-        DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
-        TIMES = [
-            time(9, 0), time(10, 0), time(11, 0), time(12, 0), 
-            time(14, 0), time(15, 0)
-        ] # Based on admin_routes.py
+        if index is None:
+            index = OccupancyIndex.cached() or OccupancyIndex.for_entities(
+                faculty_id, academic_class_id, classroom_id
+            )
+        return [
+            (d, t.strftime("%H:%M"))
+            for d, t in index.free_slots(faculty_id, academic_class_id, classroom_id, limit)
+        ]
 
-        for d in DAYS:
-            for t in TIMES:
-                # Check for conflicts manually for this slot
-                # (We can optimize this by querying all slots for these entities once, but loop is fine for small scale)
-                
-                # Check Faculty
-                if Timetable.query.filter_by(day=d, start_time=t, faculty_id=faculty_id).first():
-                    continue
-                
-                # Check Class
-                if Timetable.query.filter_by(day=d, start_time=t, academic_class_id=academic_class_id).first():
-                    continue
-
-                # Check Room
-                if Timetable.query.filter_by(day=d, start_time=t, classroom_id=classroom_id).first():
-                    continue
-                
-                # If we reach here, it's free!
-                return d, t.strftime("%H:%M")
-        
+    @staticmethod
+    def find_next_available_slot(faculty_id, academic_class_id, classroom_id, duration_hours=1, index=None):
+        """
+        Find the best available slot (Day, Time) for the given Faculty, Class, and Room.
+        Excludes occupied slots.
+        """
+        suggestions = ConflictEngine.suggest_slots(
+            faculty_id, academic_class_id, classroom_id, limit=1, index=index
+        )
+        if suggestions:
+            return suggestions[0]
         return None, None
@@ -0,0 +1,533 @@
+"""
+Automatic timetable generation.
+
+Each teaching hour ("lesson") is a node; two lessons conflict when they share a
+faculty or a class. The week grid (DAYS x TIMES) is the colour set, and a colour
+is only usable if a compatible classroom (type + capacity) is free in that cell.
+
+1. DSATUR: repeatedly place the lesson whose faculty/class already block the most
+   cells (ties: most lessons competing for the same faculty/class), in its best
+   free cell (spread a subject over different days, keep days balanced).
+2. Local-search repair: until the time budget runs out, put an unplaced lesson
+   in the cell that ejects the fewest other lessons (tabu on just-moved lessons),
+   keeping the best assignment seen.
+
+Existing timetable rows (via OccupancyIndex) and pinned lessons are never moved.
+"""
+import heapq
+import math
+import random
+import time as _time
+from collections import namedtuple, defaultdict
+from datetime import datetime, date, timedelta
+
+from sqlalchemy import insert
+
+from models import db, Timetable, Faculty, FacultySubject, Subject, AcademicClass, Classroom
+from services.scheduler_service import DAYS, TIMES
+from services.workload_service import WorkloadService, slot_hours
+
+# One teaching hour that has to be placed
+Lesson = namedtuple("Lesson", "faculty_id subject_id academic_class_id room_type min_capacity")
+Room = namedtuple("Room", "id room_type capacity")
+Placement = namedtuple("Placement", "bit classroom_id")
+
+N_SLOTS = len(DAYS) * len(TIMES)
+GRID = (1 << N_SLOTS) - 1
+DAY_MASKS = [((1 << len(TIMES)) - 1) << (i * len(TIMES)) for i in range(len(DAYS))]
+
+# Marker for cells held by existing rows / pins (never ejected)
+FIXED = -1
+TABU_TENURE = 10
+
+
+def bit_to_slot(bit):
+    return DAYS[bit // len(TIMES)], TIMES[bit % len(TIMES)]
+
+
+def slot_to_bit(day, start_time):
+    return DAYS.index(day) * len(TIMES) + TIMES.index(start_time)
+
+
+class Solution:
+    """Result of a solve: one Placement (or None) per lesson."""
+
+    def __init__(self, lessons, placements, elapsed, pinned=None):
+        self.lessons = lessons
+        self.placements = placements
+        self.elapsed = elapsed
+        self.pinned = dict(pinned or {})
+
+    @property
+    def unassigned(self):
+        return [i for i, p in enumerate(self.placements) if p is None]
+
+    @property
+    def is_complete(self):
+        return not self.unassigned
+
+    def rows(self):
+        """Timetable column dicts for every placed lesson."""
+        result = []
+        for lesson, p in zip(self.lessons, self.placements):
+            if p is None:
+                continue
+            day, start = bit_to_slot(p.bit)
+            result.append({
+                "day": day,
+                "start_time": start,
+                "end_time": (datetime.combine(date.today(), start) + timedelta(hours=1)).time(),
+                "faculty_id": lesson.faculty_id,
+                "subject_id": lesson.subject_id,
+                "academic_class_id": lesson.academic_class_id,
+                "classroom_id": p.classroom_id,
+            })
+        return result
+
+
+class TimetableGenerator:
+    """
+    Generate a clash-free week for a list of lessons.
+
+        gen = TimetableGenerator(lessons, rooms, max_hours=18, occupancy=OccupancyIndex.build())
+        solution = gen.solve()
+        solution = gen.resolve(solution, {lesson_idx: ("Monday", time(9, 0))})
+    """
+
+    def __init__(self, lessons, rooms, max_hours=18, occupancy=None, time_budget=5.0, seed=None):
+        self.lessons = list(lessons)
+        self.rooms = list(rooms)
+        self.max_hours = max_hours
+        self.occupancy = occupancy
+        self.time_budget = time_budget
+        self.random = random.Random(seed)
+
+        self._room_choices = {}
+
+        # Static DSATUR degree: lessons competing for the same faculty / class
+        self._fac_total = defaultdict(int)
+        self._cls_total = defaultdict(int)
+        for l in self.lessons:
+            self._fac_total[l.faculty_id] += 1
+            self._cls_total[l.academic_class_id] += 1
+
+    # ------------------------------------------------------------------ #
+    # State
+    # ------------------------------------------------------------------ #
+    def _reset(self):
+        self.fac_busy = defaultdict(int)
+        self.cls_busy = defaultdict(int)
+        self.room_busy = defaultdict(int)
+        self.fac_hours = defaultdict(int)
+        self.subj_days = defaultdict(int)  # (class, subject, day) -> lessons that day
+
+        # (entity_id, bit) -> lesson index or FIXED
+        self.at_fac = {}
+        self.at_cls = {}
+        self.at_room = {}
+
+        self.placements = [None] * len(self.lessons)
+        self.locked = set()
+
+        if self.occupancy is not None:
+            for s in self.occupancy.slots():
+                if s.day not in DAYS or s.start_time not in TIMES:
+                    continue
+                b = slot_to_bit(s.day, s.start_time)
+                self.fac_busy[s.faculty_id] |= 1 << b
+                self.cls_busy[s.academic_class_id] |= 1 << b
+                self.at_fac[(s.faculty_id, b)] = FIXED
+                self.at_cls[(s.academic_class_id, b)] = FIXED
+                if s.classroom_id is not None:
+                    self.room_busy[s.classroom_id] |= 1 << b
+                    self.at_room[(s.classroom_id, b)] = FIXED
+            for faculty_id in self._fac_total:
+                self.fac_hours[faculty_id] = self.occupancy.workload(faculty_id)
+
+    def _compatible_rooms(self, lesson):
+        """Rooms of the lesson's type that are big enough, smallest first."""
+        key = (lesson.room_type, lesson.min_capacity)
+        if key not in self._room_choices:
+            rooms = [r for r in self.rooms if r.capacity >= lesson.min_capacity]
+            typed = [r for r in rooms if r.room_type == lesson.room_type]
+            self._room_choices[key] = sorted(typed or rooms, key=lambda r: r.capacity)
+        return self._room_choices[key]
+
+    def _place(self, i, bit, room_id):
+        l = self.lessons[i]
+        mask = 1 << bit
+        self.fac_busy[l.faculty_id] |= mask
+        self.cls_busy[l.academic_class_id] |= mask
+        self.room_busy[room_id] |= mask
+        self.at_fac[(l.faculty_id, bit)] = i
+        self.at_cls[(l.academic_class_id, bit)] = i
+        self.at_room[(room_id, bit)] = i
+        self.fac_hours[l.faculty_id] += 1
+        self.subj_days[(l.academic_class_id, l.subject_id, bit // len(TIMES))] += 1
+        self.placements[i] = Placement(bit, room_id)
+
+    def _unplace(self, i):
+        l = self.lessons[i]
+        bit, room_id = self.placements[i]
+        mask = ~(1 << bit)
+        self.fac_busy[l.faculty_id] &= mask
+        self.cls_busy[l.academic_class_id] &= mask
+        self.room_busy[room_id] &= mask
+        del self.at_fac[(l.faculty_id, bit)]
+        del self.at_cls[(l.academic_class_id, bit)]
+        del self.at_room[(room_id, bit)]
+        self.fac_hours[l.faculty_id] -= 1
+        self.subj_days[(l.academic_class_id, l.subject_id, bit // len(TIMES))] -= 1
+        self.placements[i] = None
+
+    def _cell_score(self, lesson, bit):
+        day = bit // len(TIMES)
+        return (
+            self.subj_days[(lesson.academic_class_id, lesson.subject_id, day)],
+            (self.cls_busy[lesson.academic_class_id] & DAY_MASKS[day]).bit_count(),
+            bit % len(TIMES),
+            day,
+        )
+
+    def _free_room(self, lesson, bit):
+        for r in self._compatible_rooms(lesson):
+            if not self.room_busy[r.id] >> bit & 1:
+                return r.id
+        return None
+
+    def _try_place(self, i):
+        """Place lesson i in its best free cell; False if there is none."""
+        l = self.lessons[i]
+        if self.fac_hours[l.faculty_id] >= self.max_hours:
+            return False
+
+        free = GRID & ~(self.fac_busy[l.faculty_id] | self.cls_busy[l.academic_class_id])
+        cells = [b for b in range(N_SLOTS) if free >> b & 1]
+        cells.sort(key=lambda b: self._cell_score(l, b))
+        for b in cells:
+            room_id = self._free_room(l, b)
+            if room_id is not None:
+                self._place(i, b, room_id)
+                return True
+        return False
+
+    # ------------------------------------------------------------------ #
+    # Solving
+    # ------------------------------------------------------------------ #
+    def solve(self, pinned=None, start_from=None):
+        """
+        Generate a week. `pinned` maps lesson index -> (day, start_time) or
+        (day, start_time, classroom_id); `start_from` is a previous Solution whose
+        placements are kept where they don't collide with the pins.
+        """
+        started = _time.perf_counter()
+        deadline = started + self.time_budget
+        pinned = dict(pinned or {})
+
+        self._reset()
+        self._apply_pins(pinned)
+
+        pending = [i for i in range(len(self.lessons)) if i not in pinned]
+        if start_from is not None:
+            pending = self._restore(start_from, pending)
+
+        unassigned = self._dsatur(pending)
+        unassigned = self._repair(unassigned, deadline)
+
+        return Solution(self.lessons, list(self.placements), _time.perf_counter() - started, pinned)
+
+    def resolve(self, solution, pins):
+        """Incremental re-solve: pin lessons to new cells and repair only what they displace."""
+        pinned = dict(solution.pinned)
+        pinned.update(pins)
+        return self.solve(pinned=pinned, start_from=solution)
+
+    def _apply_pins(self, pinned):
+        for i, pin in pinned.items():
+            l = self.lessons[i]
+            b = slot_to_bit(pin[0], pin[1])
+            if self.fac_hours[l.faculty_id] >= self.max_hours:
+                raise ValueError(f"Pinned lesson {i} would take faculty {l.faculty_id} over {self.max_hours} weekly hours.")
+            if self.at_fac.get((l.faculty_id, b)) is not None or self.at_cls.get((l.academic_class_id, b)) is not None:
+                raise ValueError(f"Pinned lesson {i} clashes at {pin[0]} {pin[1].strftime('%H:%M')}.")
+            room_id = pin[2] if len(pin) > 2 else self._free_room(l, b)
+            if room_id is None or self.room_busy[room_id] >> b & 1:
+                raise ValueError(f"No classroom available for pinned lesson {i} at {pin[0]} {pin[1].strftime('%H:%M')}.")
+            self._place(i, b, room_id)
+            self.locked.add(i)
+
+    def _restore(self, solution, pending):
+        """Re-place a previous solution's lessons; return the ones that no longer fit."""
+        still_pending = []
+        for i in pending:
+            p = solution.placements[i] if i < len(solution.placements) else None
+            l = self.lessons[i]
+            if (
+                p is not None
+                and not (self.fac_busy[l.faculty_id] | self.cls_busy[l.academic_class_id] | self.room_busy[p.classroom_id]) >> p.bit & 1
+                and self.fac_hours[l.faculty_id] < self.max_hours
+            ):
+                self._place(i, p.bit, p.classroom_id)
+            else:
+                still_pending.append(i)
+        return still_pending
+
+    def _dsatur(self, pending):
+        groups = defaultdict(list)
+        for i in pending:
+            l = self.lessons[i]
+            groups[(l.faculty_id, l.academic_class_id)].append(i)
+
+        by_fac = defaultdict(list)
+        by_cls = defaultdict(list)
+        for key in groups:
+            by_fac[key[0]].append(key)
+            by_cls[key[1]].append(key)
+
+        def entry(key):
+            f, c = key
+            saturation = (self.fac_busy[f] | self.cls_busy[c]).bit_count()
+            return (-saturation, -(self._fac_total[f] + self._cls_total[c]), key)
+
+        heap = [entry(key) for key in groups]
+        heapq.heapify(heap)
+
+        unassigned = []
+        while heap:
+            item = heapq.heappop(heap)
+            key = item[2]
+            if not groups[key]:
+                continue
+            current = entry(key)
+            if current[:2] != item[:2]:
+                heapq.heappush(heap, current)  # stale saturation
+                continue
+
+            i = groups[key].pop()
+            if not self._try_place(i):
+                unassigned.append(i)
+
+            f, c = key
+            for other in set(by_fac[f]) | set(by_cls[c]):
+                if groups[other]:
+                    heapq.heappush(heap, entry(other))
+
+        return unassigned
+
+    def _ejectable(self, occupant, tabu, iteration):
+        return occupant != FIXED and occupant not in self.locked and tabu.get(occupant, 0) <= iteration
+
+    def _repair(self, unassigned, deadline):
+        if not unassigned:
+            return unassigned
+
+        best = list(self.placements)
+        best_count = len(unassigned)
+        tabu = {}
+        iteration = 0
+
+        while unassigned and _time.perf_counter() < deadline:
+            iteration += 1
+            candidates = [
+                i for i in unassigned
+                if self.fac_hours[self.lessons[i].faculty_id] < self.max_hours
+            ]
+            if not candidates:
+                break
+
+            i = self.random.choice(candidates)
+            l = self.lessons[i]
+            moves = []
+            best_cost = math.inf
+
+            for b in range(N_SLOTS):
+                victims = set()
+                blocked = False
+                for occupant in (self.at_fac.get((l.faculty_id, b)), self.at_cls.get((l.academic_class_id, b))):
+                    if occupant is None:
+                        continue
+                    if not self._ejectable(occupant, tabu, iteration):
+                        blocked = True
+                        break
+                    victims.add(occupant)
+                if blocked:
+                    continue
+
+                room_id = None
+                for r in self._compatible_rooms(l):
+                    occupant = self.at_room.get((r.id, b))
+                    if occupant is None or occupant in victims:
+                        room_id = r.id
+                        break
+                if room_id is None:
+                    for r in self._compatible_rooms(l):
+                        occupant = self.at_room.get((r.id, b))
+                        if self._ejectable(occupant, tabu, iteration):
+                            room_id = r.id
+                            victims.add(occupant)
+                            break
+                if room_id is None:
+                    continue
+
+                cost = len(victims) + 0.1 * self.subj_days[(l.academic_class_id, l.subject_id, b // len(TIMES))]
+                if cost < best_cost:
+                    best_cost = cost
+                    moves = [(b, room_id, victims)]
+                elif cost == best_cost:
+                    moves.append((b, room_id, victims))
+
+            if not moves:
+                continue
+
+            b, room_id, victims = self.random.choice(moves)
+            for v in victims:
+                self._unplace(v)
+                tabu[v] = iteration + TABU_TENURE
+                unassigned.append(v)
+            self._place(i, b, room_id)
+            unassigned.remove(i)
+            tabu[i] = iteration + TABU_TENURE
+
+            if len(unassigned) < best_count:
+                best = list(self.placements)
+                best_count = len(unassigned)
+
+        if len(unassigned) > best_count:
+            self._load(best)
+            unassigned = [i for i, p in enumerate(self.placements) if p is None]
+        return unassigned
+
+    def _load(self, placements):
+        locked = self.locked
+        self._reset()
+        self.locked = locked
+        for i, p in enumerate(placements):
+            if p is not None:
+                self._place(i, p.bit, p.classroom_id)
+
+
+# ---------------------------------------------------------------------- #
+# Database helpers
+# ---------------------------------------------------------------------- #
+def semester_year(semester):
+    """Semesters 1-2 are year 1, 3-4 year 2, ..."""
+    return (int(semester) + 1) // 2
+
+
+def load_problem(department_id=None, semester=None, hours_per_subject=3, class_size=0):
+    """
+    Build lessons from FacultySubject assignments.
+
+    Every active class is taught every subject assigned (for its semester) to the
+    faculty of its department; when several faculty share a subject, classes are
+    spread across them, least loaded first. Subjects with "lab" in the name need
+    a Lab room, everything else a Lecture room.
+
+    Hours a class already has for a subject count towards `hours_per_subject`,
+    and the rest go to the faculty already teaching it where possible, so
+    re-running on a partly filled timetable only adds what is missing.
+    """
+    classes_q = AcademicClass.query.filter_by(is_active=True)
+    assignments_q = (
+        db.session.query(FacultySubject.faculty_id, FacultySubject.subject_id, FacultySubject.semester,
+                         Faculty.department_id, Subject.subject_name)
+        .join(Faculty, FacultySubject.faculty_id == Faculty.id)
+        .join(Subject, FacultySubject.subject_id == Subject.id)
+        .filter(Faculty.is_active.is_(True), Subject.is_active.is_(True))
+    )
+    if department_id:
+        classes_q = classes_q.filter_by(department_id=department_id)
+        assignments_q = assignments_q.filter(Faculty.department_id == department_id)
+    if semester:
+        classes_q = classes_q.filter_by(year=semester_year(semester))
+        assignments_q = assignments_q.filter(FacultySubject.semester == str(semester))
+
+    # (department, year) -> subject -> [faculty]
+    teachers = defaultdict(lambda: defaultdict(list))
+    subject_names = {}
+    for faculty_id, subject_id, sem, dept_id, subject_name in assignments_q.all():
+        try:
+            year = semester_year(sem)
+        except ValueError:
+            continue
+        teachers[(dept_id, year)][subject_id].append(faculty_id)
+        subject_names[subject_id] = subject_name
+
+    # (class, subject) -> {faculty: hours} already in the timetable
+    scheduled = defaultdict(lambda: defaultdict(float))
+    load = defaultdict(float)
+    existing = (
+        db.session.query(Timetable.academic_class_id, Timetable.subject_id, Timetable.faculty_id,
+                         Timetable.start_time, Timetable.end_time)
+        .filter(Timetable.academic_class_id.in_(classes_q.with_entities(AcademicClass.id)))
+    )
+    for class_id, subject_id, faculty_id, start, end in existing.all():
+        hours = slot_hours(start, end)
+        scheduled[(class_id, subject_id)][faculty_id] += hours
+        load[faculty_id] += hours
+
+    lessons = []
+    for c in classes_q.order_by(AcademicClass.id).all():
+        for subject_id, faculty_ids in teachers[(c.department_id, c.year)].items():
+            taught = scheduled[(c.id, subject_id)]
+            missing = hours_per_subject - math.ceil(sum(taught.values()))
+            if missing <= 0:
+                continue
+            current = [f for f in faculty_ids if f in taught]
+            faculty_id = min(current or faculty_ids, key=lambda f: (load[f], f))
+            load[faculty_id] += missing
+            room_type = "Lab" if "lab" in subject_names[subject_id].lower() else "Lecture"
+            lessons.extend(
+                Lesson(faculty_id, subject_id, c.id, room_type, class_size)
+                for _ in range(missing)
+            )
+
+    rooms = [
+        Room(r.id, r.room_type, r.capacity)
+        for r in Classroom.query.filter_by(is_active=True).all()
+    ]
+    return lessons, rooms
+
+
+def apply_solution(solution, chunk_size=500):
+    """Insert the placed lessons; returns the number of rows written."""
+    rows = solution.rows()
+    for i in range(0, len(rows), chunk_size):
+        db.session.execute(insert(Timetable), rows[i:i + chunk_size])
+    WorkloadService.apply_rows(rows)
+    db.session.commit()
+    return len(rows)
+
+
+# ---------------------------------------------------------------------- #
+# Benchmark
+# ---------------------------------------------------------------------- #
+def synthetic_problem(n_classes, subjects_per_class=6, hours_per_subject=3, seed=0):
+    """A random but feasible-looking problem of the given size (no database needed)."""
+    rnd = random.Random(seed)
+    lessons = []
+    pairs = [(c, s) for c in range(n_classes) for s in range(subjects_per_class)]
+    rnd.shuffle(pairs)
+
+    # ~15 teaching hours per faculty, rooms for ~80% utilisation
+    per_faculty = max(1, 15 // hours_per_subject)
+    for k, (c, s) in enumerate(pairs):
+        faculty_id = k // per_faculty
+        room_type = "Lab" if s == 0 else "Lecture"
+        lessons.extend(
+            Lesson(faculty_id, c * subjects_per_class + s, c, room_type, 0)
+            for _ in range(hours_per_subject)
+        )
+
+    n_rooms = max(2, math.ceil(len(lessons) / N_SLOTS / 0.8))
+    n_labs = max(1, n_rooms // 5)
+    rooms = [Room(r, "Lab" if r < n_labs else "Lecture", 60) for r in range(n_rooms)]
+    return lessons, rooms
+
+
+def benchmark(class_counts=(10, 25, 50, 100, 200), time_budget=10.0, seed=0):
+    """Yield (classes, lessons, seconds, unassigned) for growing problem sizes."""
+    for n in class_counts:
+        lessons, rooms = synthetic_problem(n, seed=seed)
+        solution = TimetableGenerator(lessons, rooms, max_hours=18, time_budget=time_budget, seed=seed).solve()
+        yield n, len(lessons), solution.elapsed, len(solution.unassigned)
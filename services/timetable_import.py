@@ -0,0 +1,276 @@
+"""
+Bulk timetable import (CSV / XLSX).
+
+Every row is validated against a single in-memory OccupancyIndex snapshot, so
+clashes with the existing timetable *and* with earlier rows of the same file are
+caught without per-row SQL. Rows are validated and inserted a chunk at a time,
+one executemany per chunk in its own transaction; if a chunk can't be saved its
+rows are taken back out of the snapshot before the next chunk is checked.
+"""
+import csv
+import io
+from datetime import datetime, date, time, timedelta
+
+from flask import current_app
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Timetable, Faculty, Subject, AcademicClass, Classroom
+from services.scheduler_service import ConflictEngine, OccupancyIndex, OccupiedSlot, DAYS, TIMES
+from services.timetable_queries import FacultyRef, SubjectRef, ClassRef, RoomRef
+from services.workload_service import WorkloadService
+from services.leave_index import LeaveIndex
+
+# Expected columns (header names are case-insensitive)
+COLUMNS = ["day", "start_time", "end_time", "faculty_email", "subject_code", "class_name", "room_code"]
+REQUIRED_COLUMNS = ["day", "start_time", "faculty_email", "subject_code", "class_name", "room_code"]
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+class TimetableImportError(Exception):
+    """Raised when the uploaded file itself cannot be read."""
+
+
+def read_rows(stream, filename):
+    """
+    Read a CSV or XLSX file into a list of (line_number, row_dict).
+    `stream` is a binary file-like object.
+    """
+    name = (filename or "").lower()
+    if name.endswith(".xlsx"):
+        return _read_xlsx(stream)
+    if name.endswith(".csv"):
+        return _read_csv(stream)
+    raise TimetableImportError("Unsupported file type. Upload a .csv or .xlsx file.")
+
+
+def _normalise_header(value):
+    return str(value or "").strip().lower().replace(" ", "_")
+
+
+def _read_csv(stream):
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    reader = csv.reader(text)
+    try:
+        try:
+            header = [_normalise_header(h) for h in next(reader)]
+        except StopIteration:
+            raise TimetableImportError("The file is empty.")
+        _check_header(header)
+        return [
+            (line, dict(zip(header, values)))
+            for line, values in enumerate(reader, start=2)
+            if any(str(v).strip() for v in values)
+        ]
+    except UnicodeDecodeError:
+        raise TimetableImportError("The CSV file is not UTF-8 encoded. Save it as \"CSV UTF-8\" and upload it again.")
+
+
+def _read_xlsx(stream):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise TimetableImportError("XLSX import requires openpyxl (pip install openpyxl).")
+
+    wb = load_workbook(stream, read_only=True, data_only=True)
+    ws = wb.active
+    rows = ws.iter_rows(values_only=True)
+    try:
+        header = [_normalise_header(h) for h in next(rows)]
+    except StopIteration:
+        raise TimetableImportError("The workbook is empty.")
+    _check_header(header)
+    result = [
+        (line, dict(zip(header, values)))
+        for line, values in enumerate(rows, start=2)
+        if any(v not in (None, "") for v in values)
+    ]
+    wb.close()
+    return result
+
+
+def _check_header(header):
+    missing = [c for c in REQUIRED_COLUMNS if c not in header]
+    if missing:
+        raise TimetableImportError(f"Missing column(s): {', '.join(missing)}")
+
+
+def _parse_time(value):
+    if isinstance(value, time):
+        return value
+    if isinstance(value, datetime):
+        return value.time()
+    value = str(value or "").strip()
+    for fmt in ("%H:%M", "%H:%M:%S"):
+        try:
+            return datetime.strptime(value, fmt).time()
+        except ValueError:
+            pass
+    return None
+
+
+def _clean(value):
+    return str(value).strip() if value is not None else ""
+
+
+class TimetableImporter:
+    """
+    Validate and insert timetable rows in bulk.
+
+    Usage:
+        report = TimetableImporter().run(rows, dry_run=False)
+
+    `report` is a list of dicts, one per input row:
+        {"line": 2, "status": "Accepted" | "Rejected", "messages": [...], "row": {...}}
+    """
+
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+
+        # Reference lookups: one query per table, as plain tuples so the chunk commits don't expire them
+        self.faculty = {
+            email.lower(): FacultyRef(id_, name)
+            for id_, name, email in db.session.query(Faculty.id, Faculty.name, Faculty.email).filter_by(is_active=True)
+        }
+        self.subjects = {
+            code.lower(): SubjectRef(id_, code, name)
+            for id_, code, name in db.session.query(Subject.id, Subject.subject_code, Subject.subject_name)
+            .filter_by(is_active=True)
+        }
+        self.classes = {
+            name.lower(): ClassRef(id_, name)
+            for id_, name in db.session.query(AcademicClass.id, AcademicClass.name).filter_by(is_active=True)
+        }
+        self.rooms = {
+            code.lower(): RoomRef(id_, code)
+            for id_, code in db.session.query(Classroom.id, Classroom.room_code).filter_by(is_active=True)
+        }
+
+        # Approved leaves (warnings only)
+        self.leaves = LeaveIndex.get()
+
+        self.index = OccupancyIndex.build()
+        self.max_hours = current_app.config.get("MAX_WORKLOAD_HOURS", 18)
+
+    def validate(self, row):
+        """Validate one row; returns (entry, messages). entry is None if rejected."""
+        errors = []
+
+        day = _clean(row.get("day")).title()
+        if day not in DAYS:
+            errors.append(f"Invalid day '{row.get('day')}'.")
+
+        # Slots sit on the one-hour grid (as in the schedule form): clashes are matched on (day, start)
+        start = _parse_time(row.get("start_time"))
+        end = None
+        if start is None:
+            errors.append(f"Invalid start time '{row.get('start_time')}' (expected HH:MM).")
+        elif start not in TIMES:
+            errors.append(f"Start time {start:%H:%M} is not a timetable slot "
+                          f"({', '.join(t.strftime('%H:%M') for t in TIMES)}).")
+        else:
+            end = (datetime.combine(date.today(), start) + timedelta(hours=1)).time()
+
+        if _clean(row.get("end_time")):
+            given_end = _parse_time(row.get("end_time"))
+            if given_end is None:
+                errors.append(f"Invalid end time '{row.get('end_time')}' (expected HH:MM).")
+            elif end is not None and given_end != end:
+                errors.append(f"End time must be {end:%H:%M} (slots are one hour).")
+
+        faculty = self.faculty.get(_clean(row.get("faculty_email")).lower())
+        if not faculty:
+            errors.append(f"Unknown faculty '{row.get('faculty_email')}'.")
+        subject = self.subjects.get(_clean(row.get("subject_code")).lower())
+        if not subject:
+            errors.append(f"Unknown subject '{row.get('subject_code')}'.")
+        academic_class = self.classes.get(_clean(row.get("class_name")).lower())
+        if not academic_class:
+            errors.append(f"Unknown class '{row.get('class_name')}'.")
+        room = self.rooms.get(_clean(row.get("room_code")).lower())
+        if not room:
+            errors.append(f"Unknown classroom '{row.get('room_code')}'.")
+
+        if errors:
+            return None, errors
+
+        # Clashes against the snapshot (which includes rows accepted earlier in this file)
+        errors = ConflictEngine.check_clashes(self.index, day, start, faculty.id, academic_class.id, room.id)
+        if self.index.workload(faculty.id) >= self.max_hours:
+            errors.append(f"Faculty has reached maximum weekly workload ({self.index.workload(faculty.id)}/{self.max_hours} hours).")
+        if errors:
+            return None, errors
+
+        warnings = []
+        if upcoming := self.leaves.overlapping(faculty.id, date.today()):
+            leave_strs = [f"{l.start_date} to {l.end_date}" for l in upcoming]
+            warnings.append(f"WARNING: Faculty has approved leave(s): {', '.join(leave_strs)}")
+
+        self.index.insert(OccupiedSlot(
+            None, day, start, end, faculty.id, academic_class.id, room.id,
+            faculty.name, academic_class.name, room.room_code
+        ))
+        entry = {
+            "day": day,
+            "start_time": start,
+            "end_time": end,
+            "faculty_id": faculty.id,
+            "subject_id": subject.id,
+            "academic_class_id": academic_class.id,
+            "classroom_id": room.id,
+        }
+        return entry, warnings
+
+    def run(self, rows, dry_run=False):
+        report = []
+        rows = list(rows)
+
+        # Check a chunk, then save it, so later rows are checked against what was actually saved
+        for i in range(0, len(rows), self.chunk_size):
+            accepted = []
+            for line, row in rows[i:i + self.chunk_size]:
+                entry, messages = self.validate(row)
+                item = {
+                    "line": line,
+                    "status": "Accepted" if entry else "Rejected",
+                    "messages": messages,
+                    "row": {c: _clean(row.get(c)) for c in COLUMNS},
+                }
+                report.append(item)
+                if entry:
+                    accepted.append((item, entry))
+            if accepted and not dry_run:
+                self._insert(accepted)
+
+        return report
+
+    def _insert(self, chunk):
+        entries = [entry for _, entry in chunk]
+        try:
+            db.session.execute(insert(Timetable), entries)
+            WorkloadService.apply_rows(entries)
+            db.session.commit()
+        except IntegrityError:
+            # Someone else booked one of these cells since the snapshot was taken
+            db.session.rollback()
+            for item, entry in chunk:
+                self.index.remove(OccupiedSlot(
+                    None, entry["day"], entry["start_time"], entry["end_time"], entry["faculty_id"],
+                    entry["academic_class_id"], entry["classroom_id"], None, None, None
+                ))
+                item["status"] = "Rejected"
+                item["messages"].append("Database constraint violation while saving this chunk; re-run the import for these rows.")
+
+
+def summarize(report):
+    accepted = sum(1 for r in report if r["status"] == "Accepted")
+    return {"total": len(report), "accepted": accepted, "rejected": len(report) - accepted}
+
+
+def write_report_csv(report, stream):
+    """Write the per-row report as CSV to a text stream."""
+    writer = csv.writer(stream)
+    writer.writerow(["line", "status"] + COLUMNS + ["messages"])
+    for r in report:
+        writer.writerow([r["line"], r["status"]] + [r["row"][c] for c in COLUMNS] + ["; ".join(r["messages"])])
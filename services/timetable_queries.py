@@ -0,0 +1,107 @@
+from models import db, Timetable, Faculty, Subject, AcademicClass, Classroom
+from collections import namedtuple
+
+# Lightweight stand-ins for the related models. Attribute names match the ORM
+# ones, so templates can keep using slot.faculty.name, slot.subject.subject_name, ...
+FacultyRef = namedtuple("FacultyRef", "id name")
+SubjectRef = namedtuple("SubjectRef", "id subject_code subject_name")
+ClassRef = namedtuple("ClassRef", "id name")
+RoomRef = namedtuple("RoomRef", "id room_code")
+
+
+class SlotRow(namedtuple("SlotRow", "id day start_time end_time faculty subject academic_class classroom")):
+    """A timetable slot with its related names, detached from the session."""
+    __slots__ = ()
+
+    @property
+    def faculty_id(self):
+        return self.faculty.id
+
+    @property
+    def subject_id(self):
+        return self.subject.id
+
+    @property
+    def academic_class_id(self):
+        return self.academic_class.id
+
+    @property
+    def classroom_id(self):
+        return self.classroom.id if self.classroom else None
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "day": self.day,
+            "start_time": self.start_time.strftime("%H:%M"),
+            "end_time": self.end_time.strftime("%H:%M"),
+            "faculty": {"id": self.faculty.id, "name": self.faculty.name},
+            "subject": {"id": self.subject.id, "code": self.subject.subject_code, "name": self.subject.subject_name},
+            "academic_class": {"id": self.academic_class.id, "name": self.academic_class.name},
+            "classroom": {"id": self.classroom.id, "room_code": self.classroom.room_code} if self.classroom else None,
+        }
+
+
+class TimetableQuery:
+    """
+    Read-side query layer for timetable grids.
+
+    Slots are fetched with their faculty, subject, class and room names in one
+    joined column projection, so rendering a grid costs one query no matter how
+    many cells it has (no per-slot lazy loads).
+    """
+
+    @staticmethod
+    def _select():
+        return (
+            db.session.query(
+                Timetable.id,
+                Timetable.day,
+                Timetable.start_time,
+                Timetable.end_time,
+                Faculty.id,
+                Faculty.name,
+                Subject.id,
+                Subject.subject_code,
+                Subject.subject_name,
+                AcademicClass.id,
+                AcademicClass.name,
+                Classroom.id,
+                Classroom.room_code,
+            )
+            .join(Faculty, Timetable.faculty_id == Faculty.id)
+            .join(Subject, Timetable.subject_id == Subject.id)
+            .join(AcademicClass, Timetable.academic_class_id == AcademicClass.id)
+            .outerjoin(Classroom, Timetable.classroom_id == Classroom.id)
+        )
+
+    @staticmethod
+    def _to_row(r):
+        return SlotRow(
+            r[0], r[1], r[2], r[3],
+            FacultyRef(r[4], r[5]),
+            SubjectRef(r[6], r[7], r[8]),
+            ClassRef(r[9], r[10]),
+            RoomRef(r[11], r[12]) if r[11] is not None else None,
+        )
+
+    @staticmethod
+    def statement(*criteria, order_by=None):
+        """The SELECT behind rows()."""
+        query = TimetableQuery._select().filter(*criteria)
+        query = query.order_by(*(order_by if order_by is not None else (Timetable.start_time, Timetable.id)))
+        return query.statement
+
+    @staticmethod
+    def rows(*criteria, order_by=None):
+        """SlotRows matching the given Timetable filter expressions."""
+        statement = TimetableQuery.statement(*criteria, order_by=order_by)
+        return [TimetableQuery._to_row(r) for r in db.session.execute(statement)]
+
+    @staticmethod
+    def day_statement(day):
+        return TimetableQuery.statement(Timetable.day == day)
+
+    @staticmethod
+    def for_day(day):
+        return [TimetableQuery._to_row(r) for r in db.session.execute(TimetableQuery.day_statement(day))]
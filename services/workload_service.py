@@ -0,0 +1,148 @@
+from models import db, Timetable, Faculty
+from sqlalchemy import func, literal, event, update, bindparam, inspect
+from flask import current_app
+from datetime import datetime, date
+
+
+class WorkloadService:
+    """Weekly teaching hours per faculty, computed in SQL."""
+
+    @staticmethod
+    def duration_hours_expr():
+        """SQL expression for (end_time - start_time) in hours, per database dialect."""
+        dialect = db.session.get_bind().dialect.name
+        if dialect == "sqlite":
+            # SQLite stores TIME as text; julianday() understands 'HH:MM:SS'
+            return (func.julianday(Timetable.end_time) - func.julianday(Timetable.start_time)) * 24
+        if dialect == "postgresql":
+            return func.extract("epoch", Timetable.end_time - Timetable.start_time) / 3600
+        if dialect in ("mysql", "mariadb"):
+            return func.time_to_sec(func.timediff(Timetable.end_time, Timetable.start_time)) / 3600
+        # Unknown dialect: fall back to 1 slot = 1 hour
+        return literal(1)
+
+    @staticmethod
+    def hours_by_faculty(faculty_ids=None):
+        """
+        Return {faculty_id: hours} for all faculty (or the given ids) with one GROUP BY query.
+        Faculty without slots are omitted; use .get(id, 0).
+        """
+        query = db.session.query(
+            Timetable.faculty_id,
+            func.sum(WorkloadService.duration_hours_expr())
+        )
+        if faculty_ids is not None:
+            faculty_ids = list(faculty_ids)
+            if not faculty_ids:
+                return {}
+            query = query.filter(Timetable.faculty_id.in_(faculty_ids))
+
+        return {
+            faculty_id: WorkloadService.normalize(hours)
+            for faculty_id, hours in query.group_by(Timetable.faculty_id).all()
+        }
+
+    @staticmethod
+    def hours_for(faculty_id):
+        return WorkloadService.hours_by_faculty([faculty_id]).get(faculty_id, 0)
+
+    @staticmethod
+    def apply_rows(rows, sign=1):
+        """
+        Adjust counters for Timetable rows written in bulk (Core insert/delete
+        bypass the mapper events below). Call inside the same transaction.
+        `rows` are dicts with faculty_id, start_time, end_time.
+        """
+        deltas = {}
+        for row in rows:
+            deltas[row["faculty_id"]] = deltas.get(row["faculty_id"], 0) + sign * slot_hours(row["start_time"], row["end_time"])
+        _add_hours(db.session, deltas)
+
+    @staticmethod
+    def reconcile(fix=False):
+        """
+        Compare Faculty.weekly_hours with the timetable.
+        Returns [(faculty_id, name, stored, actual)] for every drifted counter;
+        with fix=True the counters are rewritten.
+        """
+        actual = WorkloadService.hours_by_faculty()
+        drift = []
+        for faculty_id, name, stored in db.session.query(Faculty.id, Faculty.name, Faculty.weekly_hours).all():
+            real = actual.get(faculty_id, 0)
+            if abs((stored or 0) - real) > 0.005:
+                drift.append((faculty_id, name, WorkloadService.normalize(stored), real))
+
+        if fix and drift:
+            db.session.execute(
+                update(Faculty.__table__)
+                .where(Faculty.__table__.c.id == bindparam("fid"))
+                .values(weekly_hours=bindparam("hours")),
+                [{"fid": faculty_id, "hours": real} for faculty_id, _, _, real in drift]
+            )
+            db.session.commit()
+        return drift
+
+    @staticmethod
+    def normalize(hours):
+        """Round to minutes precision; whole hours come back as int (18, not 18.0)."""
+        hours = round(float(hours or 0), 2)
+        return int(hours) if hours.is_integer() else hours
+
+    @staticmethod
+    def status(hours):
+        """Overloaded / Underutilized / Normal against the configured limits."""
+        if hours > current_app.config.get("MAX_WORKLOAD_HOURS", 18):
+            return "Overloaded"
+        if hours < current_app.config.get("MIN_WORKLOAD_HOURS", 10):
+            return "Underutilized"
+        return "Normal"
+
+
+def slot_hours(start_time, end_time):
+    if start_time is None or end_time is None:
+        return 1
+    return (datetime.combine(date.min, end_time) - datetime.combine(date.min, start_time)).total_seconds() / 3600
+
+
+def _add_hours(connection, deltas):
+    """UPDATE faculty SET weekly_hours = weekly_hours + delta, one executemany."""
+    params = [{"fid": f, "delta": d} for f, d in deltas.items() if f is not None and d]
+    if not params:
+        return
+    table = Faculty.__table__
+    connection.execute(
+        update(table)
+        .where(table.c.id == bindparam("fid"))
+        .values(weekly_hours=table.c.weekly_hours + bindparam("delta")),
+        params
+    )
+
+
+# Keep Faculty.weekly_hours in step with ORM writes, in the flush's transaction
+@event.listens_for(Timetable, "after_insert")
+def _timetable_inserted(mapper, connection, target):
+    _add_hours(connection, {target.faculty_id: slot_hours(target.start_time, target.end_time)})
+
+
+@event.listens_for(Timetable, "after_delete")
+def _timetable_deleted(mapper, connection, target):
+    _add_hours(connection, {target.faculty_id: -slot_hours(target.start_time, target.end_time)})
+
+
+@event.listens_for(Timetable, "after_update")
+def _timetable_updated(mapper, connection, target):
+    state = inspect(target)
+
+    def previous(attr):
+        history = state.attrs[attr].history
+        return history.deleted[0] if history.deleted else getattr(target, attr)
+
+    old_faculty = previous("faculty_id")
+    old_hours = slot_hours(previous("start_time"), previous("end_time"))
+    new_hours = slot_hours(target.start_time, target.end_time)
+    if old_faculty == target.faculty_id and old_hours == new_hours:
+        return
+
+    deltas = {old_faculty: -old_hours}
+    deltas[target.faculty_id] = deltas.get(target.faculty_id, 0) + new_hours
+    _add_hours(connection, deltas)
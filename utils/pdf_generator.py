@@ -1,29 +1,302 @@
+"""
+PDF rendering.
+
+The Jinja template is rendered in the request (it needs the app and is cheap);
+the HTML -> PDF conversion, which is CPU-heavy in xhtml2pdf, runs in a
+process pool (PDF_WORKERS) so it doesn't hold the GIL of the web worker.
+
+Output is cached on disk (PDF_CACHE_DIR) keyed by the template name and a
+version string from the caller that changes with the data shown (see
+PdfReports.version: faculty id + data versions). It is looked up before the
+context is built, so an unchanged faculty timetable is served without queries,
+template rendering or conversion. A cached PDF keeps the "generated at" time
+of its first rendering; the data hasn't changed since. Without a version
+nothing is cached.
+
+Each pool process warms up once when it starts (warm_up): xhtml2pdf and
+ReportLab are imported, the base fonts loaded, and a page with each report
+template's stylesheet converted, so the first document doesn't pay for them.
+`flask bench-pdf` reports the per-document latency.
+"""
 from io import BytesIO
-from xhtml2pdf import pisa
-from flask import render_template, make_response
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+import hashlib
+import multiprocessing
+import os
+import re
+import threading
+
+from flask import render_template, make_response, current_app
+
+
+BASE_FONTS = ("Helvetica", "Helvetica-Bold", "Helvetica-Oblique", "Helvetica-BoldOblique")
+
+_STYLE_BLOCK = re.compile(r"<style[^>]*>(.*?)</style>", re.S | re.I)
+_warmed_up = False
+
 
-def render_pdf(template_name, context, filename="report.pdf"):
+def html_to_pdf(html):
+    """HTML -> PDF bytes, or None if xhtml2pdf reports an error. Runs in the pool."""
+    from xhtml2pdf import pisa
+
+    warm_up()
+    result = BytesIO()
+    pdf = pisa.pisaDocument(BytesIO(html.encode("UTF-8")), result)
+    return None if pdf.err else result.getvalue()
+
+
+def warm_up(stylesheets=()):
+    """
+    Once per process (the pool initializer): load fonts and convert a throwaway
+    page with each report stylesheet, so the lazy imports, font metrics and
+    ReportLab caches are filled before the first real document.
+    """
+    global _warmed_up
+    if _warmed_up:
+        return
+    _warmed_up = True
+
+    from reportlab.pdfbase import pdfmetrics
+
+    for font in BASE_FONTS:
+        pdfmetrics.getFont(font)
+    for css in stylesheets:
+        html_to_pdf(f"<html><head><style>{css}</style></head><body><h1>-</h1><table><tr><th>-</th>"
+                    f"<td>-</td></tr></table><p><strong>-</strong></p></body></html>")
+
+
+class PdfRenderer:
+    _pool = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def pool():
+        """The process pool, or None when PDF_WORKERS is 0 (convert in-process)."""
+        workers = current_app.config.get("PDF_WORKERS", 2)
+        if not workers:
+            if not _warmed_up:
+                warm_up(PdfRenderer.stylesheets())
+            return None
+        with PdfRenderer._lock:
+            if PdfRenderer._pool is None:
+                # spawn: children must not inherit the web worker's DB connections and threads
+                PdfRenderer._pool = ProcessPoolExecutor(
+                    max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                    initializer=warm_up, initargs=(PdfRenderer.stylesheets(),)
+                )
+            return PdfRenderer._pool
+
+    @staticmethod
+    def start():
+        """Start the pool processes now (and wait for their warm-up) instead of on first use."""
+        pool = PdfRenderer.pool()
+        if pool is not None:
+            for future in [pool.submit(warm_up) for _ in range(current_app.config.get("PDF_WORKERS", 2))]:
+                future.result()
+
+    @staticmethod
+    def stylesheets():
+        """The <style> blocks of the report templates, read from the template sources."""
+        from services.pdf_reports import TEMPLATES
+
+        env = current_app.jinja_env
+        css = []
+        for name in TEMPLATES.values():
+            source, _, _ = env.loader.get_source(env, name)
+            css.extend(block for block in _STYLE_BLOCK.findall(source) if "{" in block)
+        return css
+
+    @staticmethod
+    def convert(html):
+        pool = PdfRenderer.pool()
+        if pool is None:
+            return html_to_pdf(html)
+        try:
+            return pool.submit(html_to_pdf, html).result(timeout=current_app.config.get("PDF_RENDER_TIMEOUT", 120))
+        except BrokenProcessPool:
+            # A child died (e.g. out of memory); start a fresh pool next time
+            with PdfRenderer._lock:
+                PdfRenderer._pool = None
+            raise
+
+    @staticmethod
+    def cache_dir():
+        path = current_app.config.get("PDF_CACHE_DIR") or os.path.join(current_app.instance_path, "pdf_cache")
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    @staticmethod
+    def cache_key(template_name, version):
+        return hashlib.sha256(f"{template_name}\0{version}".encode("UTF-8")).hexdigest()
+
+    @staticmethod
+    def cached(template_name, version):
+        """The cached PDF bytes for this template and data version, or None."""
+        return _read_cached(_cache_path(template_name, version))
+
+    @staticmethod
+    def render_html(template_name, html, version=None):
+        """PDF bytes for already rendered HTML, from the cache or the pool. None on error."""
+        path = _cache_path(template_name, version)
+        pdf = _read_cached(path)
+        if pdf is None:
+            pdf = PdfRenderer.convert(html)
+            _store(path, pdf)
+        return pdf
+
+    @staticmethod
+    def render_html_many(items):
+        """
+        Convert [(name, template_name, html, version)] in parallel across the pool.
+        Yields (name, PDF bytes or None) as each one finishes, cached ones first.
+        """
+        pool = PdfRenderer.pool()
+        pending = {}
+        for name, template_name, html, version in items:
+            path = _cache_path(template_name, version)
+            pdf = _read_cached(path)
+            if pdf is not None:
+                yield name, pdf
+            elif pool is None:
+                pdf = html_to_pdf(html)
+                _store(path, pdf)
+                yield name, pdf
+            else:
+                pending[pool.submit(html_to_pdf, html)] = (name, path)
+
+        for future in as_completed(pending):
+            name, path = pending[future]
+            try:
+                pdf = future.result()
+            except BrokenProcessPool:
+                with PdfRenderer._lock:
+                    PdfRenderer._pool = None
+                raise
+            _store(path, pdf)
+            yield name, pdf
+
+    @staticmethod
+    def render(template_name, context, version=None):
+        """
+        PDF bytes (None on error) of the template, from the cache when `version`
+        is given and already rendered. `context` may be a function returning the
+        context, so it's only built on a cache miss.
+        """
+        path = _cache_path(template_name, version)
+        pdf = _read_cached(path)
+        if pdf is None:
+            if callable(context):
+                context = context()
+            pdf = PdfRenderer.convert(render_template(template_name, **context))
+            _store(path, pdf)
+        return pdf
+
+    @staticmethod
+    def render_many(documents):
+        """
+        Render [(name, template_name, context, version)] and convert them together
+        across the pool. Yields (name, PDF bytes or None) as each one finishes.
+        """
+        env = current_app.jinja_env
+        templates = {}
+        items = []
+        for name, template_name, context, version in documents:
+            if template_name not in templates:
+                templates[template_name] = env.get_template(template_name)
+            html = render_template(templates[template_name], **context)
+            items.append((name, template_name, html, version))
+        return PdfRenderer.render_html_many(items)
+
+
+def _cache_path(template_name, version):
+    if version is None or not current_app.config.get("PDF_CACHE_MAX_FILES", 1000):
+        return None
+    return os.path.join(PdfRenderer.cache_dir(), PdfRenderer.cache_key(template_name, version) + ".pdf")
+
+
+def _read_cached(path):
+    if path is None:
+        return None
+    try:
+        with open(path, "rb") as f:
+            os.utime(path)  # keep recently used entries when pruning
+            return f.read()
+    except OSError:
+        return None
+
+
+def _store(path, pdf):
+    if path is None or pdf is None:
+        return
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(pdf)
+    os.replace(tmp, path)
+    _prune(os.path.dirname(path), current_app.config.get("PDF_CACHE_MAX_FILES", 1000))
+
+
+def _prune(directory, max_files):
+    entries = [e for e in os.scandir(directory) if e.name.endswith(".pdf")]
+    if len(entries) <= max_files:
+        return
+    entries.sort(key=lambda e: e.stat().st_mtime)
+    for entry in entries[:len(entries) - max_files]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass  # pruned by another worker
+
+
+def _write_pdf(path, template_name, html, version):
+    pdf = PdfRenderer.render_html(template_name, html, version)
+    if pdf is None:
+        raise RuntimeError("PDF rendering failed")
+    _write_bytes(path, pdf)
+
+
+def _write_bytes(path, pdf):
+    with open(path, "wb") as f:
+        f.write(pdf)
+
+
+def submit_pdf_job(template_name, context, filename="report.pdf", version=None):
+    """
+    Render the HTML now and convert it in a background job (a cached PDF is
+    just written out). `context` as in PdfRenderer.render. Returns the job id.
+    """
+    from services.jobs import JobManager
+
+    pdf = PdfRenderer.cached(template_name, version)
+    if pdf is not None:
+        return JobManager.submit("pdf", filename, _write_bytes, pdf)
+    if callable(context):
+        context = context()
+    html = render_template(template_name, **context)
+    return JobManager.submit("pdf", filename, _write_pdf, template_name, html, version)
+
+
+def render_pdf(template_name, context, filename="report.pdf", version=None):
     """
     Render a PDF from an HTML template.
-    
+
     Args:
         template_name (str): Path to the HTML template (e.g., 'reports/pdf_timetable.html')
-        context (dict): Dictionary of variables to pass to the template
+        context (dict): Dictionary of variables to pass to the template, or a
+            function returning it (only called when the PDF isn't cached)
         filename (str): Filename for the downloaded PDF
-        
+        version (str): Data version of the context, to serve and keep the PDF
+            in the cache (None: always render)
+
     Returns:
         Response: Flask response object with PDF content
     """
-    html = render_template(template_name, **context)
-    result = BytesIO()
-    
-    # Generate PDF
-    pdf = pisa.pisaDocument(BytesIO(html.encode("UTF-8")), result)
-    
-    if not pdf.err:
-        response = make_response(result.getvalue())
+    pdf = PdfRenderer.render(template_name, context, version)
+
+    if pdf is not None:
+        response = make_response(pdf)
         response.headers['Content-Type'] = 'application/pdf'
         response.headers['Content-Disposition'] = f'attachment; filename={filename}'
         return response
-    
+
     return None